@@ -0,0 +1,46 @@
+"""Add composite per-user time indexes to health_records and document_files
+
+Revision ID: add_composite_record_indexes
+Revises: add_vital_rollups
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_composite_record_indexes'
+down_revision = 'add_vital_rollups'
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ('ix_health_records_user_type_recorded', 'health_records', ['user_id', 'record_type', 'recorded_at DESC', 'id DESC']),
+    ('ix_health_records_user_recorded', 'health_records', ['user_id', 'recorded_at DESC', 'id DESC']),
+    ('ix_document_files_user_category_uploaded', 'document_files', ['user_id', 'category', 'uploaded_at DESC', 'id DESC']),
+    ('ix_document_files_user_uploaded', 'document_files', ['user_id', 'uploaded_at DESC', 'id DESC']),
+]
+
+# Single-column indexes now covered by the leading column of the composites
+REDUNDANT_INDEXES = [
+    ('ix_health_records_user_id', 'health_records', ['user_id']),
+    ('ix_document_files_user_id', 'document_files', ['user_id']),
+]
+
+
+def upgrade():
+    # Built concurrently on PostgreSQL so large tables stay writable
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, [sa.text(column) for column in columns], postgresql_concurrently=True)
+        for name, table, _ in REDUNDANT_INDEXES:
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, columns in REDUNDANT_INDEXES:
+            op.create_index(name, table, columns, postgresql_concurrently=True)
+        for name, table, _ in INDEXES:
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
@@ -0,0 +1,26 @@
+"""Add rep count and form score to exercise_logs for pose-analysed sessions
+
+Revision ID: add_exercise_log_form_metrics
+Revises: add_exercise_logs
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_exercise_log_form_metrics'
+down_revision = 'add_exercise_logs'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('exercise_logs', sa.Column('rep_count', sa.Integer(), nullable=True))
+    op.add_column('exercise_logs', sa.Column('form_score', sa.Float(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('exercise_logs', 'form_score')
+    op.drop_column('exercise_logs', 'rep_count')
@@ -0,0 +1,76 @@
+"""Add exercise_logs table and move exercise health records into it
+
+Revision ID: add_exercise_logs
+Revises: partition_records_monthly
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_exercise_logs'
+down_revision = 'partition_records_monthly'
+branch_labels = None
+depends_on = None
+
+# Exercise used to be stored as a health record with
+# notes "Exercise: <type>, Calories: <n>" and the duration as its value.
+# Unparseable notes fall back to what the old reader returned.
+BACKFILL = {
+    'postgresql': """
+        INSERT INTO exercise_logs (user_id, exercise_type, duration_minutes, calories_burned, performed_at)
+        SELECT user_id,
+               left(COALESCE(substring(notes from '^Exercise: (.+), Calories: -?[0-9]+$'), 'Unknown'), 64),
+               round(value)::integer,
+               COALESCE(substring(notes from ', Calories: (-?[0-9]{1,9})$')::integer, 0),
+               recorded_at
+        FROM health_records
+        WHERE record_type::text = 'exercise'
+    """,
+    'sqlite': """
+        INSERT INTO exercise_logs (user_id, exercise_type, duration_minutes, calories_burned, performed_at)
+        SELECT user_id,
+               CASE WHEN notes LIKE 'Exercise: %, Calories: %'
+                    THEN substr(substr(notes, 11, instr(notes, ', Calories: ') - 11), 1, 64)
+                    ELSE 'Unknown' END,
+               CAST(round(value) AS INTEGER),
+               CASE WHEN notes LIKE 'Exercise: %, Calories: %'
+                    THEN CAST(substr(notes, instr(notes, ', Calories: ') + 12) AS INTEGER)
+                    ELSE 0 END,
+               recorded_at
+        FROM health_records
+        WHERE record_type = 'exercise'
+    """,
+}
+
+def upgrade():
+    op.create_table(
+        'exercise_logs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=False),
+        sa.Column('exercise_type', sa.String(length=64), nullable=False),
+        sa.Column('duration_minutes', sa.Integer(), nullable=False),
+        sa.Column('calories_burned', sa.Integer(), nullable=False),
+        sa.Column('performed_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_exercise_logs_id'), 'exercise_logs', ['id'], unique=False)
+    op.create_index(
+        'ix_exercise_logs_user_performed', 'exercise_logs',
+        ['user_id', sa.text('performed_at DESC'), sa.text('id DESC')], unique=False
+    )
+
+    dialect = op.get_bind().dialect.name
+    if dialect in BACKFILL:
+        op.execute(BACKFILL[dialect])
+        cast = "record_type::text" if dialect == 'postgresql' else "record_type"
+        op.execute(f"DELETE FROM health_records WHERE {cast} = 'exercise'")
+
+
+def downgrade():
+    # Logs are not moved back: 'exercise' is not a health_record_type_enum value
+    op.drop_index('ix_exercise_logs_user_performed', table_name='exercise_logs')
+    op.drop_index(op.f('ix_exercise_logs_id'), table_name='exercise_logs')
+    op.drop_table('exercise_logs')
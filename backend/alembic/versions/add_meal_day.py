@@ -0,0 +1,24 @@
+"""Add day to meals for generated week plans
+
+Revision ID: add_meal_day
+Revises: add_workout_plans
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_meal_day'
+down_revision = 'add_workout_plans'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('meals', sa.Column('day', sa.Integer(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('meals', 'day')
@@ -0,0 +1,47 @@
+"""Add vital_chunks table for compressed vitals time series
+
+Revision ID: add_vital_chunks
+Revises: add_file_data_column
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_vital_chunks'
+down_revision = 'add_file_data_column'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Reuse the enum type created with health_records
+    record_type = postgresql.ENUM(
+        'blood_pressure', 'heart_rate', 'weight', 'blood_glucose',
+        name='health_record_type_enum', create_type=False
+    )
+    op.create_table(
+        'vital_chunks',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=False),
+        sa.Column('record_type', record_type, nullable=False),
+        sa.Column('chunk_start', sa.DateTime(), nullable=False),
+        sa.Column('first_at', sa.DateTime(), nullable=False),
+        sa.Column('last_at', sa.DateTime(), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.Column('min_value', sa.Float(), nullable=False),
+        sa.Column('max_value', sa.Float(), nullable=False),
+        sa.Column('last_value', sa.Float(), nullable=False),
+        sa.Column('data', sa.LargeBinary(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('user_id', 'record_type', 'chunk_start', name='uq_vital_chunks_user_type_start')
+    )
+    op.create_index(op.f('ix_vital_chunks_id'), 'vital_chunks', ['id'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_vital_chunks_id'), table_name='vital_chunks')
+    op.drop_table('vital_chunks')
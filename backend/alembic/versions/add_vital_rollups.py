@@ -0,0 +1,47 @@
+"""Add vital_rollups table for hourly and daily vitals aggregates
+
+Revision ID: add_vital_rollups
+Revises: add_vital_chunks
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_vital_rollups'
+down_revision = 'add_vital_chunks'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Reuse the enum type created with health_records
+    record_type = postgresql.ENUM(
+        'blood_pressure', 'heart_rate', 'weight', 'blood_glucose',
+        name='health_record_type_enum', create_type=False
+    )
+    op.create_table(
+        'vital_rollups',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=False),
+        sa.Column('record_type', record_type, nullable=False),
+        sa.Column('resolution', sa.String(length=4), nullable=False),
+        sa.Column('bucket_start', sa.DateTime(), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.Column('total', sa.Float(), nullable=False),
+        sa.Column('min_value', sa.Float(), nullable=False),
+        sa.Column('max_value', sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('user_id', 'record_type', 'resolution', 'bucket_start', name='uq_vital_rollups_user_type_res_start')
+    )
+    op.create_index(op.f('ix_vital_rollups_id'), 'vital_rollups', ['id'], unique=False)
+    # Chunks written before this revision are rolled up with
+    # VitalsStore.rebuild_rollups (or on their next write)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_vital_rollups_id'), table_name='vital_rollups')
+    op.drop_table('vital_rollups')
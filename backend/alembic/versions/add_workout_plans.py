@@ -0,0 +1,99 @@
+"""Add workout_plans catalog and seed the starter plans
+
+Revision ID: add_workout_plans
+Revises: add_exercise_log_form_metrics
+Create Date: 2026-10-19
+
+"""
+import json
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_workout_plans'
+down_revision = 'add_exercise_log_form_metrics'
+branch_labels = None
+depends_on = None
+
+# The starter catalog as of this revision. Kept here rather than imported so the
+# migration stays reproducible when workout_recommender.STARTER_PLANS changes.
+STARTER_PLANS = [
+    {
+        'name': 'Beginner Strength Training',
+        'description': 'A gentle introduction to strength training for beginners',
+        'level': 'beginner',
+        'goal': 'strength',
+        'duration_minutes': 25,
+        'exercises': [
+            {'name': 'Bodyweight Squats', 'sets': 3, 'reps': 10, 'rest': '60 seconds'},
+            {'name': 'Push-ups (or Modified Push-ups)', 'sets': 3, 'reps': 8, 'rest': '60 seconds'},
+            {'name': 'Plank', 'sets': 3, 'duration': '30 seconds', 'rest': '45 seconds'},
+            {'name': 'Dumbbell Rows', 'sets': 3, 'reps': 10, 'rest': '60 seconds'}
+        ]
+    },
+    {
+        'name': 'Cardio Fitness',
+        'description': 'Improve cardiovascular health and endurance',
+        'level': 'intermediate',
+        'goal': 'cardio',
+        'duration_minutes': 20,
+        'exercises': [
+            {'name': 'Jumping Jacks', 'sets': 3, 'duration': '60 seconds', 'rest': '30 seconds'},
+            {'name': 'High Knees', 'sets': 3, 'duration': '45 seconds', 'rest': '30 seconds'},
+            {'name': 'Mountain Climbers', 'sets': 3, 'duration': '45 seconds', 'rest': '30 seconds'},
+            {'name': 'Burpees', 'sets': 3, 'reps': 10, 'rest': '60 seconds'}
+        ]
+    },
+    {
+        'name': 'Flexibility & Mobility',
+        'description': 'Improve flexibility and joint mobility',
+        'level': 'beginner',
+        'goal': 'flexibility',
+        'duration_minutes': 15,
+        'exercises': [
+            {'name': 'Cat-Cow Stretch', 'duration': '60 seconds'},
+            {'name': 'Downward Dog', 'duration': '45 seconds'},
+            {'name': 'Pigeon Pose', 'sets': 2, 'duration': '60 seconds per side'},
+            {'name': "World's Greatest Stretch", 'sets': 2, 'reps': 5, 'duration': '30 seconds per side'}
+        ]
+    },
+]
+
+
+def upgrade():
+    op.create_table(
+        'workout_plans',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('description', sa.Text(), nullable=False),
+        sa.Column('level', sa.String(length=16), nullable=False),
+        sa.Column('goal', sa.String(length=16), nullable=False),
+        sa.Column('duration_minutes', sa.Integer(), nullable=False),
+        sa.Column('exercises', postgresql.JSON(astext_type=sa.Text()), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_workout_plans_id'), 'workout_plans', ['id'], unique=False)
+
+    # exercises goes in as JSON text so the seed also renders in --sql mode
+    workout_plans = sa.table(
+        'workout_plans',
+        sa.column('name', sa.String), sa.column('description', sa.Text),
+        sa.column('level', sa.String), sa.column('goal', sa.String),
+        sa.column('duration_minutes', sa.Integer), sa.column('exercises', sa.Text),
+        sa.column('created_at', sa.DateTime)
+    )
+    now = datetime.utcnow()
+    op.bulk_insert(workout_plans, [
+        {**plan, 'exercises': json.dumps(plan['exercises']), 'created_at': now}
+        for plan in STARTER_PLANS
+    ])
+
+
+def downgrade():
+    op.drop_index(op.f('ix_workout_plans_id'), table_name='workout_plans')
+    op.drop_table('workout_plans')
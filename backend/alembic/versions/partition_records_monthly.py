@@ -0,0 +1,87 @@
+"""Partition health_records and document_files by month on PostgreSQL
+
+Revision ID: partition_records_monthly
+Revises: add_composite_record_indexes
+Create Date: 2026-10-19
+
+"""
+from datetime import date
+
+from alembic import op
+import sqlalchemy as sa
+
+from manage_partitions import PARTITIONED_TABLES, MONTHS_AHEAD, add_months, months, create_partition
+
+
+# revision identifiers, used by Alembic.
+revision = 'partition_records_monthly'
+down_revision = 'add_composite_record_indexes'
+branch_labels = None
+depends_on = None
+
+# Indexes recreated on the new table (propagated to every partition)
+INDEXES = {
+    'health_records': [
+        ('ix_health_records_id', 'id'),
+        ('ix_health_records_record_type', 'record_type'),
+        ('ix_health_records_recorded_at', 'recorded_at'),
+        ('ix_health_records_user_type_recorded', 'user_id, record_type, recorded_at DESC, id DESC'),
+        ('ix_health_records_user_recorded', 'user_id, recorded_at DESC, id DESC'),
+    ],
+    'document_files': [
+        ('ix_document_files_id', 'id'),
+        ('ix_document_files_category', 'category'),
+        ('ix_document_files_uploaded_at', 'uploaded_at'),
+        ('ix_document_files_user_category_uploaded', 'user_id, category, uploaded_at DESC, id DESC'),
+        ('ix_document_files_user_uploaded', 'user_id, uploaded_at DESC, id DESC'),
+    ],
+}
+
+
+def _rebuild(table, partition_key=None):
+    """
+    Copies `table` into a new table with the same columns, partitioned by
+    month of `partition_key` (or plain when None), and swaps it in. Keys and
+    indexes are added after the copy; the id sequence moves to the new table.
+    """
+    bind = op.get_bind()
+    old = f'{table}_old'
+    op.execute(f'ALTER TABLE {table} RENAME TO {old}')
+    partition_clause = f' PARTITION BY RANGE ({partition_key})' if partition_key else ''
+    op.execute(f'CREATE TABLE {table} (LIKE {old} INCLUDING DEFAULTS INCLUDING CONSTRAINTS){partition_clause}')
+
+    if partition_key:
+        op.execute(f'CREATE TABLE {table}_default PARTITION OF {table} DEFAULT')
+        first = bind.execute(sa.text(f'SELECT min({partition_key}) FROM {old}')).scalar()
+        this_month = date.today().replace(day=1)
+        first = min(first.date(), this_month) if first else this_month
+        for month in months(first, add_months(this_month, MONTHS_AHEAD)):
+            create_partition(bind, table, month)
+
+    op.execute(f'INSERT INTO {table} SELECT * FROM {old}')
+    sequence = bind.execute(sa.text(f"SELECT pg_get_serial_sequence('{old}', 'id')")).scalar()
+    if sequence:
+        op.execute(f'ALTER SEQUENCE {sequence} OWNED BY {table}.id')
+    op.execute(f'DROP TABLE {old} CASCADE')
+
+    # A partitioned table's primary key has to include the partition key
+    primary_key = f'id, {partition_key}' if partition_key else 'id'
+    op.execute(f'ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY ({primary_key})')
+    op.execute(f'ALTER TABLE {table} ADD CONSTRAINT {table}_user_id_fkey FOREIGN KEY (user_id) REFERENCES users (id)')
+    for name, columns in INDEXES[table]:
+        op.execute(f'CREATE INDEX {name} ON {table} ({columns})')
+
+
+def upgrade():
+    # SQLite (local fallback) databases stay unpartitioned
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    for table, partition_key in PARTITIONED_TABLES.items():
+        _rebuild(table, partition_key)
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    for table in PARTITIONED_TABLES:
+        _rebuild(table)
@@ -1,10 +1,12 @@
 from fastapi import APIRouter
-from app.api.v1.routers import auth, predictions
+from app.api.v1.routers import auth, predictions, ai, documents
 
 api_router = APIRouter()
 
 api_router.include_router(auth.router, prefix="/auth", tags=["auth"])
 api_router.include_router(predictions.router, prefix="/predictions", tags=["predictions"])
+api_router.include_router(ai.router, prefix="/ai", tags=["ai"])
+api_router.include_router(documents.router, prefix="/documents", tags=["documents"])
 
 # Placeholder test route
 @api_router.get("/health")
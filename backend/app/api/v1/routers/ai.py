@@ -0,0 +1,65 @@
+from fastapi import APIRouter, Depends, Request
+from typing import Optional
+from app.services.ai_service import AIService, ai_metrics
+from app.schemas.ai import ChatRequest, ChatResponse, ChatHistoryResponse
+from app.core.firebase import get_current_user
+from app.core.sse import sse_tokens, sse_response
+from app.dependencies.auth import require_admin
+from app.integrations.llm_cache import CachingLLMProvider
+
+router = APIRouter()
+ai_service = AIService()
+
+@router.post("/chat", response_model=ChatResponse)
+async def chat_with_assistant(
+    payload: ChatRequest,
+    current_user_uid: str = Depends(get_current_user)
+):
+    """
+    Asks the personalized health assistant and returns the full answer.
+    """
+    response = await ai_service.ask_health_assistant(current_user_uid, payload.message)
+    return ChatResponse(response=response)
+
+@router.post("/chat/stream")
+async def stream_chat_with_assistant(
+    payload: ChatRequest,
+    request: Request,
+    current_user_uid: str = Depends(get_current_user)
+):
+    """
+    Streams the assistant's answer as server-sent events while it is generated.
+    The turn is saved to the conversation once the answer is complete; if the
+    model fails part-way the stream ends with an `error` event and nothing is saved.
+    """
+    chunks = ai_service.stream_health_assistant(current_user_uid, payload.message)
+    return sse_response(sse_tokens(request, chunks))
+
+@router.get("/history", response_model=ChatHistoryResponse)
+async def get_chat_history(
+    before: Optional[int] = None,
+    limit: int = 50,
+    current_user_uid: str = Depends(get_current_user)
+):
+    """
+    Returns a page of the conversation history, oldest message first.
+    """
+    messages, next_before = await ai_service.get_conversation_history(current_user_uid, before=before, limit=limit)
+    return ChatHistoryResponse(messages=messages, before=next_before)
+
+@router.get("/cache/stats")
+async def get_response_cache_stats(admin: dict = Depends(require_admin)):
+    """
+    Response cache hit rate and the LLM latency it saved (admins only).
+    """
+    provider = ai_service.llm_provider
+    if not isinstance(provider, CachingLLMProvider):
+        return {"enabled": False}
+    return {"enabled": True, **provider.cache.stats()}
+
+@router.get("/metrics")
+async def get_ai_latency_metrics(admin: dict = Depends(require_admin)):
+    """
+    Chat latency split into context assembly and LLM time (admins only).
+    """
+    return ai_metrics.snapshot()
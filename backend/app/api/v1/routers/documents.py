@@ -0,0 +1,55 @@
+from fastapi import APIRouter, Depends, File, Form, UploadFile
+from typing import Optional
+from app.services.upload_service import UploadService
+from app.services.job_queue import JobQueue
+from app.schemas.document import DocumentUploadResponse, JobStatusResponse
+from app.core.firebase import get_current_user
+from app.core.exceptions import NotFoundException
+
+router = APIRouter()
+upload_service = UploadService()
+job_queue = JobQueue()
+
+@router.post("/", response_model=DocumentUploadResponse)
+async def upload_document(
+    file: UploadFile = File(...),
+    category: str = Form(...),
+    notes: Optional[str] = Form(None),
+    current_user_uid: str = Depends(get_current_user)
+):
+    """
+    Stores a medical document and returns immediately. Text extraction and the
+    AI summary run as a background job; poll the returned job_id for progress.
+    """
+    file_bytes = await file.read()
+    doc = await upload_service.upload_document(
+        user_id=current_user_uid,
+        file_bytes=file_bytes,
+        file_name=file.filename,
+        file_type=file.content_type or "application/octet-stream",
+        file_size=len(file_bytes),
+        category=category,
+        notes=notes
+    )
+    return DocumentUploadResponse(
+        id=str(doc["_id"]),
+        file_name=doc["file_name"],
+        file_type=doc["file_type"],
+        category=doc["category"],
+        processing_status=doc.get("processing_status"),
+        job_id=doc.get("job_id")
+    )
+
+@router.get("/jobs/{job_id}", response_model=JobStatusResponse)
+async def get_job_status(
+    job_id: str,
+    current_user_uid: str = Depends(get_current_user)
+):
+    """
+    Progress of a document processing job owned by the current user.
+    """
+    job = await job_queue.get_job(job_id, user_id=current_user_uid)
+    if not job:
+        raise NotFoundException("Job not found")
+    job["id"] = str(job.pop("_id"))
+    return JobStatusResponse(**job)
@@ -1,6 +1,9 @@
 import os
+from dotenv import load_dotenv
 from pydantic_settings import BaseSettings
 
+load_dotenv()
+
 class Settings(BaseSettings):
     PROJECT_NAME: str = "HealthHub AI Operating System"
     VERSION: str = "1.0.0"
@@ -13,6 +16,67 @@ class Settings(BaseSettings):
     # Firebase Config
     FIREBASE_CREDENTIALS_PATH: str = os.getenv("FIREBASE_CREDENTIALS_PATH", "")
 
+    # LLM Config
+    LLM_PROVIDER: str = os.getenv("LLM_PROVIDER", "gemini") # "gemini" or "stub" for offline load tests
+    LLM_MAX_CONCURRENCY: int = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+    LLM_QUEUE_TIMEOUT_SECONDS: float = float(os.getenv("LLM_QUEUE_TIMEOUT_SECONDS", "10"))
+    LLM_TIMEOUT_SECONDS: float = float(os.getenv("LLM_TIMEOUT_SECONDS", "30"))
+    LLM_STUB_LATENCY_MS: int = int(os.getenv("LLM_STUB_LATENCY_MS", "800"))
+    LLM_CACHE_ENABLED: bool = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+    LLM_CACHE_MAX_ENTRIES: int = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "5000"))
+    LLM_CACHE_TTL_SECONDS: float = float(os.getenv("LLM_CACHE_TTL_SECONDS", "86400"))
+    LLM_CACHE_SEMANTIC: bool = os.getenv("LLM_CACHE_SEMANTIC", "false").lower() == "true"
+    LLM_CACHE_SIMILARITY: float = float(os.getenv("LLM_CACHE_SIMILARITY", "0.93"))
+
+    # AI chat memory
+    AI_HISTORY_RECENT_TURNS: int = int(os.getenv("AI_HISTORY_RECENT_TURNS", "6"))
+    AI_PROMPT_TOKEN_BUDGET: int = int(os.getenv("AI_PROMPT_TOKEN_BUDGET", "3000"))
+    AI_SUMMARY_BATCH_TURNS: int = int(os.getenv("AI_SUMMARY_BATCH_TURNS", "4"))
+
+    # Background jobs
+    JOB_WORKERS: int = int(os.getenv("JOB_WORKERS", "2"))
+    JOB_POLL_INTERVAL_SECONDS: float = float(os.getenv("JOB_POLL_INTERVAL_SECONDS", "1"))
+    JOB_LEASE_SECONDS: float = float(os.getenv("JOB_LEASE_SECONDS", "300"))
+    JOB_MAX_ATTEMPTS: int = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+
+    # Timeline write-behind buffer
+    TIMELINE_BATCH_SIZE: int = int(os.getenv("TIMELINE_BATCH_SIZE", "200"))
+    TIMELINE_FLUSH_INTERVAL_SECONDS: float = float(os.getenv("TIMELINE_FLUSH_INTERVAL_SECONDS", "0.5"))
+    TIMELINE_MAX_PENDING: int = int(os.getenv("TIMELINE_MAX_PENDING", "10000"))
+    TIMELINE_OVERFLOW_POLICY: str = os.getenv("TIMELINE_OVERFLOW_POLICY", "flush") # "flush" or "drop"
+
+    # Bulk vitals ingestion (wearable sync)
+    VITALS_BULK_MAX_READINGS: int = int(os.getenv("VITALS_BULK_MAX_READINGS", "500000"))
+    VITALS_BULK_MAX_BYTES: int = int(os.getenv("VITALS_BULK_MAX_BYTES", str(64 * 1024 * 1024)))
+
+    # Streaming vitals anomaly detection
+    ANOMALY_EWMA_ALPHA: float = float(os.getenv("ANOMALY_EWMA_ALPHA", "0.05"))
+    ANOMALY_Z_THRESHOLD: float = float(os.getenv("ANOMALY_Z_THRESHOLD", "5.0"))
+    ANOMALY_MIN_READINGS: int = int(os.getenv("ANOMALY_MIN_READINGS", "20"))
+    ANOMALY_ALERT_COOLDOWN_MINUTES: float = float(os.getenv("ANOMALY_ALERT_COOLDOWN_MINUTES", "60"))
+
+    # Pose keypoint sessions (one hour at 30 fps)
+    POSE_MAX_FRAMES: int = int(os.getenv("POSE_MAX_FRAMES", "108000"))
+
+    # FHIR bulk export ($export); 0 processes means one per CPU
+    FHIR_EXPORT_DIR: str = os.getenv("FHIR_EXPORT_DIR", "exports")
+    FHIR_EXPORT_PROCESSES: int = int(os.getenv("FHIR_EXPORT_PROCESSES", "0"))
+    FHIR_EXPORT_PARTITIONS_PER_PROCESS: int = int(os.getenv("FHIR_EXPORT_PARTITIONS_PER_PROCESS", "4"))
+
+    # Recipe catalog (JSON list of recipes); relative paths are under backend/
+    RECIPES_PATH: str = os.getenv("RECIPES_PATH", "data/recipes.json")
+
+    # Dashboard
+    DASHBOARD_SECTION_TIMEOUT_SECONDS: float = float(os.getenv("DASHBOARD_SECTION_TIMEOUT_SECONDS", "1.0"))
+
+    # Precomputed dashboard AI insights; on by default only when an LLM key is configured
+    INSIGHTS_ENABLED: bool = os.getenv("INSIGHTS_ENABLED", "true" if os.getenv("GEMINI_API_KEY") else "false").lower() == "true"
+    INSIGHTS_INTERVAL_SECONDS: float = float(os.getenv("INSIGHTS_INTERVAL_SECONDS", "900"))
+    INSIGHTS_MAX_AGE_HOURS: float = float(os.getenv("INSIGHTS_MAX_AGE_HOURS", "24"))
+    INSIGHTS_ACTIVE_DAYS: int = int(os.getenv("INSIGHTS_ACTIVE_DAYS", "7"))
+    INSIGHTS_BATCH_SIZE: int = int(os.getenv("INSIGHTS_BATCH_SIZE", "50"))
+    INSIGHTS_LLM_CALLS_PER_MINUTE: float = float(os.getenv("INSIGHTS_LLM_CALLS_PER_MINUTE", "30"))
+
     class Config:
         env_file = ".env"
         extra = "ignore"
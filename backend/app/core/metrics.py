@@ -0,0 +1,41 @@
+from collections import deque
+from contextlib import contextmanager
+from time import perf_counter
+from typing import Dict, Any
+
+class LatencyRecorder:
+    """
+    Keeps per-name latency counters (count, average, max, last and p95 over
+    the most recent samples) for lightweight in-process metrics endpoints.
+    """
+    def __init__(self, window: int = 256):
+        self.window = window
+        self._stats: Dict[str, Dict[str, Any]] = {}
+
+    def record(self, name: str, elapsed_ms: float):
+        stats = self._stats.setdefault(name, {"count": 0, "total_ms": 0.0, "max_ms": 0.0, "recent": deque(maxlen=self.window)})
+        stats["count"] += 1
+        stats["total_ms"] += elapsed_ms
+        stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+        stats["recent"].append(elapsed_ms)
+
+    @contextmanager
+    def measure(self, name: str):
+        began = perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, (perf_counter() - began) * 1000)
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        result = {}
+        for name, stats in self._stats.items():
+            recent = sorted(stats["recent"])
+            result[name] = {
+                "count": stats["count"],
+                "avg_ms": round(stats["total_ms"] / stats["count"], 2),
+                "p95_ms": round(recent[min(int(len(recent) * 0.95), len(recent) - 1)], 2),
+                "max_ms": round(stats["max_ms"], 2),
+                "last_ms": round(recent[-1], 2)
+            }
+        return result
@@ -0,0 +1,108 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from bson import ObjectId
+from sqlalchemy import and_, or_
+
+from app.core.exceptions import BadRequestException
+
+# Response header carrying the cursor of the next page for list endpoints
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(timestamp: datetime, item_id: Any) -> str:
+    """
+    Encodes the (timestamp, id) position of the last item of a page
+    into an opaque URL-safe token.
+    """
+    payload = {"t": timestamp.isoformat(), "id": str(item_id)}
+    if isinstance(item_id, ObjectId):
+        payload["k"] = "oid"
+    elif isinstance(item_id, int):
+        payload["k"] = "int"
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, Any]:
+    """
+    Decodes a cursor produced by encode_cursor back into its (timestamp, id) key.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        timestamp = datetime.fromisoformat(payload["t"])
+        kind = payload.get("k")
+        if kind == "oid":
+            item_id = ObjectId(payload["id"])
+        elif kind == "int":
+            item_id = int(payload["id"])
+        else:
+            item_id = payload["id"]
+        return timestamp, item_id
+    except Exception:
+        raise BadRequestException(detail="Invalid pagination cursor")
+
+
+def paginate_query(query, timestamp_column, id_column, cursor: Optional[str] = None, limit: int = 100, ascending: bool = False) -> Tuple[List[Any], Optional[str]]:
+    """
+    Applies keyset pagination to a SQLAlchemy query, newest first (oldest
+    first with `ascending`).
+    Returns the page of rows and the cursor for the following page (None on the last page).
+    """
+    if cursor:
+        timestamp, item_id = decode_cursor(cursor)
+        if ascending:
+            query = query.filter(or_(
+                timestamp_column > timestamp,
+                and_(timestamp_column == timestamp, id_column > item_id)
+            ))
+        else:
+            query = query.filter(or_(
+                timestamp_column < timestamp,
+                and_(timestamp_column == timestamp, id_column < item_id)
+            ))
+
+    if ascending:
+        query = query.order_by(timestamp_column.asc(), id_column.asc())
+    else:
+        query = query.order_by(timestamp_column.desc(), id_column.desc())
+    rows = query.limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, timestamp_column.key), getattr(last, id_column.key))
+    return rows, next_cursor
+
+
+def keyset_filter(filter_query: Dict[str, Any], timestamp_field: str, cursor: Optional[str] = None, id_field: str = "_id") -> Dict[str, Any]:
+    """
+    Extends a MongoDB filter so it only matches documents after the cursor
+    position in (timestamp, _id) descending order.
+    """
+    if not cursor:
+        return filter_query
+
+    timestamp, item_id = decode_cursor(cursor)
+    after_cursor = {"$or": [
+        {timestamp_field: {"$lt": timestamp}},
+        {timestamp_field: timestamp, id_field: {"$lt": item_id}}
+    ]}
+    if not filter_query:
+        return after_cursor
+    return {"$and": [filter_query, after_cursor]}
+
+
+def next_cursor_for(docs: List[Dict[str, Any]], limit: int, timestamp_field: str, id_field: str = "_id") -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Trims a MongoDB result fetched with limit + 1 and computes the next page cursor.
+    """
+    if len(docs) <= limit:
+        return docs, None
+    docs = docs[:limit]
+    last = docs[-1]
+    return docs, encode_cursor(last[timestamp_field], last[id_field])
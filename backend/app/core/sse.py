@@ -0,0 +1,42 @@
+import json
+from contextlib import aclosing
+from typing import Any, AsyncIterator, Dict, Optional
+
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+
+from app.integrations.llm_provider import LLMStreamError
+
+def format_sse(data: Dict[str, Any], event: Optional[str] = None) -> str:
+    """
+    Formats one server-sent event frame.
+    """
+    frame = f"event: {event}\n" if event else ""
+    return frame + f"data: {json.dumps(data)}\n\n"
+
+async def sse_tokens(request: Request, chunks: AsyncIterator[str]) -> AsyncIterator[str]:
+    """
+    Relays text chunks as `data: {"token": ...}` events followed by a `done`
+    event, or an `error` event with the fallback message when the source
+    raises LLMStreamError. Stops pulling from (and closes) the source once
+    the client goes away.
+    """
+    async with aclosing(chunks) as source:
+        try:
+            async for chunk in source:
+                if await request.is_disconnected():
+                    return
+                yield format_sse({"token": chunk})
+        except LLMStreamError as e:
+            # Tokens already sent are incomplete; the client replaces them with the message
+            yield format_sse({"detail": str(e)}, event="error")
+            return
+    yield format_sse({}, event="done")
+
+def sse_response(events: AsyncIterator[str]) -> StreamingResponse:
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        # Disable proxy buffering so the first token reaches the client immediately
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
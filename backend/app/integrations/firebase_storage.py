@@ -1,8 +1,28 @@
 import os
+import re
 from firebase_admin import storage
 from datetime import datetime, timedelta
 from typing import Optional
 
+LOCAL_STORAGE_ROOT = "local_storage"
+
+def safe_path_segment(name: str, default: str = "file") -> str:
+    """
+    Reduces a client-supplied name to a single path segment: the basename,
+    with anything outside letters, digits, '.', '_' and '-' replaced.
+    """
+    name = os.path.basename((name or "").replace("\\", "/"))
+    name = re.sub(r"[^A-Za-z0-9._-]", "_", name).lstrip(".")
+    return name[:200] or default
+
+def local_storage_path(relative_path: str) -> str:
+    """Absolute path under LOCAL_STORAGE_ROOT; raises ValueError if it would escape it"""
+    root = os.path.realpath(LOCAL_STORAGE_ROOT)
+    full_path = os.path.realpath(os.path.join(root, relative_path))
+    if os.path.commonpath([root, full_path]) != root or full_path == root:
+        raise ValueError(f"Storage path escapes {LOCAL_STORAGE_ROOT}/: {relative_path}")
+    return full_path
+
 class FirebaseStorageProvider:
     def __init__(self):
         # The Firebase Admin SDK must be initialized before using storage.bucket()
@@ -18,9 +38,23 @@ class FirebaseStorageProvider:
             blob.upload_from_string(file_bytes, content_type=content_type)
             return destination_path
         except Exception as e:
-            # Fallback to local stub mock path in case Firebase Storage is not configured
+            # Fallback to local disk in case Firebase Storage is not configured
             print(f"Firebase Storage upload failed: {str(e)}. Falling back to local stub.")
-            return f"local_storage/{destination_path}"
+            full_path = local_storage_path(destination_path)
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            with open(full_path, "wb") as f:
+                f.write(file_bytes)
+            return f"{LOCAL_STORAGE_ROOT}/{destination_path}"
+
+    def download_file(self, file_path: str) -> bytes:
+        """
+        Reads back the raw bytes of a file stored by upload_file.
+        """
+        if file_path.startswith(f"{LOCAL_STORAGE_ROOT}/"):
+            with open(local_storage_path(file_path[len(LOCAL_STORAGE_ROOT) + 1:]), "rb") as f:
+                return f.read()
+        bucket = storage.bucket(self.bucket_name)
+        return bucket.blob(file_path).download_as_bytes()
 
     def get_signed_url(self, file_path: str, expiration_minutes: int = 15) -> str:
         """
@@ -0,0 +1,260 @@
+import re
+import time
+import hashlib
+import zlib
+from collections import OrderedDict
+from contextlib import aclosing
+from typing import Optional, Dict, Any, List, Tuple, AsyncIterator
+
+import numpy as np
+
+from app.integrations.llm_provider import BaseLLMProvider
+
+# Scope for prompts with nothing personal in them, which may be answered from
+# any caller's cache entry. Only exact repeats match there: a similar question
+# from another user is never answered with their cached reply.
+GLOBAL_CACHE_SCOPE = "global"
+
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+
+def normalize_prompt(text: str) -> str:
+    """
+    Lowercases and strips punctuation/extra whitespace so trivially different
+    phrasings ("What is normal blood pressure?" / "what is normal blood pressure")
+    share one cache key.
+    """
+    return _NON_WORD.sub(" ", text.lower()).strip()
+
+class HashingEmbedder:
+    """
+    Dependency-free local embedding: word unigrams and character trigrams hashed
+    into a fixed-size, L2-normalised vector. Good enough to match near-duplicate
+    questions; swap for a model-based embedder if paraphrases must match too.
+    """
+    def __init__(self, dim: int = 512):
+        self.dim = dim
+
+    def embed(self, normalized: str) -> np.ndarray:
+        vec = np.zeros(self.dim, dtype=np.float32)
+        padded = f" {normalized} "
+        features = normalized.split() + [padded[i:i + 3] for i in range(len(padded) - 2)]
+        for feature in features:
+            vec[zlib.crc32(feature.encode()) % self.dim] += 1.0
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm else vec
+
+class VectorIndex:
+    """
+    Brute-force cosine index over a growable matrix. Deleted rows are zeroed
+    and compacted away once they make up half the matrix.
+    """
+    def __init__(self, dim: int):
+        self.dim = dim
+        self.matrix = np.zeros((16, dim), dtype=np.float32)
+        self.keys: List[Optional[str]] = []
+        self.rows: Dict[str, int] = {}
+        self.dead = 0
+
+    def add(self, key: str, vec: np.ndarray):
+        if len(self.keys) == len(self.matrix):
+            self.matrix = np.vstack([self.matrix, np.zeros_like(self.matrix)])
+        self.matrix[len(self.keys)] = vec
+        self.rows[key] = len(self.keys)
+        self.keys.append(key)
+
+    def remove(self, key: str):
+        row = self.rows.pop(key, None)
+        if row is None:
+            return
+        self.matrix[row] = 0.0
+        self.keys[row] = None
+        self.dead += 1
+        if self.dead * 2 > len(self.keys):
+            self._compact()
+
+    def _compact(self):
+        live = [row for row, key in enumerate(self.keys) if key is not None]
+        self.matrix = np.concatenate([self.matrix[live], np.zeros((max(16, len(live)), self.dim), dtype=np.float32)])
+        self.keys = [self.keys[row] for row in live]
+        self.rows = {key: row for row, key in enumerate(self.keys)}
+        self.dead = 0
+
+    def nearest(self, vec: np.ndarray) -> Tuple[Optional[str], float]:
+        if not self.rows:
+            return None, 0.0
+        scores = self.matrix[:len(self.keys)] @ vec
+        row = int(np.argmax(scores))
+        return self.keys[row], float(scores[row])
+
+class ResponseCache:
+    """
+    In-process LLM response cache. Entries are partitioned by scope (a user id,
+    or GLOBAL_CACHE_SCOPE for prompts without user text) and system
+    instruction, so personalized answers are never served to another user.
+    Lookups try the normalized-prompt hash first and, when enabled and the
+    caller passes the user's question as `query`, the most similar cached
+    question asked over the same context (the rest of the prompt) above
+    `similarity_threshold`. Only the question is embedded: whole prompts
+    share their context, which would make different questions look alike.
+    The GLOBAL_CACHE_SCOPE partition is exact-match only.
+    """
+    def __init__(self, max_entries: int = 5000, ttl_seconds: float = 86400, semantic: bool = False, similarity_threshold: float = 0.93, embedder: Optional[HashingEmbedder] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.semantic = semantic
+        self.similarity_threshold = similarity_threshold
+        self.embedder = embedder or HashingEmbedder()
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._indexes: Dict[str, VectorIndex] = {}
+        self.metrics = {"exact_hits": 0, "semantic_hits": 0, "misses": 0, "saved_latency_ms": 0.0}
+
+    def _partition(self, scope: str, system_instruction: Optional[str]) -> str:
+        instruction_hash = hashlib.sha256((system_instruction or "").encode()).hexdigest()[:16]
+        return f"{scope}:{instruction_hash}"
+
+    def _key(self, partition: str, normalized: str) -> str:
+        return f"{partition}:{hashlib.sha256(normalized.encode()).hexdigest()}"
+
+    def _index_name(self, partition: str, prompt: str, query: str) -> str:
+        """
+        Semantic index for questions over the same context. A prompt that does
+        not end with the query hashes whole, so it only matches itself.
+        """
+        context = prompt[:-len(query)] if prompt.endswith(query) else prompt
+        return f"{partition}:{hashlib.sha256(context.encode()).hexdigest()}"
+
+    def get(self, prompt: str, system_instruction: Optional[str], scope: str, query: Optional[str] = None) -> Optional[str]:
+        partition = self._partition(scope, system_instruction)
+        key = self._key(partition, normalize_prompt(prompt))
+
+        entry = self._live_entry(key)
+        hit_kind = "exact_hits"
+        if entry is None and self._semantic(scope, query):
+            index = self._indexes.get(self._index_name(partition, prompt, query))
+            if index is not None:
+                nearest, score = index.nearest(self.embedder.embed(normalize_prompt(query)))
+                if nearest is not None and score >= self.similarity_threshold:
+                    entry = self._live_entry(nearest)
+                    hit_kind = "semantic_hits"
+
+        if entry is None:
+            self.metrics["misses"] += 1
+            return None
+        self.metrics[hit_kind] += 1
+        self.metrics["saved_latency_ms"] += entry["latency_ms"]
+        return entry["response"]
+
+    def put(self, prompt: str, system_instruction: Optional[str], scope: str, response: str, latency_ms: float, query: Optional[str] = None):
+        partition = self._partition(scope, system_instruction)
+        key = self._key(partition, normalize_prompt(prompt))
+
+        self._evict(key)
+        entry = {
+            "response": response,
+            "latency_ms": latency_ms,
+            "expires_at": time.monotonic() + self.ttl_seconds,
+            "index": None
+        }
+        if self._semantic(scope, query):
+            entry["index"] = self._index_name(partition, prompt, query)
+            index = self._indexes.setdefault(entry["index"], VectorIndex(self.embedder.dim))
+            index.add(key, self.embedder.embed(normalize_prompt(query)))
+        self._entries[key] = entry
+
+        while len(self._entries) > self.max_entries:
+            self._evict(next(iter(self._entries)))
+
+    def _semantic(self, scope: str, query: Optional[str]) -> bool:
+        return self.semantic and bool(query) and scope != GLOBAL_CACHE_SCOPE
+
+    def _live_entry(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry["expires_at"] < time.monotonic():
+            self._evict(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _evict(self, key: str):
+        entry = self._entries.pop(key, None)
+        index = self._indexes.get(entry["index"]) if entry and entry["index"] else None
+        if index is not None:
+            index.remove(key)
+            if not index.rows:
+                del self._indexes[entry["index"]]
+
+    def invalidate_scope(self, scope: str):
+        """
+        Drops every entry for a scope, e.g. when a user's context changes.
+        """
+        prefix = f"{scope}:"
+        for key in [k for k in self._entries if k.startswith(prefix)]:
+            self._evict(key)
+
+    def stats(self) -> Dict[str, Any]:
+        hits = self.metrics["exact_hits"] + self.metrics["semantic_hits"]
+        lookups = hits + self.metrics["misses"]
+        return {
+            **self.metrics,
+            "entries": len(self._entries),
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "saved_latency_ms": round(self.metrics["saved_latency_ms"], 1)
+        }
+
+class CachingLLMProvider(BaseLLMProvider):
+    """
+    Serves completions from a ResponseCache in front of another provider.
+    Only calls that pass a `cache_scope` are cached; `cache_query`, the
+    user's question within the prompt, enables semantic matches, and
+    `cache_key` replaces the prompt as the cache key when the prompt holds
+    parts that change on every call. Failed or abandoned completions are
+    never stored.
+    """
+    def __init__(self, provider: BaseLLMProvider, cache: ResponseCache):
+        super().__init__()
+        self.provider = provider
+        self.cache = cache
+
+    @property
+    def in_flight(self) -> int:
+        return self.provider.in_flight
+
+    @in_flight.setter
+    def in_flight(self, value: int):
+        # Slots are tracked by the wrapped provider
+        pass
+
+    def fallback_message(self, error: Exception) -> str:
+        return self.provider.fallback_message(error)
+
+    async def complete(self, prompt: str, system_instruction: Optional[str] = None, cache_scope: Optional[str] = None, cache_query: Optional[str] = None, cache_key: Optional[str] = None) -> str:
+        if cache_scope is None:
+            return await self.provider.complete(prompt, system_instruction=system_instruction)
+
+        key = prompt if cache_key is None else cache_key
+        cached = self.cache.get(key, system_instruction, cache_scope, cache_query)
+        if cached is not None:
+            return cached
+
+        began = time.perf_counter()
+        response = await self.provider.complete(prompt, system_instruction=system_instruction)
+        self.cache.put(key, system_instruction, cache_scope, response, (time.perf_counter() - began) * 1000, cache_query)
+        return response
+
+    async def stream(self, prompt: str, system_instruction: Optional[str] = None, cache_scope: Optional[str] = None, cache_query: Optional[str] = None, cache_key: Optional[str] = None) -> AsyncIterator[str]:
+        key = prompt if cache_key is None else cache_key
+        cached = self.cache.get(key, system_instruction, cache_scope, cache_query) if cache_scope is not None else None
+        if cached is not None:
+            yield cached
+            return
+
+        began = time.perf_counter()
+        chunks = []
+        async with aclosing(self.provider.stream(prompt, system_instruction=system_instruction)) as stream:
+            async for chunk in stream:
+                chunks.append(chunk)
+                yield chunk
+        if cache_scope is not None:
+            self.cache.put(key, system_instruction, cache_scope, "".join(chunks), (time.perf_counter() - began) * 1000, cache_query)
@@ -1,34 +1,216 @@
 import os
+import asyncio
+import random
+from collections import OrderedDict
+from contextlib import aclosing
 import google.generativeai as genai
-from typing import Optional
+from typing import Optional, AsyncIterator
+from app.core.config import settings
 
-class GeminiProvider:
+class LLMNotConfiguredError(Exception):
+    pass
+
+class LLMBusyError(Exception):
+    pass
+
+class LLMStreamError(Exception):
+    """A streamed completion failed; the message is readable text for the user."""
+    pass
+
+class BaseLLMProvider:
+    """
+    Shared plumbing for LLM providers: a semaphore bounds the number of
+    in-flight calls, callers wait at most LLM_QUEUE_TIMEOUT_SECONDS for a slot
+    and each call is cancelled after LLM_TIMEOUT_SECONDS.
+    Subclasses implement `_generate`.
+    """
     def __init__(self):
-        self.api_key = os.getenv("GEMINI_API_KEY", "")
-        self.model_name = os.getenv("GEMINI_MODEL_NAME", "gemini-1.5-flash")
-        self.client_ready = False
-        
-        if self.api_key:
-            genai.configure(api_key=self.api_key)
-            self.client_ready = True
+        self.max_concurrency = settings.LLM_MAX_CONCURRENCY
+        self.queue_timeout = settings.LLM_QUEUE_TIMEOUT_SECONDS
+        self.call_timeout = settings.LLM_TIMEOUT_SECONDS
+        self._slots = asyncio.Semaphore(self.max_concurrency)
+        self.in_flight = 0
 
-    async def generate_response(self, prompt: str, system_instruction: Optional[str] = None) -> str:
+    async def _generate(self, prompt: str, system_instruction: Optional[str]) -> str:
+        raise NotImplementedError
+
+    async def complete(self, prompt: str, system_instruction: Optional[str] = None, cache_scope: Optional[str] = None, cache_query: Optional[str] = None, cache_key: Optional[str] = None) -> str:
         """
-        Generates text using Google Gemini API. Falls back to mock responses
-        if api key is not set.
+        Generates text, raising LLMBusyError when no slot frees up in time,
+        asyncio.TimeoutError when the provider is too slow, and provider errors as-is.
+        `cache_scope` opts the call into the response cache, `cache_query`
+        names the user's question within the prompt and `cache_key`, when
+        given, identifies the request in the cache instead of the whole prompt
+        (see llm_cache).
         """
-        if not self.client_ready:
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            raise LLMBusyError("Too many concurrent AI requests")
+
+        self.in_flight += 1
+        try:
+            return await asyncio.wait_for(self._generate(prompt, system_instruction), timeout=self.call_timeout)
+        finally:
+            self.in_flight -= 1
+            self._slots.release()
+
+    async def _stream(self, prompt: str, system_instruction: Optional[str]) -> AsyncIterator[str]:
+        # Providers without native streaming emit the whole completion as one chunk
+        yield await self._generate(prompt, system_instruction)
+
+    async def stream(self, prompt: str, system_instruction: Optional[str] = None, cache_scope: Optional[str] = None, cache_query: Optional[str] = None, cache_key: Optional[str] = None) -> AsyncIterator[str]:
+        """
+        Streams text chunks as the provider produces them. Holds one concurrency
+        slot for the whole stream and raises like `complete`.
+        """
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            raise LLMBusyError("Too many concurrent AI requests")
+
+        self.in_flight += 1
+        chunks = self._stream(prompt, system_instruction)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.call_timeout
+        try:
+            while True:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    raise asyncio.TimeoutError()
+                try:
+                    chunk = await asyncio.wait_for(chunks.__anext__(), timeout=remaining)
+                except StopAsyncIteration:
+                    break
+                yield chunk
+        finally:
+            await chunks.aclose()
+            self.in_flight -= 1
+            self._slots.release()
+
+    def fallback_message(self, error: Exception) -> str:
+        """
+        Readable text shown to the user in place of a completion that failed.
+        """
+        if isinstance(error, LLMNotConfiguredError):
             print("Gemini API key not configured. Returning fallback placeholder response.")
             return "This is a placeholder AI response. Please configure GEMINI_API_KEY in your .env file to enable live AI consultations."
+        if isinstance(error, LLMBusyError):
+            return "The AI assistant is handling too many requests right now. Please try again in a moment."
+        if isinstance(error, asyncio.TimeoutError):
+            return "The AI assistant took too long to respond. Please try again."
+        return f"Error contacting AI Provider: {str(error)}"
 
+    async def generate_response(self, prompt: str, system_instruction: Optional[str] = None, cache_scope: Optional[str] = None, cache_query: Optional[str] = None, cache_key: Optional[str] = None) -> str:
+        """
+        Generates text, returning a readable fallback message instead of raising.
+        """
         try:
+            return await self.complete(prompt, system_instruction=system_instruction, cache_scope=cache_scope, cache_query=cache_query, cache_key=cache_key)
+        except Exception as e:
+            return self.fallback_message(e)
+
+    async def stream_response(self, prompt: str, system_instruction: Optional[str] = None, cache_scope: Optional[str] = None, cache_query: Optional[str] = None, cache_key: Optional[str] = None) -> AsyncIterator[str]:
+        """
+        Streams text, ending with a readable fallback message instead of raising.
+        """
+        try:
+            async with aclosing(self.stream(prompt, system_instruction=system_instruction, cache_scope=cache_scope, cache_query=cache_query, cache_key=cache_key)) as chunks:
+                async for chunk in chunks:
+                    yield chunk
+        except Exception as e:
+            yield self.fallback_message(e)
+
+class GeminiProvider(BaseLLMProvider):
+    # Upper bound on distinct system instructions kept as ready GenerativeModel instances
+    MODEL_CACHE_SIZE = 16
+
+    def __init__(self):
+        super().__init__()
+        self.api_key = os.getenv("GEMINI_API_KEY", "")
+        self.model_name = os.getenv("GEMINI_MODEL_NAME", "gemini-1.5-flash")
+        self.client_ready = False
+        self._models: "OrderedDict[Optional[str], genai.GenerativeModel]" = OrderedDict()
+
+        if self.api_key:
+            genai.configure(api_key=self.api_key)
+            self.client_ready = True
+
+    def _get_model(self, system_instruction: Optional[str]) -> genai.GenerativeModel:
+        model = self._models.get(system_instruction)
+        if model is None:
             model = genai.GenerativeModel(
                 model_name=self.model_name,
                 system_instruction=system_instruction
             )
-            # Running in standard blocking mode but we could wrap in threadpool if async is strict
-            # For simplicity, running direct call
-            response = model.generate_content(prompt)
-            return response.text
-        except Exception as e:
-            return f"Error contacting AI Provider: {str(e)}"
+            self._models[system_instruction] = model
+            if len(self._models) > self.MODEL_CACHE_SIZE:
+                self._models.popitem(last=False)
+        else:
+            self._models.move_to_end(system_instruction)
+        return model
+
+    async def _generate(self, prompt: str, system_instruction: Optional[str]) -> str:
+        if not self.client_ready:
+            raise LLMNotConfiguredError("GEMINI_API_KEY is not configured")
+        response = await self._get_model(system_instruction).generate_content_async(prompt)
+        return response.text
+
+    async def _stream(self, prompt: str, system_instruction: Optional[str]) -> AsyncIterator[str]:
+        if not self.client_ready:
+            raise LLMNotConfiguredError("GEMINI_API_KEY is not configured")
+        response = await self._get_model(system_instruction).generate_content_async(prompt, stream=True)
+        async for chunk in response:
+            if chunk.text:
+                yield chunk.text
+
+class StubLLMProvider(BaseLLMProvider):
+    """
+    Offline provider that answers after a configurable delay, for load-testing
+    the concurrency limits without calling Gemini.
+    """
+    def __init__(self, latency_ms: Optional[int] = None, jitter_ms: int = 0, ms_per_1k_prompt_tokens: float = 0):
+        super().__init__()
+        self.latency_ms = settings.LLM_STUB_LATENCY_MS if latency_ms is None else latency_ms
+        self.jitter_ms = jitter_ms
+        # Models take longer on longer prompts; ~4 characters per token
+        self.ms_per_1k_prompt_tokens = ms_per_1k_prompt_tokens
+
+    def _delay_ms(self, prompt: str) -> float:
+        prompt_cost = len(prompt) / 4000 * self.ms_per_1k_prompt_tokens
+        return self.latency_ms + random.uniform(0, self.jitter_ms) + prompt_cost
+
+    async def _generate(self, prompt: str, system_instruction: Optional[str]) -> str:
+        await asyncio.sleep(self._delay_ms(prompt) / 1000)
+        return self._reply(prompt)
+
+    async def _stream(self, prompt: str, system_instruction: Optional[str]) -> AsyncIterator[str]:
+        # Spread the latency over the words, as a real model emits tokens
+        words = self._reply(prompt).split(" ")
+        delay = self._delay_ms(prompt) / len(words)
+        for i, word in enumerate(words):
+            await asyncio.sleep(delay / 1000)
+            yield word if i == 0 else " " + word
+
+    def _reply(self, prompt: str) -> str:
+        return f"[stub] Response to: {prompt[-200:]}"
+
+_provider: Optional[BaseLLMProvider] = None
+
+def get_llm_provider() -> BaseLLMProvider:
+    """
+    Returns the process-wide LLM provider so every caller shares one set of
+    concurrency slots, one model cache and one response cache.
+    """
+    global _provider
+    if _provider is None:
+        _provider = StubLLMProvider() if settings.LLM_PROVIDER == "stub" else GeminiProvider()
+        if settings.LLM_CACHE_ENABLED:
+            from app.integrations.llm_cache import CachingLLMProvider, ResponseCache
+            _provider = CachingLLMProvider(_provider, ResponseCache(
+                max_entries=settings.LLM_CACHE_MAX_ENTRIES,
+                ttl_seconds=settings.LLM_CACHE_TTL_SECONDS,
+                semantic=settings.LLM_CACHE_SEMANTIC,
+                similarity_threshold=settings.LLM_CACHE_SIMILARITY
+            ))
+    return _provider
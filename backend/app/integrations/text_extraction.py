@@ -0,0 +1,46 @@
+import io
+
+class UnsupportedDocumentError(Exception):
+    pass
+
+def extract_text(file_bytes: bytes, file_type: str) -> str:
+    """
+    Extracts plain text from an uploaded report. Blocking; call it from a
+    worker thread. PDFs use `pypdf`; images use `Pillow` and `pytesseract`,
+    which also needs the tesseract binary installed on the server.
+    """
+    if file_type == "application/pdf":
+        return _extract_pdf(file_bytes)
+    if file_type.startswith("image/"):
+        return _extract_image(file_bytes)
+    if file_type.startswith("text/"):
+        return file_bytes.decode("utf-8", errors="replace")
+    raise UnsupportedDocumentError(f"Text extraction is not supported for {file_type}")
+
+def _extract_pdf(file_bytes: bytes) -> str:
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        raise UnsupportedDocumentError("PDF extraction requires the 'pypdf' package")
+
+    try:
+        reader = PdfReader(io.BytesIO(file_bytes))
+        text = "\n".join((page.extract_text() or "") for page in reader.pages).strip()
+    except Exception as e:
+        raise UnsupportedDocumentError(f"Could not read PDF ({e})")
+    if not text:
+        raise UnsupportedDocumentError("PDF has no text layer (scanned document)")
+    return text
+
+def _extract_image(file_bytes: bytes) -> str:
+    try:
+        from PIL import Image
+        import pytesseract
+    except ImportError:
+        raise UnsupportedDocumentError("Image OCR requires the 'Pillow' and 'pytesseract' packages")
+
+    with Image.open(io.BytesIO(file_bytes)) as image:
+        try:
+            return pytesseract.image_to_string(image).strip()
+        except pytesseract.TesseractNotFoundError:
+            raise UnsupportedDocumentError("Image OCR requires the tesseract binary (tesseract-ocr)")
@@ -9,6 +9,8 @@ class ChatMessage(BaseModel):
 
 class ConversationDoc(BaseModel):
     user_id: str = Field(..., description="Firebase UID of the patient")
-    messages: List[ChatMessage] = []
+    message_count: int = Field(0, description="Total messages appended; also the position of the next message")
+    summary: str = Field("", description="Rolling summary of messages before summarized_upto")
+    summarized_upto: int = Field(0, description="Position of the first message not folded into the summary")
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
@@ -11,3 +11,7 @@ class DocumentFileDoc(BaseModel):
     category: str # e.g. "Medical Record", "Lab Result", "Prescription"
     notes: Optional[str] = None
     uploaded_at: datetime = Field(default_factory=datetime.utcnow)
+    processing_status: Optional[str] = None # "queued", "completed" or "failed"; None when not processable
+    job_id: Optional[str] = None
+    extracted_text: Optional[str] = None
+    ai_summary: Optional[str] = None
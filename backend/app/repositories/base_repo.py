@@ -1,6 +1,7 @@
 from bson import ObjectId
 from app.db.mongodb import get_db
-from typing import List, Dict, Any, Optional
+from app.core.pagination import keyset_filter, next_cursor_for
+from typing import List, Dict, Any, Optional, Tuple
 
 class BaseRepository:
     def __init__(self, collection_name: str):
@@ -26,6 +27,17 @@ class BaseRepository:
             cursor = cursor.sort(sort_by, direction)
         return await cursor.to_list(length=limit)
 
+    async def find_page(self, filter_query: Dict[str, Any], sort_by: str, cursor: Optional[str] = None, limit: int = 100) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Keyset pagination over (sort_by, _id) descending. Returns the page and
+        the opaque cursor for the next one (None once the end is reached).
+        """
+        collection = await self.get_collection()
+        query = keyset_filter(filter_query, sort_by, cursor)
+        db_cursor = collection.find(query).sort([(sort_by, -1), ("_id", -1)]).limit(limit + 1)
+        docs = await db_cursor.to_list(length=limit + 1)
+        return next_cursor_for(docs, limit, sort_by)
+
     async def create(self, data: Dict[str, Any]) -> Dict[str, Any]:
         collection = await self.get_collection()
         result = await collection.insert_one(data)
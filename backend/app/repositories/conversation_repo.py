@@ -0,0 +1,218 @@
+from app.db.mongodb import get_db
+from app.models.conversation import ConversationDoc, ChatMessage
+from pymongo import ReturnDocument, ASCENDING
+from pymongo.errors import DuplicateKeyError, OperationFailure
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Tuple
+
+# Messages per bucket document. Keeps every write and every bucket read bounded
+# no matter how long the conversation grows.
+BUCKET_SIZE = 100
+
+class ConversationRepository:
+    """
+    Conversations are stored as a small header document in `ai_conversations`
+    plus fixed-size message buckets in `ai_conversation_buckets`. Appending a
+    turn reserves positions with an atomic $inc on the header and $pushes the
+    messages into their bucket, so the cost per turn is independent of the
+    conversation length and concurrent turns never overwrite each other.
+
+    Headers written before buckets existed hold the whole history in a
+    `messages` array; get_or_create moves it into buckets on first use.
+    """
+
+    async def ensure_indexes(self):
+        """
+        Raises RuntimeError when the unique user_id index cannot be built, since
+        get_or_create relies on it to never fork a user's conversation.
+        """
+        db = await get_db()
+        # One conversation per user; replaces the earlier non-unique index
+        indexes = await db.ai_conversations.index_information()
+        if not indexes.get("user_id_1", {}).get("unique"):
+            if "user_id_1" in indexes:
+                await db.ai_conversations.drop_index("user_id_1")
+            # Racing get_or_create calls could create a second header before the index existed
+            await self._merge_duplicates(db)
+            try:
+                await db.ai_conversations.create_index([("user_id", ASCENDING)], unique=True)
+            except OperationFailure as e:
+                raise RuntimeError(f"Could not build the unique user_id index on ai_conversations ({e})") from e
+        await db.ai_conversation_buckets.create_index(
+            [("conversation_id", ASCENDING), ("seq", ASCENDING)], unique=True
+        )
+
+    async def _merge_duplicates(self, db):
+        """
+        Folds every user's duplicate headers into one new header holding all of
+        their messages in timestamp order, then removes the old headers and
+        buckets. Messages are matched on (timestamp, sender, content), so a merge
+        interrupted after writing the new header is completed, not duplicated,
+        by the next run. Summaries are reset and rebuilt from the merged history.
+        """
+        duplicates = db.ai_conversations.aggregate([
+            {"$group": {"_id": "$user_id", "ids": {"$push": "$_id"}, "count": {"$sum": 1}}},
+            {"$match": {"count": {"$gt": 1}}}
+        ])
+        async for group in duplicates:
+            user_id, ids = group["_id"], group["ids"]
+            headers = await db.ai_conversations.find({"_id": {"$in": ids}}).to_list(None)
+            merged: Dict[Tuple[Any, str, str], Dict[str, Any]] = {}
+            for header in headers:
+                messages = list(header.get("legacy_messages") or header.get("messages") or [])
+                async for bucket in db.ai_conversation_buckets.find({"conversation_id": str(header["_id"])}).sort("seq", ASCENDING):
+                    messages.extend(sorted(bucket["messages"], key=lambda m: m["position"]))
+                for message in messages:
+                    entry = ChatMessage(**message).model_dump()
+                    merged.setdefault((entry["timestamp"], entry["sender"], entry["content"]), entry)
+
+            ordered = sorted(merged.values(), key=lambda m: m["timestamp"])
+            conv = ConversationDoc(
+                user_id=user_id,
+                message_count=len(ordered),
+                created_at=min(header.get("created_at") or datetime.utcnow() for header in headers)
+            ).model_dump()
+            conv_id = str((await db.ai_conversations.insert_one(conv)).inserted_id)
+            by_bucket: Dict[int, List[Dict[str, Any]]] = {}
+            for position, entry in enumerate(ordered):
+                by_bucket.setdefault(position // BUCKET_SIZE, []).append({**entry, "position": position})
+            for seq, entries in by_bucket.items():
+                await self._push_to_bucket(db, conv_id, user_id, seq, entries)
+
+            old_ids = [header["_id"] for header in headers]
+            await db.ai_conversation_buckets.delete_many({"conversation_id": {"$in": [str(i) for i in old_ids]}})
+            await db.ai_conversations.delete_many({"_id": {"$in": old_ids}})
+            print(f"[MONGODB] Merged {len(headers)} conversations of user {user_id} into one.")
+
+    async def get_or_create(self, user_id: str) -> Dict[str, Any]:
+        db = await get_db()
+        new_conv = ConversationDoc(user_id=user_id).model_dump()
+        try:
+            conv = await db.ai_conversations.find_one_and_update(
+                {"user_id": user_id},
+                {"$setOnInsert": new_conv},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+        except DuplicateKeyError:
+            # A concurrent request created the header first
+            conv = await db.ai_conversations.find_one({"user_id": user_id})
+        if "messages" in conv or "legacy_messages" in conv:
+            conv = await self._migrate_legacy(db, conv)
+        return conv
+
+    async def _migrate_legacy(self, db, conv: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Moves a pre-bucket `messages` array into buckets. The array is first
+        renamed to `legacy_messages` while message_count reserves its
+        positions, so turns appended meanwhile land after it; the copy is
+        idempotent, so an interrupted migration is finished by the next call.
+        """
+        if "messages" in conv:
+            claimed = await db.ai_conversations.find_one_and_update(
+                {"_id": conv["_id"], "messages": {"$exists": True}},
+                {
+                    "$rename": {"messages": "legacy_messages"},
+                    "$set": {"message_count": len(conv["messages"])}
+                },
+                return_document=ReturnDocument.AFTER
+            )
+            conv = claimed or await db.ai_conversations.find_one({"_id": conv["_id"]})
+        legacy = conv.get("legacy_messages")
+        if legacy is None:
+            return conv
+
+        by_bucket: Dict[int, List[Dict[str, Any]]] = {}
+        for position, message in enumerate(legacy):
+            entry = ChatMessage(**message).model_dump()
+            entry["position"] = position
+            by_bucket.setdefault(position // BUCKET_SIZE, []).append(entry)
+        conv_id = str(conv["_id"])
+        for seq, entries in by_bucket.items():
+            await self._push_to_bucket(db, conv_id, conv["user_id"], seq, entries, skip_if_stored=True)
+
+        await db.ai_conversations.update_one({"_id": conv["_id"]}, {"$unset": {"legacy_messages": ""}})
+        conv.pop("legacy_messages")
+        return conv
+
+    async def append_messages(self, conversation_id, user_id: str, messages: List[ChatMessage]) -> int:
+        """
+        Appends messages to the conversation and returns the new message count.
+        """
+        db = await get_db()
+        header = await db.ai_conversations.find_one_and_update(
+            {"_id": conversation_id},
+            {"$inc": {"message_count": len(messages)}, "$set": {"updated_at": datetime.utcnow()}},
+            projection={"message_count": 1},
+            return_document=ReturnDocument.AFTER
+        )
+        end = header["message_count"]
+        start = end - len(messages)
+
+        # Group the reserved positions by bucket; a turn spans at most two buckets
+        by_bucket: Dict[int, List[Dict[str, Any]]] = {}
+        for position, message in enumerate(messages, start=start):
+            entry = message.model_dump()
+            entry["position"] = position
+            by_bucket.setdefault(position // BUCKET_SIZE, []).append(entry)
+
+        conv_id = str(conversation_id)
+        for seq, entries in by_bucket.items():
+            await self._push_to_bucket(db, conv_id, user_id, seq, entries)
+        return end
+
+    async def _push_to_bucket(self, db, conversation_id: str, user_id: str, seq: int, entries: List[Dict[str, Any]], skip_if_stored: bool = False):
+        """
+        With skip_if_stored, nothing is written when the bucket already holds
+        the first entry's position (entries are always pushed together).
+        """
+        update = {
+            "$push": {"messages": {"$each": entries}},
+            "$setOnInsert": {"user_id": user_id, "created_at": datetime.utcnow()}
+        }
+        query = {"conversation_id": conversation_id, "seq": seq}
+        if skip_if_stored:
+            query["messages.position"] = {"$ne": entries[0]["position"]}
+        try:
+            await db.ai_conversation_buckets.update_one(query, update, upsert=True)
+        except DuplicateKeyError:
+            # Another turn created the same bucket concurrently (or, with
+            # skip_if_stored, it already holds these entries); it exists now
+            await db.ai_conversation_buckets.update_one(query, update)
+
+    async def get_messages(self, conversation_id, before: Optional[int] = None, limit: int = 50) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        """
+        Reads one page of history: up to `limit` messages preceding position
+        `before` (the latest messages when omitted), in chronological order.
+        Also returns the `before` value for the next older page, or None.
+        """
+        db = await get_db()
+        if before is None:
+            header = await db.ai_conversations.find_one({"_id": conversation_id}, {"message_count": 1})
+            before = header.get("message_count", 0) if header else 0
+        if before <= 0:
+            return [], None
+
+        start = max(before - limit, 0)
+        cursor = db.ai_conversation_buckets.find({
+            "conversation_id": str(conversation_id),
+            "seq": {"$gte": start // BUCKET_SIZE, "$lte": (before - 1) // BUCKET_SIZE}
+        })
+        messages = []
+        async for bucket in cursor:
+            messages.extend(m for m in bucket["messages"] if start <= m["position"] < before)
+        messages.sort(key=lambda m: m["position"])
+        return messages, (start if start > 0 else None)
+
+    async def update_summary(self, conversation_id, summary: str, expected_upto: int, summarized_upto: int) -> bool:
+        """
+        Stores a new rolling summary unless another writer already advanced it.
+        """
+        db = await get_db()
+        # Conversations created before summaries existed have no summarized_upto yet
+        expected = {"$in": [0, None]} if expected_upto == 0 else expected_upto
+        result = await db.ai_conversations.update_one(
+            {"_id": conversation_id, "summarized_upto": expected},
+            {"$set": {"summary": summary, "summarized_upto": summarized_upto}}
+        )
+        return result.modified_count > 0
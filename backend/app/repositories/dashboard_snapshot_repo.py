@@ -0,0 +1,161 @@
+from app.db.mongodb import get_db
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+# Entries kept per snapshot list
+RECENT_REPORTS = 3
+UPCOMING_APPOINTMENTS = 5
+
+# Updates remembered per snapshot so a raced rebuild can replay them
+PUSH_LOG = 100
+
+# Times a rebuild replays missed updates before it is served unstored
+REBUILD_ATTEMPTS = 3
+
+def _same_entry(stored: Dict[str, Any], entry: Dict[str, Any], sort_key: str) -> bool:
+    # Source rows match on id; streamed vitals have none and match on their timestamp
+    if entry.get("id") is not None:
+        return stored.get("id") == entry["id"]
+    return stored.get("id") is None and stored.get(sort_key) == entry.get(sort_key)
+
+def _apply_pushes(snapshot: Dict[str, Any], pushes: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Replays logged updates on a rebuilt snapshot the way `_push` applied them
+    to the stored one. Entries the rebuild already read are not added twice,
+    and a count only grows for rows newer than the rebuild's `latest_ids`.
+    """
+    merged = {**snapshot, "vitals": dict(snapshot.get("vitals", {})), "counts": dict(snapshot.get("counts", {}))}
+    latest_ids = snapshot.get("latest_ids", {})
+    for push in pushes:
+        entry, sort_key = push["entry"], push["sort_key"]
+        container, key = merged, push["field"]
+        if key.startswith("vitals."):
+            container, key = merged["vitals"], key.split(".", 1)[1]
+        entries = [e for e in container.get(key, []) if not _same_entry(e, entry, sort_key)]
+        entries.append(entry)
+        entries.sort(key=lambda e: e[sort_key], reverse=push["direction"] < 0)
+        container[key] = entries[:push["keep"]]
+
+        counter = push["counter"]
+        if entry.get("id") is None or entry["id"] > (latest_ids.get(counter) or 0):
+            merged["counts"][counter] = merged["counts"].get(counter, 0) + push["increment"]
+    return merged
+
+class DashboardSnapshotRepository:
+    """
+    One pre-assembled dashboard document per user in `dashboard_snapshots`,
+    keyed by the user id so a dashboard load is a single _id lookup.
+
+    New vitals, reports and appointments are folded in with $push + $sort +
+    $slice, which keeps the newest (or soonest) entries in one atomic update
+    regardless of arrival order. Edits and deletes call `invalidate` and the
+    next read rebuilds the snapshot from the source tables. Incremental
+    updates never create a snapshot; a missing one is always rebuilt in full.
+
+    Every update increments the snapshot's `version` and is kept in a capped
+    `pushes` log. A rebuild reads the version before querying the source
+    tables and only stores its result if the version is unchanged; otherwise
+    `store_rebuilt` replays the updates it missed and tries again, so a
+    steady stream of wearable readings neither overwrites nor starves it.
+    """
+
+    async def get(self, user_id: str) -> Optional[Dict[str, Any]]:
+        db = await get_db()
+        return await db.dashboard_snapshots.find_one({"_id": user_id})
+
+    async def begin_rebuild(self, user_id: str) -> int:
+        """
+        Returns the version a rebuild must pass to `replace`. A missing
+        snapshot gets a stale placeholder, so updates during the rebuild
+        still have a version to increment.
+        """
+        db = await get_db()
+        update = {"$setOnInsert": {"stale": True}, "$inc": {"version": 0}}
+        try:
+            current = await db.dashboard_snapshots.find_one_and_update(
+                {"_id": user_id}, update, upsert=True, return_document=ReturnDocument.AFTER
+            )
+        except DuplicateKeyError:
+            # Another rebuild created the placeholder first
+            current = await db.dashboard_snapshots.find_one_and_update(
+                {"_id": user_id}, update, return_document=ReturnDocument.AFTER
+            )
+        return current["version"]
+
+    async def replace(self, user_id: str, snapshot: Dict[str, Any], version: Optional[int] = None) -> bool:
+        """
+        Stores a rebuilt snapshot. With a version from `begin_rebuild`, it is
+        only stored if nothing changed the snapshot since; returns whether it
+        was stored.
+        """
+        db = await get_db()
+        document = {**snapshot, "_id": user_id, "version": version or 0, "updated_at": datetime.utcnow()}
+        if version is None:
+            await db.dashboard_snapshots.replace_one({"_id": user_id}, document, upsert=True)
+            return True
+        result = await db.dashboard_snapshots.replace_one({"_id": user_id, "version": version}, document)
+        return result.matched_count > 0
+
+    async def store_rebuilt(self, user_id: str, snapshot: Dict[str, Any], version: int) -> Dict[str, Any]:
+        """
+        Stores a snapshot rebuilt from `begin_rebuild`'s version, replaying
+        updates that landed meanwhile. Returns the snapshot to serve, which is
+        left unstored when the log no longer covers the missed updates, the
+        snapshot was invalidated, or every attempt was raced.
+        """
+        db = await get_db()
+        for _ in range(REBUILD_ATTEMPTS):
+            if await self.replace(user_id, snapshot, version):
+                break
+            current = await db.dashboard_snapshots.find_one({"_id": user_id}, projection={"version": 1, "pushes": 1})
+            if current is None:
+                break
+            pushes = current.get("pushes", [])
+            missed = current["version"] - version
+            if missed <= 0 or missed > len(pushes):
+                break
+            snapshot = _apply_pushes(snapshot, pushes[len(pushes) - missed:])
+            version = current["version"]
+        return snapshot
+
+    async def push_vital(self, user_id: str, record_type: str, entry: Dict[str, Any], new_rows: int = 1) -> Optional[List[Dict[str, Any]]]:
+        """
+        Returns the previous entries for the vital type (empty when this is its
+        first reading), or None when the user has no snapshot yet.
+        """
+        before = await self._push(user_id, f"vitals.{record_type}", entry, "recorded_at", -1, 1, "health_records", new_rows)
+        if before is None or before.get("stale"):
+            return None
+        return (before.get("vitals") or {}).get(record_type, [])
+
+    async def push_report(self, user_id: str, entry: Dict[str, Any]):
+        await self._push(user_id, "recent_reports", entry, "uploaded_at", -1, RECENT_REPORTS, "documents")
+
+    async def push_appointment(self, user_id: str, entry: Dict[str, Any]):
+        await self._push(user_id, "upcoming_appointments", entry, "appointment_time", 1, UPCOMING_APPOINTMENTS, "appointments")
+
+    async def _push(self, user_id: str, field: str, entry: Dict[str, Any], sort_key: str, direction: int, keep: int, counter: str, increment: int = 1) -> Optional[Dict[str, Any]]:
+        db = await get_db()
+        logged = {
+            "field": field, "entry": entry, "sort_key": sort_key, "direction": direction,
+            "keep": keep, "counter": counter, "increment": increment
+        }
+        return await db.dashboard_snapshots.find_one_and_update(
+            {"_id": user_id},
+            {
+                "$push": {
+                    field: {"$each": [entry], "$sort": {sort_key: direction}, "$slice": keep},
+                    "pushes": {"$each": [logged], "$slice": -PUSH_LOG}
+                },
+                "$inc": {f"counts.{counter}": increment, "version": 1},
+                "$set": {"updated_at": datetime.utcnow()}
+            },
+            projection={field: 1, "stale": 1},
+            return_document=ReturnDocument.BEFORE
+        )
+
+    async def invalidate(self, user_id: str):
+        db = await get_db()
+        await db.dashboard_snapshots.delete_one({"_id": user_id})
@@ -0,0 +1,12 @@
+from pydantic import BaseModel, Field
+from typing import List, Dict, Any, Optional
+
+class ChatRequest(BaseModel):
+    message: str = Field(..., min_length=1, description="Question for the health assistant")
+
+class ChatResponse(BaseModel):
+    response: str
+
+class ChatHistoryResponse(BaseModel):
+    messages: List[Dict[str, Any]]
+    before: Optional[int] = Field(None, description="Pass as `before` to load older messages; null when there are none")
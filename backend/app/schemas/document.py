@@ -0,0 +1,24 @@
+from pydantic import BaseModel, Field
+from typing import Dict, Any, Optional
+from datetime import datetime
+
+class DocumentUploadResponse(BaseModel):
+    id: str
+    file_name: str
+    file_type: str
+    category: str
+    processing_status: Optional[str] = None
+    job_id: Optional[str] = Field(None, description="Poll /documents/jobs/{job_id} for OCR and summary progress")
+
+class JobStatusResponse(BaseModel):
+    id: str
+    job_type: str
+    status: str # "queued", "running", "completed" or "failed"
+    progress: int
+    progress_message: str
+    attempts: int
+    max_attempts: int
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
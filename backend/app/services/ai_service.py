@@ -1,48 +1,79 @@
-from app.repositories.base_repo import BaseRepository
-from app.integrations.llm_provider import GeminiProvider
+from app.repositories.conversation_repo import ConversationRepository
+from app.integrations.llm_provider import get_llm_provider, LLMStreamError
+from app.integrations.llm_cache import GLOBAL_CACHE_SCOPE
 from app.services.timeline_service import TimelineService
 from app.repositories.user_repo import UserRepository
-from app.models.conversation import ConversationDoc, ChatMessage
-from datetime import datetime
-from typing import List, Dict, Any, Optional
+from app.models.conversation import ChatMessage
+from app.services.context_cache import patient_context_cache
+from app.services.context_window import ContextWindowManager, SUMMARIZER_INSTRUCTION
+from app.core.metrics import LatencyRecorder
+from app.core.config import settings
+import asyncio
+from contextlib import aclosing
+from time import perf_counter
+from typing import List, Dict, Any, Optional, Tuple, AsyncIterator
+
+# Contextual system prompt for the health assistant
+HEALTH_ASSISTANT_INSTRUCTION = (
+    "You are HealthHub AI, a world-class personalized medical assistant and clinical copilot. "
+    "Your tone is calm, trustworthy, empathetic, and professional. "
+    "Always structure your answer as follows: "
+    "1. Short, concise answer (1-2 sentences). "
+    "2. Detailed clinical explanation. "
+    "3. Clear, recommended next actions. "
+    "4. A safety warning note (e.g. consult a doctor if severe). "
+    "NEVER prescribe medications directly. Use the patient context provided to personalize responses."
+)
+
+# Characters of extracted report text sent for summarization
+REPORT_TEXT_LIMIT = 20000
+
+# Prompt assembly and LLM latencies, kept apart to show where chat time goes
+ai_metrics = LatencyRecorder()
+
+# Strong references to fire-and-forget summary updates
+_background_tasks = set()
 
 class AIService:
     def __init__(self):
-        self.conversation_repo = BaseRepository("ai_conversations")
+        self.conversation_repo = ConversationRepository()
         self.user_repo = UserRepository()
         self.timeline_service = TimelineService()
-        self.llm_provider = GeminiProvider()
+        self.llm_provider = get_llm_provider()
+        self.context_window = ContextWindowManager(
+            recent_turns=settings.AI_HISTORY_RECENT_TURNS,
+            token_budget=settings.AI_PROMPT_TOKEN_BUDGET,
+            summary_batch_turns=settings.AI_SUMMARY_BATCH_TURNS
+        )
 
     async def get_or_create_conversation(self, user_id: str) -> Dict[str, Any]:
         """
         Retrieves existing chat session or creates a new one for the user.
         """
-        convs = await self.conversation_repo.find(filter_query={"user_id": user_id}, limit=1)
-        if convs:
-            return convs[0]
-            
-        new_conv = ConversationDoc(user_id=user_id)
-        return await self.conversation_repo.create(new_conv.model_dump())
+        return await self.conversation_repo.get_or_create(user_id)
 
-    async def ask_health_assistant(self, user_id: str, user_message: str) -> str:
+    async def get_conversation_history(self, user_id: str, before: Optional[int] = None, limit: int = 50) -> Tuple[List[Dict[str, Any]], Optional[int]]:
         """
-        Interacts with the AI, feeding it the patient's personal background
-        and prior timeline health events for hyper-personalized responses.
+        Returns a page of the user's chat history in chronological order and
+        the `before` position to request the next older page with.
         """
+        conv = await self.get_or_create_conversation(user_id)
+        return await self.conversation_repo.get_messages(conv["_id"], before=before, limit=limit)
+
+    async def _get_patient_context(self, user_id: str) -> str:
+        """
+        Renders the patient's profile and recent timeline as prompt context,
+        served from the process-wide cache until either one changes.
+        """
+        cached = patient_context_cache.get(user_id)
+        if cached is not None:
+            return cached
+
+        version = patient_context_cache.version(user_id)
         # Fetch patient clinical info for context injection
-        profile = await self.user_repo.get_patient_profile(user_id)
-        timeline = await self.timeline_service.get_user_timeline(user_id, limit=5)
-        
-        # Build contextual system prompt
-        system_instruction = (
-            "You are HealthHub AI, a world-class personalized medical assistant and clinical copilot. "
-            "Your tone is calm, trustworthy, empathetic, and professional. "
-            "Always structure your answer as follows: "
-            "1. Short, concise answer (1-2 sentences). "
-            "2. Detailed clinical explanation. "
-            "3. Clear, recommended next actions. "
-            "4. A safety warning note (e.g. consult a doctor if severe). "
-            "NEVER prescribe medications directly. Use the patient context provided to personalize responses."
+        profile, timeline = await asyncio.gather(
+            self.user_repo.get_patient_profile(user_id),
+            self.timeline_service.get_user_timeline(user_id, limit=5)
         )
 
         # Build context details
@@ -53,30 +84,119 @@ class AIService:
             events_summary = [f"- {e.get('title')}: {e.get('description')}" for e in timeline]
             context += f"Recent Health Timeline:\n" + "\n".join(events_summary) + "\n"
 
-        prompt = f"Patient context:\n{context}\nUser question: {user_message}"
+        patient_context_cache.set(user_id, context, version)
+        return context
+
+    async def _load_conversation(self, user_id: str) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+        """
+        Loads the conversation header and the messages kept verbatim in prompts:
+        everything after the part folded into the summary.
+        """
+        conv = await self.get_or_create_conversation(user_id)
+        message_count = conv.get("message_count", 0)
+        start = self.context_window.verbatim_start(message_count, conv.get("summarized_upto") or 0)
+        recent = []
+        if message_count > start:
+            recent, _ = await self.conversation_repo.get_messages(conv["_id"], before=message_count, limit=message_count - start)
+        return conv, recent
+
+    async def _prepare_turn(self, user_id: str, user_message: str) -> Tuple[str, Dict[str, Any], Dict[str, Any]]:
+        """
+        Assembles the prompt from patient context, conversation memory and the
+        question, loading context and conversation concurrently. Also returns the
+        response cache arguments. The conversation memory changes every turn, so
+        answers are keyed on the question and the patient context only: a user
+        repeating a question while their profile and timeline are unchanged is
+        answered from the cache. A prompt with no patient context and no
+        earlier messages holds nothing personal, so its answer is shared by
+        every user asking exactly the same question.
+        """
+        with ai_metrics.measure("context_assembly"):
+            context, (conv, recent) = await asyncio.gather(
+                self._get_patient_context(user_id),
+                self._load_conversation(user_id)
+            )
+        summary = conv.get("summary", "")
+        prompt = self.context_window.build_prompt(context, summary, recent, user_message)
+        if context or summary or recent:
+            cache = {"cache_scope": user_id, "cache_key": f"{context}\n{user_message}"}
+        else:
+            cache = {"cache_scope": GLOBAL_CACHE_SCOPE, "cache_key": user_message}
+        return prompt, {**cache, "cache_query": user_message}, conv
+
+    async def _save_turn(self, conv: Dict[str, Any], user_id: str, user_message: str, ai_response: str):
+        # Append the turn to the conversation history in MongoDB
+        message_count = await self.conversation_repo.append_messages(conv["_id"], user_id, [
+            ChatMessage(sender="user", content=user_message),
+            ChatMessage(sender="ai", content=ai_response)
+        ])
+
+        summarized_upto = conv.get("summarized_upto", 0)
+        if self.context_window.needs_summary(message_count, summarized_upto):
+            # Off the response path; a failed attempt is simply retried on a later turn
+            task = asyncio.create_task(self._update_summary(conv, message_count))
+            _background_tasks.add(task)
+            task.add_done_callback(_background_tasks.discard)
+
+    async def _update_summary(self, conv: Dict[str, Any], message_count: int):
+        """
+        Folds the messages that left the verbatim window into the rolling summary.
+        """
+        start = conv.get("summarized_upto", 0)
+        end = message_count - self.context_window.recent_messages
+        try:
+            messages, _ = await self.conversation_repo.get_messages(conv["_id"], before=end, limit=end - start)
+            prompt = self.context_window.summary_prompt(conv.get("summary", ""), messages)
+            with ai_metrics.measure("summary_update"):
+                summary = await self.llm_provider.complete(prompt, system_instruction=SUMMARIZER_INSTRUCTION)
+            await self.conversation_repo.update_summary(conv["_id"], summary, start, end)
+        except Exception as e:
+            print(f"Conversation summary update failed: {str(e)}")
+
+    async def ask_health_assistant(self, user_id: str, user_message: str) -> str:
+        """
+        Interacts with the AI, feeding it the patient's personal background
+        and prior timeline health events for hyper-personalized responses.
+        """
+        prompt, cache, conv = await self._prepare_turn(user_id, user_message)
 
         # Call Gemini Provider
-        ai_response = await self.llm_provider.generate_response(prompt, system_instruction=system_instruction)
+        with ai_metrics.measure("llm"):
+            ai_response = await self.llm_provider.generate_response(prompt, system_instruction=HEALTH_ASSISTANT_INSTRUCTION, **cache)
 
-        # Save conversation history in MongoDB
-        conv = await self.get_or_create_conversation(user_id)
-        conv_id = str(conv["_id"])
-        
-        messages = conv.get("messages", [])
-        messages.append(ChatMessage(sender="user", content=user_message).model_dump())
-        messages.append(ChatMessage(sender="ai", content=ai_response).model_dump())
-        
-        await self.conversation_repo.update(conv_id, {
-            "messages": messages,
-            "updated_at": datetime.utcnow()
-        })
-        
+        await self._save_turn(conv, user_id, user_message, ai_response)
         return ai_response
 
+    async def stream_health_assistant(self, user_id: str, user_message: str) -> AsyncIterator[str]:
+        """
+        Streaming variant of ask_health_assistant: yields response chunks as the
+        model produces them and saves the turn once the response is complete.
+        If the consumer stops early (client disconnected) nothing is saved.
+        A provider failure raises LLMStreamError carrying the fallback message
+        and saves nothing, so a half-written answer never enters the history.
+        """
+        prompt, cache, conv = await self._prepare_turn(user_id, user_message)
+
+        chunks = []
+        began = perf_counter()
+        try:
+            async with aclosing(self.llm_provider.stream(prompt, system_instruction=HEALTH_ASSISTANT_INSTRUCTION, **cache)) as stream:
+                async for chunk in stream:
+                    if not chunks:
+                        ai_metrics.record("llm_first_chunk", (perf_counter() - began) * 1000)
+                    chunks.append(chunk)
+                    yield chunk
+        except Exception as e:
+            raise LLMStreamError(self.llm_provider.fallback_message(e)) from e
+        ai_metrics.record("llm", (perf_counter() - began) * 1000)
+
+        await self._save_turn(conv, user_id, user_message, "".join(chunks))
+
     async def summarize_uploaded_report(self, user_id: str, document_text: str) -> str:
         """
         Analyzes the text extracted from OCR/PDF reports and outputs an AI summary.
+        Raises on provider errors so background jobs can retry.
         """
         system_instruction = "You are an AI Clinical Pathologist. Summarize lab test values clearly, flags abnormal metrics in bold, and recommends follow-up tests."
-        prompt = f"Summarize the following medical document contents:\n{document_text}"
-        return await self.llm_provider.generate_response(prompt, system_instruction=system_instruction)
+        prompt = f"Summarize the following medical document contents:\n{document_text[:REPORT_TEXT_LIMIT]}"
+        return await self.llm_provider.complete(prompt, system_instruction=system_instruction)
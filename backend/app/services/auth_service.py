@@ -1,5 +1,6 @@
 from app.repositories.user_repo import UserRepository
 from app.models.user import UserDoc, PatientProfileDoc, UserRole
+from app.services.context_cache import patient_context_cache
 from firebase_admin import auth as firebase_auth
 from datetime import datetime
 
@@ -34,6 +35,7 @@ class AuthService:
             # Setup a baseline blank patient profile for them
             new_profile = PatientProfileDoc(uid=uid)
             await self.user_repo.create_patient_profile(new_profile)
+            patient_context_cache.invalidate(uid)
             
         return db_user
 
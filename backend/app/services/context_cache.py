@@ -0,0 +1,34 @@
+import time
+from typing import Dict, Optional, Tuple
+
+class PatientContextCache:
+    """
+    Process-wide cache of the rendered patient-context block used in AI prompts.
+    Writers that change a patient's profile or timeline call `invalidate`; a
+    per-user version counter keeps a slow reader from re-caching stale context
+    fetched before the invalidation. The TTL bounds staleness from writes made
+    by other processes.
+    """
+    def __init__(self, ttl_seconds: float = 300):
+        self.ttl_seconds = ttl_seconds
+        self._entries: Dict[str, Tuple[str, float]] = {}
+        self._versions: Dict[str, int] = {}
+
+    def version(self, user_id: str) -> int:
+        return self._versions.get(user_id, 0)
+
+    def get(self, user_id: str) -> Optional[str]:
+        entry = self._entries.get(user_id)
+        if entry is None or entry[1] < time.monotonic():
+            return None
+        return entry[0]
+
+    def set(self, user_id: str, context: str, version: int):
+        if version == self.version(user_id):
+            self._entries[user_id] = (context, time.monotonic() + self.ttl_seconds)
+
+    def invalidate(self, user_id: str):
+        self._versions[user_id] = self.version(user_id) + 1
+        self._entries.pop(user_id, None)
+
+patient_context_cache = PatientContextCache()
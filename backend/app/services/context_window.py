@@ -0,0 +1,87 @@
+from typing import List, Dict, Any
+
+SUMMARIZER_INSTRUCTION = (
+    "You maintain a running clinical summary of a chat between a patient and HealthHub AI. "
+    "Merge the new exchanges into the existing summary. Keep symptoms, measurements, conditions, "
+    "medications mentioned, advice given and open questions. Be factual and concise; write at most 200 words."
+)
+
+def estimate_tokens(text: str) -> int:
+    """
+    Cheap token estimate (~4 characters per token for English text); close
+    enough for budgeting without pulling in a tokenizer.
+    """
+    return len(text) // 4 + 1
+
+def render_message(message: Dict[str, Any]) -> str:
+    speaker = "User" if message.get("sender") == "user" else "HealthHub AI"
+    return f"{speaker}: {message.get('content', '')}"
+
+class ContextWindowManager:
+    """
+    Decides what conversation memory goes into a prompt: a rolling summary
+    plus, verbatim, every message the summary has not folded in yet (at least
+    the last `recent_turns` turns), all within `token_budget`. Messages are
+    summarized in batches once they leave the last `recent_turns` turns, so
+    the verbatim part holds up to `summary_batch_turns` extra turns between
+    summaries and no message is ever in neither. When over budget it drops
+    the oldest verbatim messages first, then trims the summary; patient
+    context and the question are always kept.
+    """
+    def __init__(self, recent_turns: int = 6, token_budget: int = 3000, summary_batch_turns: int = 4):
+        self.recent_turns = recent_turns
+        self.token_budget = token_budget
+        self.summary_batch_turns = summary_batch_turns
+
+    @property
+    def recent_messages(self) -> int:
+        return self.recent_turns * 2
+
+    def verbatim_start(self, message_count: int, summarized_upto: int) -> int:
+        """
+        Position of the first message to send verbatim: the first one not in
+        the summary. If summaries keep failing, at most twice the usual
+        backlog is loaded and the budget trims the rest.
+        """
+        most = 2 * (self.recent_messages + self.summary_batch_turns * 2)
+        return max(summarized_upto, message_count - most, 0)
+
+    def build_prompt(self, context: str, summary: str, recent: List[Dict[str, Any]], question: str) -> str:
+        head = f"Patient context:\n{context}\n"
+        tail = f"User question: {question}"
+        remaining = self.token_budget - estimate_tokens(head) - estimate_tokens(tail)
+
+        # Newest messages are worth the most; keep as many as fit
+        kept: List[str] = []
+        for message in reversed(recent):
+            line = render_message(message)
+            cost = estimate_tokens(line)
+            if cost > remaining:
+                break
+            kept.append(line)
+            remaining -= cost
+        kept.reverse()
+
+        history = ""
+        if summary and remaining > 0:
+            label = "Summary of earlier conversation: "
+            max_chars = max((remaining - estimate_tokens(label)) * 4, 0)
+            if max_chars > 0:
+                history += label + summary[-max_chars:] + "\n"
+        if kept:
+            history += "\n".join(kept) + "\n"
+        if history:
+            history = f"Conversation so far:\n{history}\n"
+        return head + history + tail
+
+    def needs_summary(self, message_count: int, summarized_upto: int) -> bool:
+        """
+        True once enough turns have scrolled out of the verbatim window; folding
+        them in batches keeps summarizer calls to one per `summary_batch_turns` turns.
+        """
+        unsummarized = message_count - self.recent_messages - summarized_upto
+        return unsummarized >= self.summary_batch_turns * 2
+
+    def summary_prompt(self, summary: str, messages: List[Dict[str, Any]]) -> str:
+        exchanges = "\n".join(render_message(m) for m in messages)
+        return f"Existing summary:\n{summary or '(none)'}\n\nNew exchanges:\n{exchanges}"
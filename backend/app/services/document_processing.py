@@ -0,0 +1,72 @@
+import asyncio
+from datetime import datetime
+from typing import Dict, Any
+
+from app.repositories.base_repo import BaseRepository
+from app.integrations.firebase_storage import FirebaseStorageProvider
+from app.integrations.text_extraction import extract_text, UnsupportedDocumentError
+from app.services.ai_service import AIService
+from app.services.job_queue import PermanentJobError, ProgressCallback
+from app.services.timeline_service import TimelineService
+
+REPORT_PROCESSING_JOB = "report_processing"
+
+# File types the processing job can extract text from
+PROCESSABLE_TYPES = ("application/pdf", "image/", "text/")
+
+def is_processable(file_type: str) -> bool:
+    return file_type.startswith(PROCESSABLE_TYPES)
+
+class DocumentProcessingService:
+    def __init__(self):
+        self.repo = BaseRepository("document_files")
+        self.storage_provider = FirebaseStorageProvider()
+        self.ai_service = AIService()
+        self.timeline_service = TimelineService()
+
+    async def process_report(self, job: Dict[str, Any], progress: ProgressCallback) -> Dict[str, Any]:
+        """
+        Job handler: downloads an uploaded report, extracts its text (PDF text
+        layer or image OCR), summarizes it and writes both back to the document.
+        """
+        document_id = job["payload"]["document_id"]
+        doc = await self.repo.get_by_id(document_id)
+        if not doc:
+            raise PermanentJobError("Document not found")
+
+        await progress(10, "Downloading document")
+        file_bytes = await asyncio.to_thread(self.storage_provider.download_file, doc["file_path"])
+
+        await progress(30, "Extracting text")
+        try:
+            text = await asyncio.to_thread(extract_text, file_bytes, doc["file_type"])
+        except UnsupportedDocumentError as e:
+            raise PermanentJobError(str(e))
+        if not text:
+            raise PermanentJobError("No text could be extracted from the document")
+
+        await progress(60, "Summarizing report")
+        summary = await self.ai_service.summarize_uploaded_report(doc["user_id"], text)
+
+        await progress(90, "Saving summary")
+        await self.repo.update(document_id, {
+            "extracted_text": text,
+            "ai_summary": summary,
+            "processing_status": "completed",
+            "processed_at": datetime.utcnow()
+        })
+        await self.timeline_service.log_event(
+            user_id=doc["user_id"],
+            event_type="report_summarized",
+            title=f"{doc['category']} Summary Ready",
+            description=f"AI summary generated for '{doc['file_name']}'",
+            metadata={"document_id": document_id, "job_id": str(job["_id"])}
+        )
+        return {"document_id": document_id, "text_length": len(text)}
+
+    async def report_failed(self, job: Dict[str, Any], error: str):
+        """
+        Failure handler: marks the document failed once its job gives up, so
+        it does not stay "queued" after the last retry.
+        """
+        await self.repo.update(job["payload"]["document_id"], {"processing_status": "failed"})
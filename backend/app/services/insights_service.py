@@ -0,0 +1,235 @@
+import asyncio
+import json
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from pymongo import ASCENDING
+from pymongo.errors import DuplicateKeyError
+
+from app.db.mongodb import get_db
+from app.core.config import settings
+from app.integrations.llm_provider import get_llm_provider
+
+INSIGHTS_INSTRUCTION = (
+    "You are HealthHub AI writing a patient's daily dashboard brief. Reply with JSON only, no prose: "
+    '{"daily_brief": [{"text": str, "color": "emerald"|"blue"|"orange"|"purple"|"amber"}], '
+    '"recommendations": [{"action": str, "topic": str, "description": str, "type": str}]}. '
+    "Give 3-4 brief items and 3-4 recommendations, each under 60 characters, based only on the data provided."
+)
+
+BRIEF_COLORS = {"emerald", "blue", "orange", "purple", "amber"}
+
+# `insights_due_at` for users with no or stale insights, ahead of every aged-out brief
+DUE_NOW = datetime(1970, 1, 1)
+
+# Change in a vital's latest reading that makes stored insights outdated
+SIGNIFICANT_CHANGE = {
+    "heart_rate": 15,       # bpm
+    "blood_pressure": 10,   # mmHg
+    "blood_glucose": 20,    # mg/dL
+    "weight": 2             # kg
+}
+
+def is_significant_change(record_type: str, previous: Optional[float], current: float) -> bool:
+    if previous is None:
+        return True
+    threshold = SIGNIFICANT_CHANGE.get(record_type)
+    return threshold is not None and abs(current - previous) >= threshold
+
+def parse_insights(text: str) -> Dict[str, List[Dict[str, str]]]:
+    """
+    Parses the model's JSON reply, tolerating a markdown code fence around it.
+    Raises ValueError when the reply is not usable.
+    """
+    text = text.strip()
+    if text.startswith("```"):
+        text = text.strip("`")
+        text = text[text.index("\n") + 1:] if "\n" in text else text
+    data = json.loads(text)
+
+    brief = [
+        {"text": str(item["text"]), "color": item.get("color") if item.get("color") in BRIEF_COLORS else "blue"}
+        for item in data.get("daily_brief", []) if isinstance(item, dict) and item.get("text")
+    ]
+    recommendations = [
+        {key: str(item.get(key, "")) for key in ("action", "topic", "description", "type")}
+        for item in data.get("recommendations", []) if isinstance(item, dict) and item.get("topic")
+    ]
+    if not brief and not recommendations:
+        raise ValueError("Insights reply had no brief items or recommendations")
+    return {"daily_brief": brief, "recommendations": recommendations}
+
+def render_vitals_context(snapshot: Dict[str, Any]) -> str:
+    lines = []
+    for record_type, entries in sorted((snapshot.get("vitals") or {}).items()):
+        if entries:
+            latest = entries[0]
+            lines.append(f"- {record_type.replace('_', ' ')}: {latest['value']} {latest['unit']} (recorded {latest['recorded_at']:%Y-%m-%d})")
+    upcoming = snapshot.get("upcoming_appointments") or []
+    if upcoming:
+        lines.append(f"- next appointment: {upcoming[0]['appointment_type']} with {upcoming[0]['doctor']} on {upcoming[0]['appointment_time']:%Y-%m-%d %H:%M}")
+    return "\n".join(lines) or "- no recent measurements"
+
+class CallPacer:
+    """
+    Spaces calls evenly to stay under `calls_per_minute`, so a batch run never
+    bursts the LLM quota that interactive chat also draws from.
+    """
+    def __init__(self, calls_per_minute: float):
+        self.interval = 60.0 / calls_per_minute
+        self._next_slot = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        async with self._lock:
+            now = time.monotonic()
+            if self._next_slot > now:
+                await asyncio.sleep(self._next_slot - now)
+            self._next_slot = max(now, self._next_slot) + self.interval
+
+class InsightsService:
+    """
+    Stores one precomputed insights document per user in `ai_insights`. The
+    dashboard only ever reads it; generation happens in InsightsScheduler.
+    Documents carry `generated_at` for freshness and an indexed
+    `insights_due_at`: INSIGHTS_MAX_AGE_HOURS after generation, or DUE_NOW
+    when the user is new or a vital changed significantly. Users who turn out
+    inactive get it unset and drop out of the index until their next change.
+    """
+    def __init__(self):
+        self.llm_provider = get_llm_provider()
+
+    async def ensure_indexes(self):
+        db = await get_db()
+        await db.ai_insights.create_index([("insights_due_at", ASCENDING)])
+        # Documents written before `insights_due_at` existed are checked once
+        await db.ai_insights.update_many({"insights_due_at": {"$exists": False}}, {"$set": {"insights_due_at": DUE_NOW}})
+
+    async def get(self, user_id: str) -> Optional[Dict[str, Any]]:
+        db = await get_db()
+        return await db.ai_insights.find_one({"_id": user_id})
+
+    async def mark_stale(self, user_id: str):
+        db = await get_db()
+        await db.ai_insights.update_one({"_id": user_id}, {"$set": {"stale": True, "insights_due_at": DUE_NOW}}, upsert=True)
+
+    async def track(self, user_id: str):
+        """Makes a user without an insights document due for their first brief."""
+        db = await get_db()
+        await db.ai_insights.update_one({"_id": user_id}, {"$setOnInsert": {"insights_due_at": DUE_NOW}}, upsert=True)
+
+    async def due_users(self, limit: int) -> List[Dict[str, Any]]:
+        """
+        Snapshots of up to `limit` active users whose insights are due, most
+        overdue first. Reads one index range, so the cost follows the batch
+        size rather than the number of users.
+        """
+        db = await get_db()
+        now = datetime.utcnow()
+        due = await db.ai_insights.find(
+            {"insights_due_at": {"$lte": now}}, {"_id": 1}
+        ).sort("insights_due_at", ASCENDING).limit(limit).to_list(limit)
+        if not due:
+            return []
+
+        ids = [doc["_id"] for doc in due]
+        snapshots = {
+            snapshot["_id"]: snapshot for snapshot in await db.dashboard_snapshots.find(
+                {"_id": {"$in": ids}, "updated_at": {"$gte": now - timedelta(days=settings.INSIGHTS_ACTIVE_DAYS)}},
+                {"vitals": 1, "upcoming_appointments": 1}
+            ).to_list(limit)
+        }
+        inactive = [user_id for user_id in ids if user_id not in snapshots]
+        if inactive:
+            await db.ai_insights.update_many({"_id": {"$in": inactive}}, {"$unset": {"insights_due_at": ""}})
+        return [snapshots[user_id] for user_id in ids if user_id in snapshots]
+
+    async def claim(self, user_id: str, lease_seconds: float = 600) -> bool:
+        """
+        Takes a short lease on the user's insights so concurrent schedulers
+        (one per API process) never generate the same brief twice.
+        """
+        db = await get_db()
+        now = datetime.utcnow()
+        try:
+            await db.ai_insights.update_one(
+                {"_id": user_id, "$or": [{"locked_until": None}, {"locked_until": {"$lt": now}}]},
+                # Pushing the due time past the lease keeps the user out of other batches meanwhile
+                {"$set": {"locked_until": now + timedelta(seconds=lease_seconds), "insights_due_at": now + timedelta(seconds=lease_seconds)}},
+                upsert=True
+            )
+            return True
+        except DuplicateKeyError:
+            return False
+
+    async def generate(self, snapshot: Dict[str, Any]) -> Dict[str, Any]:
+        user_id = snapshot["_id"]
+        prompt = f"Patient's latest health data:\n{render_vitals_context(snapshot)}\n\nWrite today's brief and recommendations."
+        reply = await self.llm_provider.complete(prompt, system_instruction=INSIGHTS_INSTRUCTION)
+        insights = parse_insights(reply)
+
+        db = await get_db()
+        generated_at = datetime.utcnow()
+        await db.ai_insights.update_one(
+            {"_id": user_id},
+            {"$set": {
+                **insights, "generated_at": generated_at, "stale": False, "locked_until": None,
+                "insights_due_at": generated_at + timedelta(hours=settings.INSIGHTS_MAX_AGE_HOURS)
+            }},
+            upsert=True
+        )
+        return insights
+
+class InsightsScheduler:
+    """
+    Background loop that regenerates due insights every
+    INSIGHTS_INTERVAL_SECONDS, in batches of INSIGHTS_BATCH_SIZE users and
+    paced to INSIGHTS_LLM_CALLS_PER_MINUTE.
+    """
+    def __init__(self, service: Optional[InsightsService] = None, interval: Optional[float] = None, batch_size: Optional[int] = None, calls_per_minute: Optional[float] = None):
+        self.service = service or InsightsService()
+        self.interval = interval or settings.INSIGHTS_INTERVAL_SECONDS
+        self.batch_size = batch_size or settings.INSIGHTS_BATCH_SIZE
+        self.pacer = CallPacer(calls_per_minute or settings.INSIGHTS_LLM_CALLS_PER_MINUTE)
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = asyncio.Event()
+
+    def start(self):
+        if self._task is None:
+            self._stopping.clear()
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._stopping.set()
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _loop(self):
+        while not self._stopping.is_set():
+            try:
+                generated = await self.run_batch()
+                if generated:
+                    print(f"[INSIGHTS] Generated insights for {generated} users.")
+            except Exception as e:
+                print(f"[INSIGHTS] Batch failed ({e}).")
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def run_batch(self) -> int:
+        generated = 0
+        for snapshot in await self.service.due_users(self.batch_size):
+            if not await self.service.claim(snapshot["_id"]):
+                continue
+            await self.pacer.wait()
+            try:
+                await self.service.generate(snapshot)
+                generated += 1
+            except Exception as e:
+                # The claim's lease doubles as retry backoff
+                print(f"[INSIGHTS] Could not generate insights for user {snapshot['_id']} ({e}).")
+        return generated
@@ -0,0 +1,269 @@
+import asyncio
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, ReturnDocument
+
+from app.db.mongodb import get_db
+from app.core.config import settings
+
+ProgressCallback = Callable[[int, str], Awaitable[None]]
+JobHandler = Callable[[Dict[str, Any], ProgressCallback], Awaitable[Dict[str, Any]]]
+FailureHandler = Callable[[Dict[str, Any], str], Awaitable[None]]
+
+# Jobs that still have attempts left
+HAS_ATTEMPTS_LEFT = {"$expr": {"$lt": ["$attempts", "$max_attempts"]}}
+LEASE_EXPIRED_ERROR = "Worker stopped before finishing the job"
+
+class PermanentJobError(Exception):
+    """
+    Raised by a handler when retrying cannot help (unsupported file, missing document).
+    """
+    pass
+
+class JobQueue:
+    """
+    Persistent job queue in the `jobs` collection. Workers claim the highest
+    priority runnable job with an atomic find_one_and_update and hold a lease
+    on it; a job whose worker died is picked up again once the lease expires.
+    Every claim gets a new `lease_id`, and progress, completion and failure
+    only apply while the caller still holds that lease, so a worker whose
+    lease expired cannot overwrite the job's new owner.
+    Failed attempts are retried with exponential backoff up to max_attempts;
+    a job whose lease expires on its last attempt is failed by `expire`.
+    """
+    def __init__(self, lease_seconds: Optional[float] = None, retry_base_seconds: float = 5):
+        self.lease_seconds = settings.JOB_LEASE_SECONDS if lease_seconds is None else lease_seconds
+        self.retry_base_seconds = retry_base_seconds
+
+    async def ensure_indexes(self):
+        db = await get_db()
+        await db.jobs.create_index([("status", ASCENDING), ("priority", DESCENDING), ("run_after", ASCENDING)])
+        await db.jobs.create_index([("user_id", ASCENDING), ("created_at", DESCENDING)])
+
+    async def enqueue(self, job_type: str, payload: Dict[str, Any], user_id: Optional[str] = None, priority: int = 0, max_attempts: Optional[int] = None) -> Dict[str, Any]:
+        db = await get_db()
+        now = datetime.utcnow()
+        job = {
+            "job_type": job_type,
+            "payload": payload,
+            "user_id": user_id,
+            "priority": priority,
+            "status": "queued",
+            "attempts": 0,
+            "max_attempts": max_attempts or settings.JOB_MAX_ATTEMPTS,
+            "progress": 0,
+            "progress_message": "Queued",
+            "run_after": now,
+            "locked_until": None,
+            "lease_id": None,
+            "result": None,
+            "error": None,
+            "created_at": now,
+            "updated_at": now
+        }
+        result = await db.jobs.insert_one(job)
+        job["_id"] = result.inserted_id
+        return job
+
+    async def claim(self, job_types: List[str]) -> Optional[Dict[str, Any]]:
+        db = await get_db()
+        now = datetime.utcnow()
+        return await db.jobs.find_one_and_update(
+            {
+                "job_type": {"$in": job_types},
+                "$or": [
+                    {"status": "queued", "run_after": {"$lte": now}},
+                    {"status": "running", "locked_until": {"$lt": now}, **HAS_ATTEMPTS_LEFT}
+                ]
+            },
+            {
+                "$set": {
+                    "status": "running",
+                    "lease_id": ObjectId(),
+                    "locked_until": now + timedelta(seconds=self.lease_seconds),
+                    "updated_at": now
+                },
+                "$inc": {"attempts": 1}
+            },
+            sort=[("priority", DESCENDING), ("run_after", ASCENDING)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    def _leased(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        """Matches the job only while the lease it was claimed with is current"""
+        return {"_id": job["_id"], "status": "running", "lease_id": job["lease_id"]}
+
+    async def set_progress(self, job: Dict[str, Any], progress: int, message: str):
+        # Reporting progress renews the lease, so long jobs are not reclaimed
+        db = await get_db()
+        now = datetime.utcnow()
+        await db.jobs.update_one(
+            self._leased(job),
+            {"$set": {
+                "progress": progress,
+                "progress_message": message,
+                "locked_until": now + timedelta(seconds=self.lease_seconds),
+                "updated_at": now
+            }}
+        )
+
+    async def complete(self, job: Dict[str, Any], result: Dict[str, Any]) -> bool:
+        """Stores the result; returns False when the lease was lost and nothing was written"""
+        db = await get_db()
+        outcome = await db.jobs.update_one(
+            self._leased(job),
+            {"$set": {
+                "status": "completed",
+                "progress": 100,
+                "progress_message": "Completed",
+                "result": result,
+                "locked_until": None,
+                "updated_at": datetime.utcnow()
+            }}
+        )
+        return outcome.matched_count > 0
+
+    async def fail(self, job: Dict[str, Any], error: str, permanent: bool = False) -> bool:
+        """
+        Records a failed attempt; returns True when the job will not be
+        retried. Does nothing (and returns False) once the lease was lost.
+        """
+        db = await get_db()
+        now = datetime.utcnow()
+        final = permanent or job["attempts"] >= job["max_attempts"]
+        if final:
+            update = {"status": "failed", "progress_message": "Failed"}
+        else:
+            delay = self.retry_base_seconds * (2 ** (job["attempts"] - 1))
+            update = {"status": "queued", "run_after": now + timedelta(seconds=delay), "progress_message": "Waiting to retry"}
+        update.update({"error": error, "locked_until": None, "updated_at": now})
+        outcome = await db.jobs.update_one(self._leased(job), {"$set": update})
+        return final and outcome.matched_count > 0
+
+    async def expire(self, job_types: List[str]) -> List[Dict[str, Any]]:
+        """
+        Fails jobs whose lease expired on their last attempt, which `claim`
+        no longer picks up, and returns them.
+        """
+        db = await get_db()
+        expired = []
+        while True:
+            now = datetime.utcnow()
+            job = await db.jobs.find_one_and_update(
+                {
+                    "job_type": {"$in": job_types},
+                    "status": "running",
+                    "locked_until": {"$lt": now},
+                    "$expr": {"$gte": ["$attempts", "$max_attempts"]}
+                },
+                {"$set": {
+                    "status": "failed",
+                    "progress_message": "Failed",
+                    "error": LEASE_EXPIRED_ERROR,
+                    "locked_until": None,
+                    "updated_at": now
+                }},
+                return_document=ReturnDocument.AFTER
+            )
+            if job is None:
+                return expired
+            expired.append(job)
+
+    async def get_job(self, job_id: str, user_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        db = await get_db()
+        try:
+            query = {"_id": ObjectId(job_id)}
+        except Exception:
+            return None
+        if user_id is not None:
+            query["user_id"] = user_id
+        return await db.jobs.find_one(query)
+
+class JobWorkerPool:
+    """
+    Runs `concurrency` asyncio workers that poll the queue and dispatch jobs to
+    the handler registered for their job_type. Handlers should push blocking
+    work (OCR, PDF parsing) to a thread with asyncio.to_thread.
+    """
+    def __init__(self, queue: JobQueue, concurrency: Optional[int] = None, poll_interval: Optional[float] = None):
+        self.queue = queue
+        self.concurrency = settings.JOB_WORKERS if concurrency is None else concurrency
+        self.poll_interval = settings.JOB_POLL_INTERVAL_SECONDS if poll_interval is None else poll_interval
+        self.handlers: Dict[str, JobHandler] = {}
+        self.failure_handlers: Dict[str, FailureHandler] = {}
+        self._tasks: List[asyncio.Task] = []
+        self._stopping = asyncio.Event()
+
+    def register(self, job_type: str, handler: JobHandler, on_failure: Optional[FailureHandler] = None):
+        """
+        `on_failure(job, error)` runs once a job of this type has failed for
+        good: a permanent error, its last attempt, or an expired last lease.
+        """
+        self.handlers[job_type] = handler
+        if on_failure is not None:
+            self.failure_handlers[job_type] = on_failure
+
+    def start(self):
+        self._stopping.clear()
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.concurrency)]
+
+    async def stop(self):
+        self._stopping.set()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _work(self):
+        while not self._stopping.is_set():
+            try:
+                job = await self.queue.claim(list(self.handlers))
+            except Exception as e:
+                print(f"[JOBS] Could not poll job queue ({e}).")
+                job = None
+
+            if job is None:
+                await self._expire()
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._run(job)
+
+    async def _expire(self):
+        try:
+            for job in await self.queue.expire(list(self.handlers)):
+                await self._failed(job, LEASE_EXPIRED_ERROR)
+        except Exception as e:
+            print(f"[JOBS] Could not expire abandoned jobs ({e}).")
+
+    async def _failed(self, job: Dict[str, Any], error: str):
+        on_failure = self.failure_handlers.get(job["job_type"])
+        if on_failure is None:
+            return
+        try:
+            await on_failure(job, error)
+        except Exception as e:
+            print(f"[JOBS] Failure handler for {job['job_type']} job {job['_id']} failed: {e}")
+
+    async def _run(self, job: Dict[str, Any]):
+        async def progress(percent: int, message: str):
+            await self.queue.set_progress(job, percent, message)
+
+        try:
+            result = await self.handlers[job["job_type"]](job, progress)
+            if not await self.queue.complete(job, result or {}):
+                print(f"[JOBS] {job['job_type']} job {job['_id']} finished after its lease expired; result discarded.")
+        except PermanentJobError as e:
+            if await self.queue.fail(job, str(e), permanent=True):
+                await self._failed(job, str(e))
+        except asyncio.CancelledError:
+            # Shutting down: the lease expires and another worker retries the job
+            raise
+        except Exception as e:
+            print(f"[JOBS] {job['job_type']} job {job['_id']} failed: {e}")
+            if await self.queue.fail(job, str(e)):
+                await self._failed(job, str(e))
@@ -1,7 +1,9 @@
 from app.repositories.base_repo import BaseRepository
 from app.models.timeline import TimelineEventDoc
+from app.services.timeline_writer import timeline_writer
+from bson import ObjectId
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 
 class TimelineService:
     def __init__(self):
@@ -9,7 +11,9 @@ class TimelineService:
 
     async def log_event(self, user_id: str, event_type: str, title: str, description: str, metadata: Dict[str, Any] = {}) -> Dict[str, Any]:
         """
-        Logs a new health timeline event for a user.
+        Logs a new health timeline event for a user. The event is handed to the
+        write-behind timeline_writer, so it may take up to one flush interval
+        to show up in timeline queries.
         """
         event = TimelineEventDoc(
             user_id=user_id,
@@ -18,17 +22,25 @@ class TimelineService:
             description=description,
             metadata=metadata,
             timestamp=datetime.utcnow()
-        )
-        return await self.repo.create(event.model_dump())
+        ).model_dump()
+        event["_id"] = ObjectId()
+        await timeline_writer.write(event)
+        return event
 
-    async def get_user_timeline(self, user_id: str, skip: int = 0, limit: int = 50) -> List[Dict[str, Any]]:
+    async def get_user_timeline(self, user_id: str, cursor: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
         """
         Retrieve timeline events for a specific user, sorted newest first.
         """
-        return await self.repo.find(
+        events, _ = await self.get_user_timeline_page(user_id, cursor=cursor, limit=limit)
+        return events
+
+    async def get_user_timeline_page(self, user_id: str, cursor: Optional[str] = None, limit: int = 50) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Retrieve one page of timeline events plus the cursor of the next page.
+        """
+        return await self.repo.find_page(
             filter_query={"user_id": user_id},
-            skip=skip,
-            limit=limit,
             sort_by="timestamp",
-            sort_desc=True
+            cursor=cursor,
+            limit=limit
         )
@@ -0,0 +1,124 @@
+import asyncio
+from typing import Any, Dict, List, Optional
+
+from pymongo.errors import BulkWriteError
+
+from app.db.mongodb import get_db
+from app.core.config import settings
+from app.services.context_cache import patient_context_cache
+
+DUPLICATE_KEY_ERROR = 11000
+
+class TimelineWriter:
+    """
+    Write-behind buffer for timeline events. Callers hand over an event with a
+    client-generated _id and return immediately; a background task flushes the
+    buffer with insert_many(ordered=False) every `flush_interval` seconds or as
+    soon as `batch_size` events are waiting.
+
+    While the writer is not running (scripts, before startup) events are
+    inserted directly. When `max_pending` events are buffered the overflow
+    policy applies: "flush" makes the caller wait for a flush, "drop" discards
+    the event. A failed flush keeps its batch for the next attempt; batches are
+    idempotent because the _ids are fixed before the first insert.
+    """
+    def __init__(self, batch_size: Optional[int] = None, flush_interval: Optional[float] = None, max_pending: Optional[int] = None, overflow_policy: Optional[str] = None):
+        self.batch_size = batch_size or settings.TIMELINE_BATCH_SIZE
+        self.flush_interval = flush_interval or settings.TIMELINE_FLUSH_INTERVAL_SECONDS
+        self.max_pending = max_pending or settings.TIMELINE_MAX_PENDING
+        self.overflow_policy = overflow_policy or settings.TIMELINE_OVERFLOW_POLICY
+        self._buffer: List[Dict[str, Any]] = []
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._stopping = False
+        self.metrics = {"buffered": 0, "written": 0, "batches": 0, "direct_writes": 0, "dropped": 0, "failed_flushes": 0}
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        if not self.running:
+            self._stopping = False
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """
+        Stops the flush loop and writes out everything still buffered.
+        """
+        if self.running:
+            self._stopping = True
+            self._wakeup.set()
+            await self._task
+        self._task = None
+        await self.flush()
+        if self._buffer:
+            print(f"[TIMELINE] {len(self._buffer)} events could not be written on shutdown.")
+
+    async def write(self, event: Dict[str, Any]):
+        if not self.running:
+            await self._insert_one(event)
+            return
+
+        if len(self._buffer) >= self.max_pending:
+            if self.overflow_policy == "drop":
+                self.metrics["dropped"] += 1
+                return
+            await self.flush()
+            if len(self._buffer) >= self.max_pending:
+                # Database is not keeping up; surface errors to the caller as a direct write would
+                await self._insert_one(event)
+                return
+
+        self._buffer.append(event)
+        self.metrics["buffered"] += 1
+        if len(self._buffer) >= self.batch_size:
+            self._wakeup.set()
+
+    async def flush(self):
+        async with self._flush_lock:
+            while self._buffer:
+                batch = self._buffer[:self.batch_size]
+                del self._buffer[:self.batch_size]
+                try:
+                    db = await get_db()
+                    await db.timeline.insert_many(batch, ordered=False)
+                    written = len(batch)
+                except BulkWriteError as e:
+                    # Duplicate _ids come from a retried batch that was partly written before
+                    errors = [err for err in e.details.get("writeErrors", []) if err.get("code") != DUPLICATE_KEY_ERROR]
+                    if errors:
+                        print(f"[TIMELINE] {len(errors)} events rejected: {errors[0].get('errmsg')}")
+                    written = len(batch) - len(errors)
+                except Exception as e:
+                    self._buffer[:0] = batch
+                    self.metrics["failed_flushes"] += 1
+                    print(f"[TIMELINE] Flush failed, retrying later ({e}).")
+                    return
+
+                self.metrics["written"] += written
+                self.metrics["batches"] += 1
+                # Recent events are part of the AI prompt context
+                for user_id in {event["user_id"] for event in batch}:
+                    patient_context_cache.invalidate(user_id)
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def _insert_one(self, event: Dict[str, Any]):
+        db = await get_db()
+        await db.timeline.insert_one(event)
+        self.metrics["direct_writes"] += 1
+        patient_context_cache.invalidate(event["user_id"])
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self.metrics, "pending": len(self._buffer), "running": self.running}
+
+timeline_writer = TimelineWriter()
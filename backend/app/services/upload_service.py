@@ -1,15 +1,20 @@
+import asyncio
 from app.repositories.base_repo import BaseRepository
-from app.integrations.firebase_storage import FirebaseStorageProvider
+from app.integrations.firebase_storage import FirebaseStorageProvider, safe_path_segment
+from app.core.exceptions import BadRequestException
 from app.models.report import DocumentFileDoc
 from app.services.timeline_service import TimelineService
+from app.services.job_queue import JobQueue
+from app.services.document_processing import REPORT_PROCESSING_JOB, is_processable
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
 class UploadService:
     def __init__(self):
         self.repo = BaseRepository("document_files")
         self.storage_provider = FirebaseStorageProvider()
         self.timeline_service = TimelineService()
+        self.job_queue = JobQueue()
 
     async def upload_document(
         self, 
@@ -19,18 +24,25 @@ class UploadService:
         file_type: str, 
         file_size: int, 
         category: str, 
-        notes: Optional[str] = None
+        notes: Optional[str] = None,
+        priority: int = 0
     ) -> Dict[str, Any]:
         """
         Orchestrates uploading a document file to Firebase Storage,
         saves metadata in MongoDB, and logs a Timeline event.
+        Text extraction and summarization are queued as a background job;
+        the returned doc carries its `job_id` for progress polling.
         """
         # Define Firebase Storage target path
         timestamp_str = datetime.utcnow().strftime("%Y%m%d%H%M%S")
-        destination_path = f"users/{user_id}/documents/{timestamp_str}_{file_name}"
+        # file_name comes from the client, so only its sanitized basename goes in the path
+        destination_path = f"users/{safe_path_segment(user_id, 'user')}/documents/{timestamp_str}_{safe_path_segment(file_name)}"
         
         # Upload to Firebase Storage
-        storage_path = self.storage_provider.upload_file(file_bytes, destination_path, file_type)
+        try:
+            storage_path = await asyncio.to_thread(self.storage_provider.upload_file, file_bytes, destination_path, file_type)
+        except ValueError as e:
+            raise BadRequestException(str(e))
         
         # Save metadata to MongoDB
         doc_metadata = DocumentFileDoc(
@@ -40,7 +52,8 @@ class UploadService:
             file_type=file_type,
             file_size=file_size,
             category=category,
-            notes=notes
+            notes=notes,
+            processing_status="queued" if is_processable(file_type) else None
         )
         
         db_doc = await self.repo.create(doc_metadata.model_dump())
@@ -54,6 +67,17 @@ class UploadService:
             metadata={"document_id": str(db_doc["_id"]), "category": category}
         )
         
+        # Queue OCR + AI summary off the request path
+        if is_processable(file_type):
+            job = await self.job_queue.enqueue(
+                REPORT_PROCESSING_JOB,
+                {"document_id": str(db_doc["_id"])},
+                user_id=user_id,
+                priority=priority
+            )
+            db_doc["job_id"] = str(job["_id"])
+            await self.repo.update(str(db_doc["_id"]), {"job_id": db_doc["job_id"]})
+
         return db_doc
         
     async def get_download_url(self, document_id: str) -> str:
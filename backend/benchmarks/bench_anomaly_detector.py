@@ -0,0 +1,74 @@
+"""
+Benchmark the streaming vitals anomaly detector.
+
+Usage:
+python benchmarks/bench_anomaly_detector.py [readings]
+
+This script will:
+1. Feed 200k (default) heart rate readings spread over 10k users through
+   AnomalyDetector.observe, as manual entries reach it one at a time
+2. Feed the same number of readings for a single user through
+   observe_batch, as one bulk wearable sync does
+3. Replay a million readings of history with the vectorized replay
+4. Check the batch and one-at-a-time paths flag the same readings
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+sys.path.append('.')
+
+import models
+from vitals_anomaly import AnomalyDetector
+
+USERS = 10_000
+HISTORY = 1_000_000
+BUDGET_US = 50
+
+
+def make_readings(count: int, seed: int = 1):
+    rng = np.random.default_rng(seed)
+    timestamps = np.arange(count, dtype=np.int64) * 60_000 + 1_700_000_000_000
+    values = rng.normal(70, 4, count)
+    spikes = rng.choice(count, count // 5000, replace=False)
+    values[spikes] += rng.choice([-45.0, 60.0], len(spikes))
+    return timestamps, values
+
+
+def main():
+    readings = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    heart_rate = models.HealthRecordType.heart_rate
+    timestamps, values = make_readings(readings)
+    users = np.random.default_rng(2).integers(0, USERS, readings)
+
+    detector = AnomalyDetector()
+    began = time.perf_counter()
+    for user_id, timestamp, value in zip(users.tolist(), timestamps.tolist(), values.tolist()):
+        detector.observe(user_id, heart_rate, timestamp, value)
+    per_reading = (time.perf_counter() - began) / readings * 1e6
+    print(f"observe:       {per_reading:>8.2f} us/reading over {USERS} users (budget {BUDGET_US} us)")
+
+    single = AnomalyDetector()
+    began = time.perf_counter()
+    batch_anomalies = single.observe_batch(1, heart_rate, timestamps, values)
+    per_reading = (time.perf_counter() - began) / readings * 1e6
+    print(f"observe_batch: {per_reading:>8.2f} us/reading, {len(batch_anomalies)} anomalies")
+
+    history_ts, history_values = make_readings(HISTORY, seed=3)
+    began = time.perf_counter()
+    reasons, *_ = AnomalyDetector().replay(heart_rate, history_values)
+    elapsed = time.perf_counter() - began
+    print(f"replay:        {HISTORY / elapsed:>8.0f} readings/s, {np.count_nonzero(reasons)} flagged")
+
+    streaming = AnomalyDetector()
+    stream_anomalies = [a for a in (streaming.observe(1, heart_rate, t, v) for t, v in zip(timestamps.tolist(), values.tolist())) if a]
+    same = [(a["timestamp"], a["reason"]) for a in stream_anomalies] == [(a["timestamp"], a["reason"]) for a in batch_anomalies]
+    print(f"batch and streaming paths agree: {same}")
+
+
+if __name__ == "__main__":
+    main()
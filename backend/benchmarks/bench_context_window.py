@@ -0,0 +1,68 @@
+"""
+Benchmark prompt size and LLM latency for long conversations.
+
+Usage:
+python benchmarks/bench_context_window.py
+
+For conversations of 10, 100, 1000 and 5000 turns this compares:
+1. Naively resending every message in the prompt
+2. ContextWindowManager: rolling summary + last N turns within the token budget
+
+Latency comes from the stub provider with a cost per 1k prompt tokens, so
+the numbers show how prompt growth turns into response time.
+"""
+import asyncio
+import sys
+import time
+
+sys.path.append('.')
+
+from app.integrations.llm_provider import StubLLMProvider
+from app.services.context_window import ContextWindowManager, estimate_tokens, render_message
+
+TURNS = [10, 100, 1000, 5000]
+CONTEXT = "Patient Profile: Blood Group O+, Allergies: Penicillin.\n"
+QUESTION = "Is my blood pressure reading of 135/85 something to worry about?"
+SUMMARY = "Patient reported intermittent headaches and elevated home BP readings (130-140/85-90). " * 4
+
+
+def make_conversation(turns: int):
+    messages = []
+    for i in range(turns):
+        messages.append({"sender": "user", "content": f"Turn {i}: I measured my blood pressure again today and noticed some changes after exercise."})
+        messages.append({"sender": "ai", "content": f"Turn {i}: Thanks for sharing. Readings after exercise are often higher; rest five minutes before measuring and keep a log for your doctor."})
+    return messages
+
+
+def naive_prompt(messages):
+    history = "\n".join(render_message(m) for m in messages)
+    return f"Patient context:\n{CONTEXT}\nConversation so far:\n{history}\n\nUser question: {QUESTION}"
+
+
+async def timed(provider, prompt: str) -> float:
+    began = time.perf_counter()
+    await provider.complete(prompt)
+    return (time.perf_counter() - began) * 1000
+
+
+async def main():
+    provider = StubLLMProvider(latency_ms=300, ms_per_1k_prompt_tokens=40)
+    provider.call_timeout = 3600
+    manager = ContextWindowManager()
+
+    print(f"{'turns':>6} {'naive tokens':>13} {'naive ms':>9} {'managed tokens':>15} {'managed ms':>11} {'build ms':>9}")
+    for turns in TURNS:
+        messages = make_conversation(turns)
+        naive = naive_prompt(messages)
+
+        began = time.perf_counter()
+        managed = manager.build_prompt(CONTEXT, SUMMARY if turns > manager.recent_turns else "", messages[-manager.recent_messages:], QUESTION)
+        build_ms = (time.perf_counter() - began) * 1000
+
+        naive_ms = await timed(provider, naive)
+        managed_ms = await timed(provider, managed)
+        print(f"{turns:>6} {estimate_tokens(naive):>13} {naive_ms:>9.0f} {estimate_tokens(managed):>15} {managed_ms:>11.0f} {build_ms:>9.3f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
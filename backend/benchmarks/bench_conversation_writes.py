@@ -0,0 +1,87 @@
+"""
+Benchmark the per-turn write cost of AI conversation storage.
+
+Usage:
+python benchmarks/bench_conversation_writes.py
+
+Requires a reachable MongoDB at MONGODB_URL. Uses a scratch database
+(`healthhub_bench`) which is dropped afterwards.
+
+For conversations of 10, 1k and 10k messages this compares:
+1. The previous approach: read the conversation, append in Python, $set the whole array
+2. ConversationRepository.append_messages: $inc the header and $push into a bucket
+"""
+import asyncio
+import os
+import sys
+import time
+
+import bson
+from motor.motor_asyncio import AsyncIOMotorClient
+
+sys.path.append('.')
+
+import app.repositories.conversation_repo as conversation_repo
+from app.models.conversation import ChatMessage
+
+SIZES = [10, 1_000, 10_000]
+TURNS = 20
+
+
+def make_messages(count: int):
+    return [ChatMessage(sender="user" if i % 2 == 0 else "ai", content=f"message {i} " * 8) for i in range(count)]
+
+
+async def bench_set_array(db, size: int):
+    messages = [m.model_dump() for m in make_messages(size)]
+    conv_id = (await db.legacy_conversations.insert_one({"user_id": "bench", "messages": messages})).inserted_id
+
+    written = 0
+    began = time.perf_counter()
+    for _ in range(TURNS):
+        conv = await db.legacy_conversations.find_one({"_id": conv_id})
+        history = conv["messages"]
+        history.extend(m.model_dump() for m in make_messages(2))
+        update = {"$set": {"messages": history}}
+        written += len(bson.encode(update))
+        await db.legacy_conversations.update_one({"_id": conv_id}, update)
+    return (time.perf_counter() - began) / TURNS * 1000, written // TURNS
+
+
+async def bench_buckets(repo, size: int):
+    conv = await repo.get_or_create(f"bench-{size}")
+    seed = make_messages(size)
+    for i in range(0, size, 500):
+        await repo.append_messages(conv["_id"], "bench", seed[i:i + 500])
+
+    turn = make_messages(2)
+    written = len(bson.encode({"$push": {"messages": {"$each": [m.model_dump() for m in turn]}}}))
+    began = time.perf_counter()
+    for _ in range(TURNS):
+        await repo.append_messages(conv["_id"], "bench", turn)
+    return (time.perf_counter() - began) / TURNS * 1000, written
+
+
+async def main():
+    client = AsyncIOMotorClient(os.getenv("MONGODB_URL", "mongodb://localhost:27017"))
+    db = client["healthhub_bench"]
+
+    async def bench_db():
+        return db
+    conversation_repo.get_db = bench_db
+    repo = conversation_repo.ConversationRepository()
+    await repo.ensure_indexes()
+
+    print(f"{'messages':>9} {'$set ms':>9} {'$set bytes':>11} {'bucket ms':>10} {'bucket bytes':>13}")
+    try:
+        for size in SIZES:
+            set_ms, set_bytes = await bench_set_array(db, size)
+            bucket_ms, bucket_bytes = await bench_buckets(repo, size)
+            print(f"{size:>9} {set_ms:>9.2f} {set_bytes:>11} {bucket_ms:>10.2f} {bucket_bytes:>13}")
+    finally:
+        await client.drop_database("healthhub_bench")
+        client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,123 @@
+"""
+Benchmark dashboard summary reads: materialized snapshot vs on-demand aggregation.
+
+Usage:
+python benchmarks/bench_dashboard_snapshot.py [health_records]
+
+Requires a reachable MongoDB at MONGODB_URL. Uses a scratch database
+(`healthhub_bench`) which is dropped afterwards.
+
+This script will:
+1. Create an in-memory SQLite database with the HealthHub schema and insert
+   1M health records (default) spread over USERS patients, plus documents
+   and upcoming appointments
+2. Time building the summary from the SQL tables on every load (on demand)
+3. Time reading the stored snapshot with a single _id lookup
+"""
+import asyncio
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+sys.path.append('.')
+
+import models
+import app.repositories.dashboard_snapshot_repo as dashboard_snapshot_repo
+from routers.dashboard import build_snapshot, render_summary, snapshot_repo
+
+USERS = 1_000
+LOADS = 200
+UNITS = {
+    models.HealthRecordType.blood_pressure: models.HealthRecordUnit.mmHg,
+    models.HealthRecordType.heart_rate: models.HealthRecordUnit.bpm,
+    models.HealthRecordType.weight: models.HealthRecordUnit.kg,
+    models.HealthRecordType.blood_glucose: models.HealthRecordUnit.mg_dL,
+}
+
+
+def seed(db, rows: int):
+    now = datetime.utcnow()
+    db.execute(insert(models.User), [{
+        "id": i, "email": f"user{i}@example.com", "name": f"User {i}",
+        "hashed_password": "x", "role": models.UserRole.doctor if i == 0 else models.UserRole.patient,
+        "profile_completed": True, "created_at": now
+    } for i in range(USERS + 1)])
+
+    types = list(UNITS)
+    batch = 100_000
+    for offset in range(0, rows, batch):
+        db.execute(insert(models.HealthRecord), [{
+            "user_id": 1 + i % USERS,
+            "record_type": types[i % len(types)],
+            "value": 60 + i % 40,
+            "unit": UNITS[types[i % len(types)]],
+            "recorded_at": now - timedelta(minutes=i // USERS)
+        } for i in range(offset, min(offset + batch, rows))])
+
+    db.execute(insert(models.DocumentFile), [{
+        "user_id": 1 + i % USERS, "file_name": f"report-{i}.pdf", "file_type": "application/pdf",
+        "file_size": 1024, "category": models.DocumentType.lab_result, "uploaded_at": now - timedelta(days=i // USERS)
+    } for i in range(USERS * 10)])
+    db.execute(insert(models.Appointment), [{
+        "patient_id": 1 + i % USERS, "doctor_id": 0, "appointment_time": now + timedelta(days=1 + i // USERS),
+        "status": models.AppointmentStatus.scheduled, "appointment_type": models.AppointmentType.consultation
+    } for i in range(USERS * 4)])
+    db.commit()
+
+
+def percentile(samples, q):
+    samples = sorted(samples)
+    return samples[int(len(samples) * q)]
+
+
+async def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    engine = create_engine("sqlite://")
+    models.Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    began = time.perf_counter()
+    seed(db, rows)
+    print(f"seeded {rows} health records for {USERS} users in {time.perf_counter() - began:.1f}s")
+
+    client = AsyncIOMotorClient(os.getenv("MONGODB_URL", "mongodb://localhost:27017"))
+    mongo = client["healthhub_bench"]
+
+    async def bench_db():
+        return mongo
+    dashboard_snapshot_repo.get_db = bench_db
+
+    users = [random.randint(1, USERS) for _ in range(LOADS)]
+    try:
+        on_demand = []
+        for user_id in users:
+            began = time.perf_counter()
+            render_summary(build_snapshot(db, user_id), [], [])
+            on_demand.append((time.perf_counter() - began) * 1000)
+
+        for user_id in set(users):
+            await snapshot_repo.replace(str(user_id), build_snapshot(db, user_id))
+
+        snapshot = []
+        for user_id in users:
+            began = time.perf_counter()
+            render_summary(await snapshot_repo.get(str(user_id)), [], [])
+            snapshot.append((time.perf_counter() - began) * 1000)
+
+        print(f"{'mode':>10} {'avg ms':>8} {'p95 ms':>8} {'queries':>8}")
+        print(f"{'on demand':>10} {sum(on_demand) / LOADS:>8.2f} {percentile(on_demand, 0.95):>8.2f} {len(models.HealthRecordType) + 5:>8}")
+        print(f"{'snapshot':>10} {sum(snapshot) / LOADS:>8.2f} {percentile(snapshot, 0.95):>8.2f} {1:>8}")
+    finally:
+        await client.drop_database("healthhub_bench")
+        client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
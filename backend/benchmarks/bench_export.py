@@ -0,0 +1,123 @@
+"""
+Benchmark the streaming record export: throughput and peak memory.
+
+Usage:
+python benchmarks/bench_export.py [health_records]
+
+Requires a reachable MongoDB at MONGODB_URL for the predictions and timeline
+sections. Uses a scratch database (`healthhub_bench`) which is dropped afterwards.
+
+This script will:
+1. Create an in-memory SQLite database and give one patient 1M health
+   records (default) plus a year of per-minute heart rate in the vitals store
+2. Stream the export as NDJSON, CSV and gzip-compressed NDJSON, after
+   seeding a tenth of the records and again after seeding all of them
+3. Report rows/s, output size and peak Python memory (tracemalloc, in a
+   second pass) per run; peak memory should not grow with the number of rows
+"""
+import asyncio
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import numpy as np
+from motor.motor_asyncio import AsyncIOMotorClient
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+sys.path.append('.')
+
+import models
+import routers.export as export
+from vitals_store import VitalsStore, to_ms, DAY_MS
+
+
+def seed_records(db, start: int, stop: int):
+    now = datetime.utcnow()
+    types = list(models.HealthRecordType)
+    batch = 100_000
+    for offset in range(start, stop, batch):
+        db.execute(insert(models.HealthRecord), [{
+            "user_id": 1,
+            "record_type": types[i % len(types)],
+            "value": 60 + i % 40,
+            "unit": models.HealthRecordUnit.bpm,
+            "recorded_at": now - timedelta(minutes=i),
+            "notes": None
+        } for i in range(offset, min(offset + batch, stop))])
+    db.commit()
+
+
+def seed_vitals(db, days: int):
+    end = to_ms(datetime.utcnow()) // 60_000 * 60_000
+    timestamps = np.arange(end - days * DAY_MS, end, 60_000, dtype=np.int64)
+    values = np.round(70 + np.random.default_rng(1).normal(0, 4, len(timestamps)))
+    store = VitalsStore()
+    for day in range(days):
+        window = slice(day * 1440, (day + 1) * 1440)
+        store.append(db, 1, models.HealthRecordType.heart_rate, timestamps[window], values[window])
+    return len(timestamps)
+
+
+async def consume(writer, compress: bool) -> int:
+    size = 0
+    async for data in export.stream_export(1, writer, compress):
+        size += len(data)
+    return size
+
+
+async def run_export(label: str, writer, compress: bool, rows: int):
+    began = time.perf_counter()
+    size = await consume(writer, compress)
+    elapsed = time.perf_counter() - began
+
+    # Separate pass: tracing slows the export down several times
+    tracemalloc.start()
+    await consume(writer, compress)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:>14} {rows:>9} {rows / elapsed:>10.0f} {size / 1e6:>9.1f} {peak / 1e6:>9.1f}")
+
+
+async def main():
+    records = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    models.Base.metadata.create_all(bind=engine)
+    export.SessionLocal = sessionmaker(bind=engine)
+    db = export.SessionLocal()
+    db.execute(insert(models.User), [{"id": 1, "email": "bench@example.com", "name": "Bench", "hashed_password": "x", "role": models.UserRole.patient}])
+
+    client = AsyncIOMotorClient(os.getenv("MONGODB_URL", "mongodb://localhost:27017"))
+    mongo = client["healthhub_bench"]
+
+    async def bench_db():
+        return mongo
+    export.get_mongo_db = bench_db
+
+    try:
+        await mongo.timeline.insert_many([
+            {"user_id": "1", "event_type": "record_added", "title": "Record added", "description": "", "metadata": {"i": i}, "timestamp": datetime.utcnow()}
+            for i in range(10_000)
+        ])
+        vitals = seed_vitals(db, 365)
+        print(f"{'export':>14} {'rows':>9} {'rows/s':>10} {'MB out':>9} {'peak MB':>9}")
+        seeded = 0
+        for target in (records // 10, records):
+            seed_records(db, seeded, target)
+            seeded = target
+            rows = target + vitals + 10_000
+            await run_export("ndjson", export.NDJSONWriter(), False, rows)
+            await run_export("csv", export.CSVWriter(), False, rows)
+            await run_export("ndjson gzip", export.NDJSONWriter(), True, rows)
+    finally:
+        await client.drop_database("healthhub_bench")
+        client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
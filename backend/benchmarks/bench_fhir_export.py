@@ -0,0 +1,101 @@
+"""
+Benchmark the FHIR bulk export job.
+
+Usage:
+python benchmarks/bench_fhir_export.py [observations] [patients]
+
+This script will:
+1. Create a SQLite database in a temporary directory (pool processes need a
+   file they can all open) with 10k patients (default) sharing 1M
+   Observation rows (default), plus an appointment, a document and a risk
+   assessment each
+2. Run the export job with one process, then with one process per CPU
+3. Report resources/s for each run and the projected time for 10M
+   observations at that rate
+"""
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+# Spawned pool processes import this module again; they inherit the
+# parent's environment, so only the parent creates the directory
+if "FHIR_BENCH_DIR" not in os.environ:
+    os.environ["FHIR_BENCH_DIR"] = tempfile.mkdtemp(prefix="healthhub_fhir_bench_")
+workdir = os.environ["FHIR_BENCH_DIR"]
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+os.environ["FHIR_EXPORT_DIR"] = os.path.join(workdir, "exports")
+
+from sqlalchemy import insert
+
+sys.path.append('.')
+
+import models
+from app.core.config import settings
+from database import engine, SessionLocal
+import fhir_export
+
+TARGET = 10_000_000
+
+
+def seed(observations: int, patients: int):
+    models.Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    now = datetime.utcnow()
+    db.execute(insert(models.User), [{"id": 1, "email": "doctor@example.com", "name": "Doctor", "hashed_password": "x", "role": models.UserRole.doctor}] + [
+        {"id": i, "email": f"patient{i}@example.com", "name": f"Patient {i}", "hashed_password": "x", "role": models.UserRole.patient}
+        for i in range(2, patients + 2)
+    ])
+    types = list(models.HealthRecordType)
+    batch = 100_000
+    for offset in range(0, observations, batch):
+        db.execute(insert(models.HealthRecord), [{
+            "user_id": 2 + i % patients,
+            "record_type": types[i % len(types)],
+            "value": 60 + i % 40,
+            "unit": models.HealthRecordUnit.bpm,
+            "recorded_at": now - timedelta(minutes=i),
+            "notes": None
+        } for i in range(offset, min(offset + batch, observations))])
+    patient_ids = range(2, patients + 2)
+    db.execute(insert(models.Appointment), [{"patient_id": i, "doctor_id": 1, "appointment_time": now, "status": models.AppointmentStatus.scheduled, "appointment_type": models.AppointmentType.consultation} for i in patient_ids])
+    db.execute(insert(models.DocumentFile), [{"user_id": i, "file_name": "labs.pdf", "file_type": "application/pdf", "file_size": 1024, "category": models.DocumentType.lab_result, "uploaded_at": now} for i in patient_ids])
+    db.execute(insert(models.DiseaseRisk), [{"user_id": i, "disease_name": "Diabetes", "risk_score": 35.0, "factors": [{"factor": "BMI", "status": "High"}], "assessed_at": now} for i in patient_ids])
+    db.commit()
+    db.close()
+    return observations + 3 * patients
+
+
+async def run(label: str, processes: int, resources: int, observations: int):
+    settings.FHIR_EXPORT_PROCESSES = processes
+
+    async def progress(percent: int, message: str):
+        pass
+
+    began = time.perf_counter()
+    result = await fhir_export.run_export_job({"_id": label, "payload": {"types": list(fhir_export.RESOURCE_TYPES)}}, progress)
+    elapsed = time.perf_counter() - began
+    exported = sum(item["count"] for item in result["output"])
+    assert exported == resources, (exported, resources)
+    projected = elapsed * TARGET / observations / 60
+    print(f"{label:>12} {processes:>9} {exported / elapsed:>12.0f} {len(result['output']):>7} {projected:>14.1f}")
+
+
+async def main():
+    observations = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    patients = int(sys.argv[2]) if len(sys.argv) > 2 else 10_000
+    try:
+        resources = seed(observations, patients)
+        print(f"{'run':>12} {'processes':>9} {'resources/s':>12} {'files':>7} {'10M obs (min)':>14}")
+        await run("single", 1, resources, observations)
+        await run("per-cpu", os.cpu_count() or 1, resources, observations)
+    finally:
+        engine.dispose()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
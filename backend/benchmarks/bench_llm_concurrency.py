@@ -0,0 +1,63 @@
+"""
+Load-test the LLM concurrency limits offline with the stub provider.
+
+Usage:
+python benchmarks/bench_llm_concurrency.py [requests] [latency_ms]
+
+Honours LLM_MAX_CONCURRENCY, LLM_QUEUE_TIMEOUT_SECONDS and LLM_TIMEOUT_SECONDS
+from the environment. Fires all requests at once and reports throughput,
+latency percentiles, peak in-flight calls and how many were rejected.
+"""
+import asyncio
+import sys
+import time
+
+sys.path.append('.')
+
+from app.integrations.llm_provider import StubLLMProvider, LLMBusyError
+
+
+async def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    latency_ms = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    provider = StubLLMProvider(latency_ms=latency_ms, jitter_ms=latency_ms // 4)
+
+    latencies = []
+    outcomes = {"ok": 0, "busy": 0, "timeout": 0}
+    peak = 0
+
+    async def one_call(i: int):
+        began = time.perf_counter()
+        try:
+            await provider.complete(f"question {i}")
+            outcomes["ok"] += 1
+            latencies.append(time.perf_counter() - began)
+        except LLMBusyError:
+            outcomes["busy"] += 1
+        except asyncio.TimeoutError:
+            outcomes["timeout"] += 1
+
+    async def watch():
+        nonlocal peak
+        while True:
+            peak = max(peak, provider.in_flight)
+            await asyncio.sleep(0.005)
+
+    watcher = asyncio.create_task(watch())
+    began = time.perf_counter()
+    await asyncio.gather(*(one_call(i) for i in range(total)))
+    elapsed = time.perf_counter() - began
+    watcher.cancel()
+
+    latencies.sort()
+    def pct(p):
+        return latencies[min(int(p * len(latencies)), len(latencies) - 1)] * 1000 if latencies else 0.0
+
+    print(f"requests={total} stub_latency={latency_ms}ms max_concurrency={provider.max_concurrency}")
+    print(f"elapsed={elapsed:.2f}s throughput={outcomes['ok'] / elapsed:.1f} req/s peak_in_flight={peak}")
+    print(f"ok={outcomes['ok']} busy={outcomes['busy']} timeout={outcomes['timeout']}")
+    print(f"p50={pct(0.50):.0f}ms p95={pct(0.95):.0f}ms p99={pct(0.99):.0f}ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
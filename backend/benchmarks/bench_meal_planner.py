@@ -0,0 +1,72 @@
+"""
+Benchmark meal plan generation over a large recipe catalog.
+
+Usage:
+python benchmarks/bench_meal_planner.py [recipes]
+
+This script will:
+1. Synthesize a catalog of 50k recipes (default), reusing the recipe
+   search benchmark's generator, and build its RecipeIndex
+2. Generate week plans for a few DietPlan targets, with and without a diet
+   type and exclusions, as POST /diet/plans/{id}/generate does
+3. Report the time per plan against the one-second budget, and the average
+   daily deviation from each target next to that of random picks
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+sys.path.append('.')
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from bench_recipe_search import synthetic_catalog
+from meal_planner import MAX_PASSES, plan_meals
+from recipe_search import RecipeIndex
+
+BUDGET_MS = 1000
+DAYS = 7
+
+PLANS = {
+    "balanced 2000": ((2000, 100, 250, 67), {}),
+    "cut 1600": ((1600, 140, 140, 55), {"exclude_ingredients": ["peanut butter"]}),
+    "vegan 2400": ((2400, 90, 330, 80), {"diet_type": "vegan"}),
+}
+
+
+def deviation(totals, targets):
+    """Mean absolute daily deviation from each target, in percent"""
+    return np.abs(totals - targets).mean(axis=0) / targets * 100
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    index = RecipeIndex(synthetic_catalog(count))
+    print(f"{count} recipes, {DAYS} days, up to {MAX_PASSES} passes")
+    print(f"{'plan':>14} {'ms':>7}   deviation % (calories protein carbs fat)   random picks %")
+
+    for label, (targets, filters) in PLANS.items():
+        plan_meals(index, targets, days=DAYS, seed=0, **filters)  # warm up
+        runs = 5
+        began = time.perf_counter()
+        for seed in range(runs):
+            result = plan_meals(index, targets, days=DAYS, seed=seed, **filters)
+        elapsed_ms = (time.perf_counter() - began) / runs * 1000
+
+        assert len({id(meal.recipe) for meal in result.meals}) == len(result.meals), "recipe repeated"
+        rng = np.random.default_rng(0)
+        random_totals = np.array([
+            [sum(recipe[field] for recipe in rng.choice(index.recipes, 4)) for field in ("calories", "protein", "carbs", "fat")]
+            for _ in range(DAYS)
+        ], dtype=np.float64)
+        fitted = " ".join(f"{value:5.1f}" for value in deviation(result.totals, result.targets))
+        baseline = " ".join(f"{value:5.1f}" for value in deviation(random_totals, result.targets))
+        print(f"{label:>14} {elapsed_ms:>7.1f}   {fitted:<42} {baseline}")
+    print(f"budget {BUDGET_MS} ms per plan")
+
+
+if __name__ == "__main__":
+    main()
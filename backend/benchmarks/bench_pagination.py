@@ -0,0 +1,87 @@
+"""
+Benchmark offset vs keyset (cursor) pagination for health records.
+
+Usage:
+python benchmarks/bench_pagination.py [rows]
+
+This script will:
+1. Create an in-memory SQLite database with the HealthHub schema
+2. Insert health records for a single user
+3. Time fetching page N (N = 1, 100, 1000) with OFFSET and with a cursor
+"""
+import sys
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+sys.path.append('.')
+
+import models
+from app.core.pagination import paginate_query, encode_cursor
+
+PAGE_SIZE = 50
+PAGES = [1, 100, 1000]
+
+
+def seed(db, rows: int):
+    start = datetime.utcnow()
+    db.bulk_insert_mappings(models.User, [{
+        "id": 1, "email": "bench@example.com", "name": "Bench",
+        "hashed_password": "x", "role": models.UserRole.patient,
+        "profile_completed": True, "created_at": start
+    }])
+    db.bulk_insert_mappings(models.HealthRecord, [{
+        "user_id": 1,
+        "record_type": models.HealthRecordType.heart_rate,
+        "value": 60 + i % 40,
+        "unit": models.HealthRecordUnit.bpm,
+        "recorded_at": start - timedelta(seconds=i)
+    } for i in range(rows)])
+    db.commit()
+
+
+def base_query(db):
+    return db.query(models.HealthRecord).filter(models.HealthRecord.user_id == 1)
+
+
+def time_offset(db, page: int) -> float:
+    began = time.perf_counter()
+    base_query(db).order_by(
+        models.HealthRecord.recorded_at.desc(), models.HealthRecord.id.desc()
+    ).offset((page - 1) * PAGE_SIZE).limit(PAGE_SIZE).all()
+    return time.perf_counter() - began
+
+
+def time_keyset(db, page: int) -> float:
+    # Position the cursor on the last row of page N - 1, as a client would hold it
+    cursor = None
+    if page > 1:
+        anchor = base_query(db).order_by(
+            models.HealthRecord.recorded_at.desc(), models.HealthRecord.id.desc()
+        ).offset((page - 1) * PAGE_SIZE - 1).first()
+        cursor = encode_cursor(anchor.recorded_at, anchor.id)
+
+    began = time.perf_counter()
+    paginate_query(base_query(db), models.HealthRecord.recorded_at, models.HealthRecord.id, cursor=cursor, limit=PAGE_SIZE)
+    return time.perf_counter() - began
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else max(PAGES) * PAGE_SIZE + PAGE_SIZE
+    engine = create_engine("sqlite://")
+    models.Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    seed(db, rows)
+
+    print(f"{rows} rows, page size {PAGE_SIZE}")
+    print(f"{'page':>6} {'offset ms':>10} {'cursor ms':>10}")
+    for page in PAGES:
+        offset_ms = min(time_offset(db, page) for _ in range(5)) * 1000
+        keyset_ms = min(time_keyset(db, page) for _ in range(5)) * 1000
+        print(f"{page:>6} {offset_ms:>10.2f} {keyset_ms:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Benchmark server-side pose session analysis.
+
+Usage:
+python benchmarks/bench_pose_analysis.py [minutes]
+
+This script will:
+1. Synthesize a 10-minute (default) 30 fps session of squats and one of
+   push-ups as MoveNet keypoint frames: the joint angle swings between
+   170 and 85 degrees every 3 seconds, with jitter and 5% of frames losing
+   the tracked keypoints
+2. Time parse_frames + analyze_session on the raw float32 bytes, as the
+   /fitness/pose-sessions endpoint runs them
+3. Check the detected rep count matches the synthesized one
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+sys.path.append('.')
+
+from pose_analysis import EXERCISES, KEYPOINT_NAMES, KP, analyze_session, parse_frames
+
+FPS = 30
+REP_SECONDS = 3.0
+BUDGET_MS = 1000
+
+
+def synthetic_session(exercise_type: str, minutes: float, seed: int = 1):
+    rng = np.random.default_rng(seed)
+    count = int(minutes * 60 * FPS)
+    t = np.arange(count) / FPS
+    # 170 degrees at the top of each rep, 85 at the bottom
+    angle = np.radians(127.5 + 42.5 * np.cos(2 * np.pi * t / REP_SECONDS))
+
+    frames = np.zeros((count, len(KEYPOINT_NAMES), 3), dtype=np.float32)
+    frames[:, :, :2] = rng.uniform(100, 500, (count, len(KEYPOINT_NAMES), 2))
+    frames[:, :, 2] = 0.9
+    proximal, joint, distal = EXERCISES[exercise_type].joint
+    for side, x in (("left", 250.0), ("right", 390.0)):
+        name = lambda keypoint: KP[keypoint.replace("left_", f"{side}_")]
+        jitter = rng.normal(0, 2.0, (count, 2))
+        frames[:, name(joint), 0] = x + jitter[:, 0]
+        frames[:, name(joint), 1] = 300 + jitter[:, 1]
+        frames[:, name(distal), 0] = x
+        frames[:, name(distal), 1] = 420
+        frames[:, name(proximal), 0] = x + 120 * np.sin(angle)
+        frames[:, name(proximal), 1] = 300 + 120 * np.cos(angle)
+
+    dropped = rng.random(count) < 0.05
+    frames[dropped, :, 2] = 0.1
+    expected = int(np.floor(t[-1] / REP_SECONDS + 0.5))
+    return frames.astype("<f4").tobytes(), expected
+
+
+def main():
+    minutes = float(sys.argv[1]) if len(sys.argv) > 1 else 10
+    for exercise_type in ("Squats", "Push-ups"):
+        body, expected = synthetic_session(exercise_type, minutes)
+        analyze_session(parse_frames(body), exercise_type, FPS)  # warm up
+
+        runs = 5
+        began = time.perf_counter()
+        for _ in range(runs):
+            analysis = analyze_session(parse_frames(body), exercise_type, FPS)
+        elapsed_ms = (time.perf_counter() - began) / runs * 1000
+
+        print(
+            f"{exercise_type:>9}: {analysis.frames} frames ({len(body) / 1e6:.1f} MB) in {elapsed_ms:.1f} ms "
+            f"(budget {BUDGET_MS} ms), {analysis.rep_count} reps (expected {expected}), form {analysis.form_score}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Benchmark recipe search over a large catalog.
+
+Usage:
+python benchmarks/bench_recipe_search.py [recipes]
+
+This script will:
+1. Synthesize a catalog of 100k recipes (default) with random tags, meal
+   types, 4-10 ingredients out of 300 and macros
+2. Build the RecipeIndex, as the first /diet/recipes request does
+3. Time a set of queries, from unfiltered to several combined filters, and
+   check each against a plain scan over the recipe dicts
+"""
+import os
+import random
+import sys
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+sys.path.append('.')
+
+from recipe_search import RecipeIndex, ingredient_words
+
+BUDGET_MS = 10
+TAGS = ["balanced", "keto", "vegan", "vegetarian", "mediterranean", "high-protein", "gluten-free"]
+MEALS = ["breakfast", "lunch", "dinner", "snack"]
+
+QUERIES = {
+    "unfiltered": {},
+    "vegan dinner": {"diet_type": "vegan", "meal_type": "dinner"},
+    "calorie range": {"ranges": {"calories": (300, 500)}},
+    "combined": {
+        "diet_type": "high-protein", "meal_type": "lunch", "ingredients": ["chicken breast"],
+        "exclude_ingredients": ["peanut"], "ranges": {"calories": (300, 600), "protein": (25, None), "minutes": (None, 30)}
+    },
+    "rare ingredient + wide range": {"ingredients": ["saffron"], "ranges": {"calories": (100, 900)}, "sort": "time"},
+}
+
+
+def synthetic_catalog(count: int, seed: int = 1):
+    rng = random.Random(seed)
+    ingredients = [f"ingredient{i}" for i in range(295)] + ["chicken breast", "peanut butter", "saffron", "tofu", "quinoa"]
+    weights = [1.0] * 295 + [8.0, 4.0, 0.2, 4.0, 4.0]
+    return [
+        {
+            "id": i + 1,
+            "title": f"Recipe {i + 1}",
+            "time": f"{rng.randrange(5, 90, 5)} mins",
+            "calories": rng.randrange(100, 1000),
+            "protein": rng.randrange(2, 60),
+            "carbs": rng.randrange(2, 120),
+            "fat": rng.randrange(1, 60),
+            "ingredients": list(set(rng.choices(ingredients, weights, k=rng.randint(4, 10)))),
+            "steps": [],
+            "meal_types": rng.sample(MEALS, rng.randint(1, 2)),
+            "tags": rng.sample(TAGS, rng.randint(1, 3)),
+        }
+        for i in range(count)
+    ]
+
+
+def scan(recipes, diet_type=None, meal_type=None, ingredients=(), exclude_ingredients=(), ranges=None, sort="protein", limit=20):
+    minutes = lambda recipe: float(recipe["time"].split()[0])
+    values = {"calories": lambda r: r["calories"], "protein": lambda r: r["protein"], "minutes": minutes}
+    words = lambda recipe: {word for ingredient in recipe["ingredients"] for word in ingredient_words(ingredient)}
+    matches = [
+        recipe for recipe in recipes
+        if (not diet_type or diet_type in recipe["tags"])
+        and (not meal_type or meal_type in recipe["meal_types"])
+        and all(set(ingredient_words(ingredient)) <= words(recipe) for ingredient in ingredients)
+        and not any(set(ingredient_words(ingredient)) <= words(recipe) for ingredient in exclude_ingredients)
+        and all((low is None or values[field](recipe) >= low) and (high is None or values[field](recipe) <= high) for field, (low, high) in (ranges or {}).items())
+    ]
+    key = {"protein": lambda r: -r["protein"] / max(r["calories"], 1), "calories": lambda r: r["calories"], "time": minutes}[sort]
+    return sorted(matches, key=key)[:limit]
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    recipes = synthetic_catalog(count)
+
+    began = time.perf_counter()
+    index = RecipeIndex(recipes)
+    print(f"index over {count} recipes built in {time.perf_counter() - began:.2f} s")
+
+    print(f"{'query':>28} {'ms':>8} {'scan ms':>8} {'results':>7}")
+    for label, query in QUERIES.items():
+        runs = 50
+        began = time.perf_counter()
+        for _ in range(runs):
+            results = index.search(**query)
+        elapsed_ms = (time.perf_counter() - began) / runs * 1000
+
+        began = time.perf_counter()
+        expected = scan(recipes, **query)
+        scan_ms = (time.perf_counter() - began) * 1000
+        assert [recipe["id"] for recipe in results] == [recipe["id"] for recipe in expected], label
+        print(f"{label:>28} {elapsed_ms:>8.2f} {scan_ms:>8.0f} {len(results):>7}")
+    print(f"budget {BUDGET_MS} ms per query")
+
+
+if __name__ == "__main__":
+    main()
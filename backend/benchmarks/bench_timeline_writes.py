@@ -0,0 +1,75 @@
+"""
+Benchmark timeline event logging: one insert_one per event vs the
+write-behind TimelineWriter.
+
+Usage:
+python benchmarks/bench_timeline_writes.py
+
+Requires a reachable MongoDB at MONGODB_URL. Uses a scratch database
+(`healthhub_bench`) which is dropped afterwards.
+
+CALLERS concurrent "requests" each log EVENTS_PER_CALLER events. Reported:
+- caller ms: average / p95 time a request spends in log_event
+- events/sec: end to end, including the final flush for the buffered writer
+"""
+import asyncio
+import os
+import sys
+import time
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+sys.path.append('.')
+
+import app.services.timeline_writer as timeline_writer_module
+from app.services.timeline_writer import TimelineWriter, timeline_writer
+from app.services.timeline_service import TimelineService
+
+CALLERS = 50
+EVENTS_PER_CALLER = 100
+
+
+async def run(service: TimelineService, writer: TimelineWriter, buffered: bool):
+    latencies = []
+
+    async def caller(n: int):
+        for i in range(EVENTS_PER_CALLER):
+            began = time.perf_counter()
+            await service.log_event(f"bench-{n}", "prediction_completed", "Assessment Completed", f"Event {i}", {"i": i})
+            latencies.append((time.perf_counter() - began) * 1000)
+
+    if buffered:
+        writer.start()
+    began = time.perf_counter()
+    await asyncio.gather(*(caller(n) for n in range(CALLERS)))
+    await writer.stop()
+    elapsed = time.perf_counter() - began
+
+    latencies.sort()
+    total = CALLERS * EVENTS_PER_CALLER
+    return sum(latencies) / len(latencies), latencies[int(len(latencies) * 0.95)], total / elapsed
+
+
+async def main():
+    client = AsyncIOMotorClient(os.getenv("MONGODB_URL", "mongodb://localhost:27017"))
+    db = client["healthhub_bench"]
+
+    async def bench_db():
+        return db
+    timeline_writer_module.get_db = bench_db
+
+    service = TimelineService()
+    print(f"{'mode':>10} {'caller avg ms':>14} {'caller p95 ms':>14} {'events/sec':>11}")
+    try:
+        for mode, buffered in [("direct", False), ("buffered", True)]:
+            # Not started = direct insert_one per event
+            avg_ms, p95_ms, rate = await run(service, timeline_writer, buffered)
+            print(f"{mode:>10} {avg_ms:>14.3f} {p95_ms:>14.3f} {rate:>11.0f}")
+        print(f"stored: {await db.timeline.count_documents({})} events, writer: {timeline_writer.stats()}")
+    finally:
+        await client.drop_database("healthhub_bench")
+        client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
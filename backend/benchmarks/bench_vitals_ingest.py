@@ -0,0 +1,77 @@
+"""
+Benchmark bulk vitals ingestion (the POST /health-records/bulk path).
+
+Usage:
+python benchmarks/bench_vitals_ingest.py [readings]
+
+This script will:
+1. Create an in-memory SQLite database with the HealthHub schema
+2. Build a wearable sync of 100k (default) per-second heart rate readings,
+   as NDJSON and as compact JSON arrays
+3. Time parsing, validation and storage of each body in one transaction,
+   then re-send the NDJSON body to time a fully duplicate sync
+"""
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+sys.path.append('.')
+
+import models
+from routers.health_records import parse_bulk_readings
+from vitals_store import VitalsStore, to_ms
+
+
+def make_bodies(readings: int):
+    end = to_ms(datetime.utcnow())
+    timestamps = np.arange(end - readings * 1000, end, 1000, dtype=np.int64)
+    values = np.round(70 + np.random.default_rng(1).normal(0, 4, readings))
+    ndjson = "\n".join(
+        json.dumps({"record_type": "heart_rate", "timestamp": int(ts), "value": float(v), "unit": "bpm"})
+        for ts, v in zip(timestamps, values)
+    ).encode()
+    compact = json.dumps({"record_type": "heart_rate", "unit": "bpm", "timestamps": timestamps.tolist(), "values": values.tolist()}).encode()
+    return ndjson, compact
+
+
+def ingest(db, store, user_id: int, body: bytes, content_type: str):
+    began = time.perf_counter()
+    result = store.ingest(db, user_id, parse_bulk_readings(body, content_type))
+    return time.perf_counter() - began, result
+
+
+def main():
+    readings = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    engine = create_engine("sqlite://")
+    models.Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    db.execute(insert(models.User), [
+        {"id": i, "email": f"bench{i}@example.com", "name": "Bench", "hashed_password": "x", "role": models.UserRole.patient}
+        for i in (1, 2)
+    ])
+    db.commit()
+
+    store = VitalsStore()
+    ndjson, compact = make_bodies(readings)
+    print(f"{readings} readings: NDJSON {len(ndjson) / 1e6:.1f} MB, compact {len(compact) / 1e6:.1f} MB")
+
+    print(f"{'body':>16} {'ms':>8} {'readings/s':>11} {'inserted':>9} {'duplicates':>11}")
+    for label, user_id, body, content_type in [
+        ("ndjson", 1, ndjson, "application/x-ndjson"),
+        ("compact", 2, compact, "application/json"),
+        ("ndjson (resync)", 1, ndjson, "application/x-ndjson"),
+    ]:
+        seconds, result = ingest(db, store, user_id, body, content_type)
+        print(f"{label:>16} {seconds * 1000:>8.1f} {readings / seconds:>11.0f} {result['inserted']:>9} {result['duplicates']:>11}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Benchmark the vitals time-series store against one health_records row per reading.
+
+Usage:
+python benchmarks/bench_vitals_store.py [days]
+
+This script will:
+1. Create an in-memory SQLite database with the HealthHub schema
+2. Generate a year (default) of per-minute heart rate for one user
+3. Ingest it as one row per reading and into the chunked vitals store,
+   one day per call as a daily wearable sync would
+4. Time range queries for the last day, week, month and year, and the
+   rolled-up chart query for the same ranges (500 point budget)
+"""
+import sys
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+sys.path.append('.')
+
+import models
+from vitals_store import VitalsStore, to_ms, DAY_MS
+
+RANGES = [("day", 1), ("week", 7), ("month", 30), ("year", 365)]
+MAX_POINTS = 500
+
+
+def make_series(days: int):
+    end = datetime.utcnow().replace(second=0, microsecond=0)
+    start = end - timedelta(days=days)
+    timestamps = np.arange(to_ms(start), to_ms(end), 60_000, dtype=np.int64)
+    minutes = np.arange(len(timestamps))
+    values = np.round(68 + 8 * np.sin(minutes * 2 * np.pi / 1440) + np.random.default_rng(1).normal(0, 3, len(timestamps)))
+    return end, timestamps, values
+
+
+def ingest_rows(db, timestamps, values) -> float:
+    began = time.perf_counter()
+    batch = 50_000
+    for offset in range(0, len(timestamps), batch):
+        db.execute(insert(models.HealthRecord), [{
+            "user_id": 1,
+            "record_type": models.HealthRecordType.heart_rate,
+            "value": float(v),
+            "unit": models.HealthRecordUnit.bpm,
+            "recorded_at": datetime(1970, 1, 1) + timedelta(milliseconds=int(ts))
+        } for ts, v in zip(timestamps[offset:offset + batch], values[offset:offset + batch])])
+    db.commit()
+    return time.perf_counter() - began
+
+
+def ingest_store(db, store, timestamps, values) -> float:
+    began = time.perf_counter()
+    days = timestamps // DAY_MS
+    splits = np.flatnonzero(np.diff(days)) + 1
+    for ts, vals in zip(np.split(timestamps, splits), np.split(values, splits)):
+        store.append(db, 1, models.HealthRecordType.heart_rate, ts, vals)
+    return time.perf_counter() - began
+
+
+def query_rows(db, start, end):
+    return db.query(models.HealthRecord.recorded_at, models.HealthRecord.value).filter(
+        models.HealthRecord.user_id == 1,
+        models.HealthRecord.record_type == models.HealthRecordType.heart_rate,
+        models.HealthRecord.recorded_at >= start,
+        models.HealthRecord.recorded_at < end
+    ).all()
+
+
+def timed(fn, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        began = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - began)
+    return best * 1000
+
+
+def main():
+    days = int(sys.argv[1]) if len(sys.argv) > 1 else 365
+    engine = create_engine("sqlite://")
+    models.Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    db.execute(insert(models.User), [{"id": 1, "email": "bench@example.com", "name": "Bench", "hashed_password": "x", "role": models.UserRole.patient}])
+
+    end, timestamps, values = make_series(days)
+    store = VitalsStore()
+    print(f"{len(timestamps)} per-minute heart rate readings over {days} days")
+
+    rows_s = ingest_rows(db, timestamps, values)
+    store_s = ingest_store(db, store, timestamps, values)
+    chunk_bytes = sum(len(c.data) for c in db.query(models.VitalChunk.data))
+    print(f"ingest rows:  {len(timestamps) / rows_s:>10.0f} readings/s")
+    print(f"ingest store: {len(timestamps) / store_s:>10.0f} readings/s  ({chunk_bytes} bytes, {chunk_bytes * 8 / len(timestamps):.1f} bits/reading)")
+
+    print(f"{'range':>6} {'readings':>9} {'rows ms':>9} {'store ms':>9} {'buckets':>12} {'rollup ms':>10}")
+    for label, span in RANGES:
+        if span > days:
+            continue
+        start = end - timedelta(days=span)
+        count = len(store.query(db, 1, models.HealthRecordType.heart_rate, start, end)[0])
+        rows_ms = timed(lambda: query_rows(db, start, end))
+        store_ms = timed(lambda: store.query(db, 1, models.HealthRecordType.heart_rate, start, end))
+        resolution, (buckets, *_) = store.aggregate(db, 1, models.HealthRecordType.heart_rate, start, end, MAX_POINTS)
+        rollup_ms = timed(lambda: store.aggregate(db, 1, models.HealthRecordType.heart_rate, start, end, MAX_POINTS))
+        print(f"{label:>6} {count:>9} {rows_ms:>9.2f} {store_ms:>9.2f} {f'{len(buckets)} x {resolution}':>12} {rollup_ms:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
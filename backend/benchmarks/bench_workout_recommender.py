@@ -0,0 +1,76 @@
+"""
+Benchmark workout plan recommendations over a large catalog.
+
+Usage:
+python benchmarks/bench_workout_recommender.py [plans]
+
+This script will:
+1. Synthesize a catalog of 5000 plans (default) across every level and goal,
+   each with four to eight exercises drawn from the keyword lists
+2. Time building the WorkoutIndex, as a TTL refresh or invalidate does
+3. Time a recommendation for an uncached (level, goal) bucket, a cached one,
+   and a cached one adjusted for a user's exercise history
+"""
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+sys.path.append('.')
+
+from workout_recommender import GOALS, LEVELS, MODALITY_KEYWORDS, WorkoutIndex, modality_vector
+
+BUDGET_MS = 5
+
+
+def synthetic_catalog(count: int, seed: int = 1):
+    rng = random.Random(seed)
+    names = [keyword.title() for keywords in MODALITY_KEYWORDS.values() for keyword in keywords]
+    return [
+        {
+            "id": i,
+            "name": f"Plan {i}",
+            "description": "Synthetic plan",
+            "level": rng.choice(LEVELS),
+            "goal": rng.choice(GOALS),
+            "duration_minutes": rng.randrange(10, 60, 5),
+            "exercises": [{"name": name, "sets": 3, "reps": 10} for name in rng.sample(names, rng.randint(4, 8))],
+        }
+        for i in range(count)
+    ]
+
+
+def timed(fn, runs: int):
+    began = time.perf_counter()
+    for _ in range(runs):
+        result = fn()
+    return result, (time.perf_counter() - began) / runs * 1000
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    plans = synthetic_catalog(count)
+    history = modality_vector(["Squats", "Running", "Yoga"], [120.0, 60.0, 15.0])
+    no_history = np.zeros_like(history)
+
+    index, build_ms = timed(lambda: WorkoutIndex(plans), 3)
+    # A fresh index per run, so every run scores the bucket from scratch
+    fresh = [WorkoutIndex(plans) for _ in range(20)]
+    _, cold_ms = timed(lambda: fresh.pop().recommend("beginner", "strength", no_history, 3), 20)
+    index.recommend("beginner", "strength", no_history, 3)
+    _, warm_ms = timed(lambda: index.recommend("beginner", "strength", no_history, 3), 1000)
+    top, history_ms = timed(lambda: index.recommend("beginner", "strength", history, 3), 1000)
+
+    print(f"catalog of {count} plans, index built in {build_ms:.1f} ms")
+    print(f"{'uncached bucket':>24}: {cold_ms:.3f} ms (budget {BUDGET_MS} ms)")
+    print(f"{'cached bucket':>24}: {warm_ms:.3f} ms (budget {BUDGET_MS} ms)")
+    print(f"{'cached bucket + history':>24}: {history_ms:.3f} ms (budget {BUDGET_MS} ms)")
+    print("top plans:", ", ".join(f"{plan['name']} ({plan['level']}/{plan['goal']}, {score:.2f})" for plan, score in top))
+
+
+if __name__ == "__main__":
+    main()
@@ -2,13 +2,19 @@
 Script to create all database tables
 """
 from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
 from models import Base
 from database import SQLALCHEMY_DATABASE_URL
+from workout_recommender import seed_starter_plans
 import alembic.config
 
 def main():
     engine = create_engine(SQLALCHEMY_DATABASE_URL)
     Base.metadata.create_all(bind=engine)
+    with Session(engine) as db:
+        seeded = seed_starter_plans(db)
+    if seeded:
+        print(f"Seeded {seeded} starter workout plans.")
     
     print("Tables created. If this is an existing database, run alembic migrations instead.")
     print("To run migrations: alembic upgrade head")
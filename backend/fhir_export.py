@@ -0,0 +1,352 @@
+"""
+FHIR bulk data export (`$export`) of Observation, Appointment,
+DocumentReference and RiskAssessment resources for every patient.
+
+Patients are split into id ranges holding roughly the same number of
+resources, and a process pool serializes each range to its own NDJSON file
+per resource type, so JSON encoding runs on every core instead of one. Runs
+as a background job; progress is reported as ranges finish and the result
+is the bulk data manifest listing every file.
+
+Each export only includes rows that existed when it started (its
+transactionTime): table rows up to the id high-water mark taken at planning
+time and streamed vitals recorded before it.
+"""
+import asyncio
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterator, List, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import and_, exists, func, select
+from sqlalchemy.orm import Session
+
+import models
+from app.core.config import settings
+from database import SessionLocal
+from vitals_store import CANONICAL_UNITS, decode_chunk, to_ms, vitals_store
+
+FHIR_EXPORT_JOB = "fhir_export"
+RESOURCE_TYPES = ("Observation", "Appointment", "DocumentReference", "RiskAssessment")
+OUTPUT_FORMATS = {"application/fhir+ndjson", "application/ndjson", "ndjson"}
+
+# Rows fetched per round trip inside a worker; vital chunks hold a day each
+ROW_BATCH = 5000
+CHUNK_BATCH = 64
+
+LOINC = "http://loinc.org"
+UCUM = "http://unitsofmeasure.org"
+OBSERVATION_CATEGORY = "http://terminology.hl7.org/CodeSystem/observation-category"
+
+OBSERVATION_CODES = {
+    models.HealthRecordType.blood_pressure: ("85354-9", "Blood pressure panel", "vital-signs"),
+    models.HealthRecordType.heart_rate: ("8867-4", "Heart rate", "vital-signs"),
+    models.HealthRecordType.weight: ("29463-7", "Body weight", "vital-signs"),
+    models.HealthRecordType.blood_glucose: ("2339-0", "Glucose [Mass/volume] in Blood", "laboratory"),
+}
+
+UCUM_UNITS = {
+    models.HealthRecordUnit.mmHg: "mm[Hg]",
+    models.HealthRecordUnit.bpm: "/min",
+    models.HealthRecordUnit.kg: "kg",
+    models.HealthRecordUnit.lbs: "[lb_av]",
+    models.HealthRecordUnit.mg_dL: "mg/dL",
+    models.HealthRecordUnit.mmol_L: "mmol/L",
+}
+
+APPOINTMENT_STATUSES = {
+    models.AppointmentStatus.scheduled: "booked",
+    models.AppointmentStatus.completed: "fulfilled",
+    models.AppointmentStatus.cancelled: "cancelled",
+    models.AppointmentStatus.pending: "pending",
+}
+
+_dumps = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False, check_circular=False).encode
+
+def _instant(value: datetime) -> str:
+    # Timestamps are stored as naive UTC
+    return value.isoformat() + "Z"
+
+@lru_cache(maxsize=None)
+def _observation_template(record_type: models.HealthRecordType, unit: models.HealthRecordUnit) -> str:
+    """
+    Observation JSON with %-placeholders for id, patient, effective time,
+    value and an optional note. Observations are nearly all of an export, and
+    encoding only their variable parts is several times faster than json
+    encoding a full dict per reading.
+    """
+    code, display, category = OBSERVATION_CODES[record_type]
+    constant = lambda value: _dumps(value).replace("%", "%%")
+    return (
+        '{"resourceType":"Observation","id":"%s","status":"final","category":'
+        + constant([{"coding": [{"system": OBSERVATION_CATEGORY, "code": category}]}])
+        + ',"code":' + constant({"coding": [{"system": LOINC, "code": code, "display": display}], "text": display})
+        + ',"subject":{"reference":"Patient/%d"},"effectiveDateTime":"%s","valueQuantity":{"value":%r,'
+        + constant({"unit": unit.value, "system": UCUM, "code": UCUM_UNITS[unit]})[1:]
+        + '%s}\n'
+    )
+
+def observation(row) -> str:
+    record_id, user_id, record_type, value, unit, recorded_at, notes = row
+    note = ',"note":' + _dumps([{"text": notes}]) if notes else ""
+    return _observation_template(record_type, unit) % (f"record-{record_id}", user_id, _instant(recorded_at), value, note)
+
+def appointment(row) -> Dict[str, Any]:
+    appointment_id, patient_id, doctor_id, appointment_time, appointment_status, appointment_type, notes = row
+    resource = {
+        "resourceType": "Appointment",
+        "id": f"appointment-{appointment_id}",
+        "status": APPOINTMENT_STATUSES[appointment_status],
+        "appointmentType": {"text": appointment_type.value},
+        "start": _instant(appointment_time),
+        "participant": [
+            {"actor": {"reference": f"Patient/{patient_id}"}, "status": "accepted"},
+            {"actor": {"reference": f"Practitioner/{doctor_id}"}, "status": "accepted"},
+        ],
+    }
+    if notes:
+        resource["comment"] = notes
+    return resource
+
+def document_reference(row) -> Dict[str, Any]:
+    # Metadata only; file contents stay behind the download endpoint
+    document_id, user_id, file_name, file_type, file_size, category, uploaded_at, notes = row
+    resource = {
+        "resourceType": "DocumentReference",
+        "id": f"document-{document_id}",
+        "status": "current",
+        "type": {"text": category.value},
+        "subject": {"reference": f"Patient/{user_id}"},
+        "date": _instant(uploaded_at),
+        "content": [{"attachment": {"contentType": file_type, "size": file_size, "title": file_name}}],
+    }
+    if notes:
+        resource["description"] = notes
+    return resource
+
+def risk_assessment(row) -> Dict[str, Any]:
+    risk_id, user_id, disease_name, risk_score, factors, assessed_at = row
+    resource = {
+        "resourceType": "RiskAssessment",
+        "id": f"risk-{risk_id}",
+        "status": "final",
+        "subject": {"reference": f"Patient/{user_id}"},
+        "occurrenceDateTime": _instant(assessed_at),
+        "prediction": [{"outcome": {"text": disease_name}, "probabilityDecimal": round(risk_score / 100, 4)}],
+    }
+    if factors:
+        resource["note"] = [{"text": _dumps(factors)}]
+    return resource
+
+def risk_report(row) -> Dict[str, Any]:
+    report_id, patient_id, date, risk_level, details = row
+    return {
+        "resourceType": "RiskAssessment",
+        "id": f"report-{report_id}",
+        "status": "final",
+        "subject": {"reference": f"Patient/{patient_id}"},
+        "occurrenceDateTime": _instant(date),
+        "prediction": [{"qualitativeRisk": {"text": risk_level}}],
+        "note": [{"text": details}],
+    }
+
+def _patients(first_id: int, last_id: int):
+    return select(models.User.id).where(
+        models.User.role == models.UserRole.patient,
+        models.User.id.between(first_id, last_id)
+    )
+
+def _lines(to_resource: Callable[[Any], Dict[str, Any]]) -> Callable[[Any], str]:
+    return lambda row: _dumps(to_resource(row)) + "\n"
+
+def _rows(db: Session, statement, to_line: Callable[[Any], str], batch_size: int = ROW_BATCH) -> Iterator[List[str]]:
+    result = db.execute(statement.execution_options(yield_per=batch_size))
+    for rows in result.partitions():
+        yield [to_line(row) for row in rows]
+
+def _vital_observations(db: Session, first_id: int, last_id: int, snapshot: Dict[str, Any]) -> Iterator[List[str]]:
+    chunks = models.VitalChunk
+    statement = select(chunks.user_id, chunks.record_type, chunks.chunk_start, chunks.data).where(
+        chunks.user_id.in_(_patients(first_id, last_id))
+    ).order_by(chunks.user_id, chunks.record_type, chunks.chunk_start)
+    for rows in db.execute(statement.execution_options(yield_per=CHUNK_BATCH)).partitions():
+        recorded = vitals_store.manual_timestamps(db, rows, snapshot["max_ids"]["health_records"])
+        for user_id, record_type, _, data in rows:
+            timestamps, values = decode_chunk(data)
+            keep = timestamps < snapshot["until_ms"]
+            mirrored = recorded.get((user_id, record_type))
+            if mirrored is not None:
+                keep &= ~np.isin(timestamps, mirrored)
+            timestamps, values = timestamps[keep], values[keep]
+            if not len(timestamps):
+                continue
+            template = _observation_template(record_type, CANONICAL_UNITS[record_type])
+            prefix = f"vital-{user_id}-{OBSERVATION_CODES[record_type][0]}-"
+            recorded_at = np.char.add(timestamps.astype("datetime64[ms]").astype(str), "Z").tolist()
+            yield [
+                template % (f"{prefix}{timestamp}", user_id, effective, value, "")
+                for timestamp, effective, value in zip(timestamps.tolist(), recorded_at, values.tolist())
+            ]
+
+def _resource_batches(db: Session, resource_type: str, first_id: int, last_id: int, snapshot: Dict[str, Any]) -> Iterator[List[str]]:
+    """Serialized resources of one type for the patients in [first_id, last_id]"""
+    patients = _patients(first_id, last_id)
+    max_ids = snapshot["max_ids"]
+    if resource_type == "Observation":
+        records = models.HealthRecord
+        yield from _rows(db, select(
+            records.id, records.user_id, records.record_type, records.value, records.unit, records.recorded_at, records.notes
+        ).where(records.user_id.in_(patients), records.id <= max_ids["health_records"]).order_by(records.user_id, records.id), observation)
+        yield from _vital_observations(db, first_id, last_id, snapshot)
+    elif resource_type == "Appointment":
+        appointments = models.Appointment
+        yield from _rows(db, select(
+            appointments.id, appointments.patient_id, appointments.doctor_id, appointments.appointment_time,
+            appointments.status, appointments.appointment_type, appointments.notes
+        ).where(appointments.patient_id.in_(patients), appointments.id <= max_ids["appointments"]).order_by(appointments.patient_id, appointments.id), _lines(appointment))
+    elif resource_type == "DocumentReference":
+        documents = models.DocumentFile
+        yield from _rows(db, select(
+            documents.id, documents.user_id, documents.file_name, documents.file_type, documents.file_size,
+            documents.category, documents.uploaded_at, documents.notes
+        ).where(documents.user_id.in_(patients), documents.id <= max_ids["document_files"]).order_by(documents.user_id, documents.id), _lines(document_reference))
+    elif resource_type == "RiskAssessment":
+        risks = models.DiseaseRisk
+        yield from _rows(db, select(
+            risks.id, risks.user_id, risks.disease_name, risks.risk_score, risks.factors, risks.assessed_at
+        ).where(risks.user_id.in_(patients), risks.id <= max_ids["disease_risks"]).order_by(risks.user_id, risks.id), _lines(risk_assessment))
+        reports = models.RiskReport
+        yield from _rows(db, select(
+            reports.id, reports.patient_id, reports.date, reports.risk_level, reports.details
+        ).where(reports.patient_id.in_(patients), reports.id <= max_ids["risk_reports"]).order_by(reports.patient_id, reports.id), _lines(risk_report))
+
+def export_partition(output_dir: str, index: int, first_id: int, last_id: int, resource_types: Sequence[str], snapshot: Dict[str, Any]) -> Dict[str, int]:
+    """
+    Runs in a pool process: writes `<type>.<index>.ndjson` for every requested
+    resource type and returns the resource count per file. Empty files are
+    removed.
+    """
+    db = SessionLocal()
+    counts = {}
+    try:
+        for resource_type in resource_types:
+            path = Path(output_dir) / f"{resource_type}.{index:04d}.ndjson"
+            count = 0
+            with open(path, "w", encoding="utf-8") as output:
+                for lines in _resource_batches(db, resource_type, first_id, last_id, snapshot):
+                    output.writelines(lines)
+                    count += len(lines)
+            if count:
+                counts[path.name] = count
+            else:
+                path.unlink()
+    finally:
+        db.close()
+    return counts
+
+def observation_counts(db: Session, patient_ids: np.ndarray) -> np.ndarray:
+    """
+    Observations per patient (sorted ids): chunk readings plus health_records
+    rows. Rows inside a chunk's time span of the same type count as mirrored
+    into it; an estimate, close enough for balancing partitions.
+    """
+    records, chunks = models.HealthRecord, models.VitalChunk
+    patients = select(models.User.id).where(models.User.role == models.UserRole.patient)
+    mirrored = exists().where(and_(
+        chunks.user_id == records.user_id,
+        chunks.record_type == records.record_type,
+        chunks.first_at <= records.recorded_at,
+        chunks.last_at >= records.recorded_at
+    ))
+    counts = np.zeros(len(patient_ids))
+    for query in (
+        db.query(records.user_id, func.count(records.id)).filter(records.user_id.in_(patients), ~mirrored).group_by(records.user_id),
+        db.query(chunks.user_id, func.sum(chunks.count)).filter(chunks.user_id.in_(patients)).group_by(chunks.user_id),
+    ):
+        rows = query.all()
+        if rows:
+            user_ids, user_counts = zip(*rows)
+            counts[np.searchsorted(patient_ids, user_ids)] += user_counts
+    return counts
+
+def plan_partitions(db: Session, partitions: int) -> Tuple[List[Tuple[int, int]], Dict[str, Any]]:
+    """
+    Splits patients into at most `partitions` contiguous id ranges weighted
+    by their observation count, so one heavy wearable user does not leave
+    the rest of the pool idle. Also returns the export's snapshot bounds.
+    """
+    until = datetime.utcnow()
+    max_ids = {
+        table.__tablename__: db.query(func.coalesce(func.max(table.id), 0)).scalar()
+        for table in (models.HealthRecord, models.Appointment, models.DocumentFile, models.DiseaseRisk, models.RiskReport)
+    }
+    snapshot = {"transaction_time": until, "until_ms": to_ms(until), "max_ids": max_ids}
+
+    patient_ids = np.array([row[0] for row in db.query(models.User.id).filter(
+        models.User.role == models.UserRole.patient
+    ).order_by(models.User.id)], dtype=np.int64)
+    if not len(patient_ids):
+        return [], snapshot
+
+    weights = np.ones(len(patient_ids)) + observation_counts(db, patient_ids)
+
+    # Cut where the running total crosses each multiple of total / partitions
+    cumulative = np.cumsum(weights)
+    targets = cumulative[-1] * np.arange(1, partitions) / partitions
+    cuts = np.unique(np.searchsorted(cumulative, targets, side="right"))
+    bounds = np.concatenate(([0], cuts[(cuts > 0) & (cuts < len(patient_ids))], [len(patient_ids)]))
+    ranges = [
+        (int(patient_ids[start]), int(patient_ids[stop - 1]))
+        for start, stop in zip(bounds[:-1], bounds[1:])
+    ]
+    return ranges, snapshot
+
+def export_processes() -> int:
+    return settings.FHIR_EXPORT_PROCESSES or os.cpu_count() or 1
+
+async def run_export_job(job: Dict[str, Any], progress) -> Dict[str, Any]:
+    """
+    Job handler for FHIR_EXPORT_JOB. Returns the manifest fields; the router
+    turns file names into download URLs.
+    """
+    resource_types = job["payload"]["types"]
+    output_dir = Path(settings.FHIR_EXPORT_DIR) / str(job["_id"])
+    output_dir.mkdir(parents=True, exist_ok=True)
+    processes = export_processes()
+
+    def plan():
+        db = SessionLocal()
+        try:
+            return plan_partitions(db, processes * settings.FHIR_EXPORT_PARTITIONS_PER_PROCESS)
+        finally:
+            db.close()
+
+    ranges, snapshot = await asyncio.to_thread(plan)
+    await progress(1, f"Exporting {len(ranges)} partitions with {processes} processes")
+
+    loop = asyncio.get_running_loop()
+    # Spawned workers start clean instead of inheriting the server's event
+    # loop, connection pools and Mongo client threads
+    pool = ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context("spawn"))
+    files: Dict[str, int] = {}
+    try:
+        futures = [
+            loop.run_in_executor(pool, export_partition, str(output_dir), index, first_id, last_id, resource_types, snapshot)
+            for index, (first_id, last_id) in enumerate(ranges)
+        ]
+        for done, future in enumerate(asyncio.as_completed(futures), start=1):
+            files.update(await future)
+            await progress(min(99, 1 + done * 98 // len(futures)), f"Exported {done} of {len(futures)} partitions")
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    output = [
+        {"type": name.split(".", 1)[0], "file": name, "count": count}
+        for name, count in sorted(files.items(), key=lambda item: (RESOURCE_TYPES.index(item[0].split(".", 1)[0]), item[0]))
+    ]
+    return {"transactionTime": _instant(snapshot["transaction_time"]), "output": output}
@@ -1,13 +1,21 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
+from pymongo.errors import ConnectionFailure
 
 from app.core.config import settings
 from app.db.mongodb import client
 from app.api.v1.api import api_router
+from app.core.pagination import NEXT_CURSOR_HEADER
+from app.repositories.conversation_repo import ConversationRepository
+from app.services.job_queue import JobQueue, JobWorkerPool
+from app.services.document_processing import DocumentProcessingService, REPORT_PROCESSING_JOB
+from fhir_export import FHIR_EXPORT_JOB, run_export_job
+from app.services.timeline_writer import timeline_writer
+from app.services.insights_service import InsightsScheduler
 
 # Import existing routers so we don't break backward compatibility during migration
-from routers import auth as legacy_auth, users, doctor, admin, appointments, health_records, fitness, diet, risk_assessment, disease_predictor, ai_chat, dashboard
+from routers import auth as legacy_auth, users, doctor, admin, appointments, health_records, fitness, diet, risk_assessment, disease_predictor, ai_chat, dashboard, export, fhir
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -28,14 +36,41 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
+# Background workers for document OCR, report summaries and FHIR bulk exports (JOB_WORKERS=0 disables them)
+job_queue = JobQueue()
+worker_pool = JobWorkerPool(job_queue)
+document_processing_service = DocumentProcessingService()
+worker_pool.register(REPORT_PROCESSING_JOB, document_processing_service.process_report, on_failure=document_processing_service.report_failed)
+worker_pool.register(FHIR_EXPORT_JOB, run_export_job)
+
+# Daily dashboard insights, generated off the request path
+insights_scheduler = InsightsScheduler()
+
 @app.on_event("startup")
 async def startup_db_client():
-    pass # MongoDB client connects automatically via motor
+    # MongoDB client connects automatically via motor
+    # An unreachable MongoDB only disables the features that need it; any other
+    # index failure (such as conversations that could not be merged) stops startup
+    try:
+        await ConversationRepository().ensure_indexes()
+        await job_queue.ensure_indexes()
+        await insights_scheduler.service.ensure_indexes()
+    except ConnectionFailure as e:
+        print(f"[MONGODB] Could not ensure indexes ({e}).")
+    timeline_writer.start()
+    worker_pool.start()
+    if settings.INSIGHTS_ENABLED:
+        insights_scheduler.start()
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    await insights_scheduler.stop()
+    await worker_pool.stop()
+    # Write out buffered timeline events before the client goes away
+    await timeline_writer.stop()
     client.close()
 
 # Mount new V1 API
@@ -54,6 +89,8 @@ app.include_router(risk_assessment.router)
 app.include_router(disease_predictor.router)
 app.include_router(ai_chat.router)
 app.include_router(dashboard.router)
+app.include_router(export.router)
+app.include_router(fhir.router)
 @app.get("/")
 async def root():
     return {"message": "Welcome to HealthHub API powered by MongoDB and Firebase"}
@@ -0,0 +1,96 @@
+"""
+Maintenance command for the monthly partitions of health_records and
+document_files on PostgreSQL.
+
+Usage:
+python manage_partitions.py [months_ahead]
+
+Creates every missing partition from the current month through
+`months_ahead` months ahead (default 3); run it from a monthly cron job.
+Rows whose month has no partition yet land in the table's `_default`
+partition and are moved into their month's partition when it is created.
+"""
+import sys
+from datetime import date
+from typing import Iterator, List
+
+from sqlalchemy import text
+
+# Partitioned table -> partition key column
+PARTITIONED_TABLES = {
+    "health_records": "recorded_at",
+    "document_files": "uploaded_at",
+}
+MONTHS_AHEAD = 3
+
+def add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+def months(first: date, last: date) -> Iterator[date]:
+    month = first.replace(day=1)
+    while month <= last:
+        yield month
+        month = add_months(month, 1)
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_{month:%Y_%m}"
+
+def is_partitioned(connection, table: str) -> bool:
+    return connection.execute(
+        text("SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:table))"),
+        {"table": table}
+    ).scalar()
+
+def create_partition(connection, table: str, month: date) -> bool:
+    """
+    Creates and attaches the partition for one month, moving that month's
+    rows out of the default partition first. Returns False if it already exists.
+    """
+    name = partition_name(table, month)
+    if connection.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar() is not None:
+        return False
+
+    column = PARTITIONED_TABLES[table]
+    start, end = month, add_months(month, 1)
+    # Attaching checks the default partition holds no rows for the new range
+    connection.execute(text(f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    connection.execute(text(
+        f"WITH moved AS (DELETE FROM {table}_default WHERE {column} >= :start AND {column} < :end RETURNING *) "
+        f"INSERT INTO {name} SELECT * FROM moved"
+    ), {"start": start, "end": end})
+    connection.execute(text(f"ALTER TABLE {table} ATTACH PARTITION {name} FOR VALUES FROM ('{start}') TO ('{end}')"))
+    return True
+
+def ensure_partitions(connection, months_ahead: int = MONTHS_AHEAD) -> List[str]:
+    """
+    Creates the missing partitions of every partitioned table up to
+    `months_ahead` months after the current one. Returns their names.
+    """
+    this_month = date.today().replace(day=1)
+    created = []
+    for table in PARTITIONED_TABLES:
+        if not is_partitioned(connection, table):
+            print(f"[PARTITIONS] {table} is not partitioned. Run 'alembic upgrade head' first.")
+            continue
+        for month in months(this_month, add_months(this_month, months_ahead)):
+            if create_partition(connection, table, month):
+                created.append(partition_name(table, month))
+    return created
+
+def main():
+    months_ahead = int(sys.argv[1]) if len(sys.argv) > 1 else MONTHS_AHEAD
+    from database import engine
+
+    if engine.dialect.name != "postgresql":
+        print(f"[PARTITIONS] Partitioning is only used on PostgreSQL (connected to {engine.dialect.name}). Nothing to do.")
+        return
+    with engine.begin() as connection:
+        created = ensure_partitions(connection, months_ahead)
+    if created:
+        print(f"[PARTITIONS] Created {', '.join(created)}.")
+    else:
+        print("[PARTITIONS] All partitions already exist.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Meal plans built from the recipe catalog to meet a DietPlan's daily targets.
+
+Each MealTime slot draws from the recipes tagged for it whose calories
+suit the slot's share of the day, after the diet type and exclusion
+filters. The plan starts from random picks and is improved by coordinate
+descent: for one day and slot at a time, every candidate in the slot's
+macro matrix is scored at once against the rest of that day, and the best
+recipe not used elsewhere in the plan replaces the current pick. Passes
+repeat until nothing changes.
+"""
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from models import MealTime
+from recipe_search import RecipeIndex
+
+MACRO_FIELDS = ("calories", "protein", "carbs", "fat")
+
+# Calories are weighted above the individual macros
+MACRO_WEIGHTS = np.array([2.0, 1.0, 1.0, 1.0])
+
+# Share of the daily calories each slot should provide; a slot's candidates
+# are the recipes within SLOT_CALORIE_SPREAD of that share
+SLOT_SHARES = {
+    MealTime.breakfast: 0.25,
+    MealTime.lunch: 0.35,
+    MealTime.dinner: 0.30,
+    MealTime.snack: 0.10,
+}
+SLOT_CALORIE_SPREAD = 0.5
+
+MAX_PASSES = 10
+
+@dataclass
+class PlannedMeal:
+    day: int
+    time_of_day: MealTime
+    recipe: Dict[str, Any]
+
+@dataclass
+class MealPlanResult:
+    meals: List[PlannedMeal]
+    totals: np.ndarray  # (days, 4): calories, protein, carbs, fat per day
+    targets: np.ndarray
+
+def _slot_pools(index: RecipeIndex, daily_calories: float, diet_type: Optional[str], exclude_ingredients: Tuple[str, ...]) -> Dict[MealTime, np.ndarray]:
+    pools = {}
+    for slot, share in SLOT_SHARES.items():
+        calories = (share * (1 - SLOT_CALORIE_SPREAD) * daily_calories, share * (1 + SLOT_CALORIE_SPREAD) * daily_calories)
+        pool = index.matching(diet_type, slot.value, exclude_ingredients=exclude_ingredients, ranges={"calories": calories})
+        if not len(pool):
+            # Better an oversized snack than no snack
+            pool = index.matching(diet_type, slot.value, exclude_ingredients=exclude_ingredients)
+        if not len(pool):
+            raise ValueError(f"No {slot.value} recipes match the diet type and exclusions")
+        pools[slot] = np.sort(pool)
+    return pools
+
+def _day_error(totals: np.ndarray, targets: np.ndarray) -> np.ndarray:
+    """Weighted squared relative error of daily totals, over the last axis"""
+    return ((totals - targets) / targets) ** 2 @ MACRO_WEIGHTS
+
+def plan_meals(
+    index: RecipeIndex,
+    targets: Tuple[float, float, float, float],
+    days: int = 7,
+    diet_type: Optional[str] = None,
+    exclude_ingredients: Iterable[str] = (),
+    seed: Optional[int] = None
+) -> MealPlanResult:
+    """
+    One recipe per MealTime slot per day, fitted to the daily (calories,
+    protein, carbs, fat) targets; raises ValueError when a slot has no recipes
+    """
+    targets = np.maximum(np.asarray(targets, dtype=np.float64), 1.0)
+    pools = _slot_pools(index, targets[0], diet_type, tuple(exclude_ingredients))
+    slots = list(pools)
+    macros = [np.column_stack([index.values[field][pools[slot]] for field in MACRO_FIELDS]) for slot in slots]
+
+    rng = np.random.default_rng(seed)
+    picks = np.column_stack([rng.integers(len(pools[slot]), size=days) for slot in slots])
+    totals = sum(macros[s][picks[:, s]] for s in range(len(slots)))
+    # Times each catalog recipe appears in the plan
+    uses = np.zeros(len(index.recipes), dtype=np.int64)
+    for s, slot in enumerate(slots):
+        np.add.at(uses, pools[slot][picks[:, s]], 1)
+
+    for _ in range(MAX_PASSES):
+        changed = False
+        for day in range(days):
+            for s, slot in enumerate(slots):
+                pool, current = pools[slot], picks[day, s]
+                uses[pool[current]] -= 1
+                rest = totals[day] - macros[s][current]
+                errors = _day_error(rest + macros[s], targets)
+                # Repeats only once every candidate is taken
+                used = uses[pool] > 0
+                if not used.all():
+                    errors[used] = np.inf
+                best = int(np.argmin(errors))
+                if errors[best] < errors[current]:
+                    picks[day, s] = best
+                    totals[day] = rest + macros[s][best]
+                    changed = True
+                uses[pool[picks[day, s]]] += 1
+        if not changed:
+            break
+
+    meals = [
+        PlannedMeal(day, slot, index.recipes[pools[slot][picks[day, s]]])
+        for day in range(days)
+        for s, slot in enumerate(slots)
+    ]
+    return MealPlanResult(meals=meals, totals=totals, targets=targets)
@@ -1,7 +1,7 @@
 """
 Database models for the HealthHub application
 """
-from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, Float, DateTime, Table, Text, Enum as SQLEnum, LargeBinary
+from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, Float, DateTime, Table, Text, Enum as SQLEnum, LargeBinary, UniqueConstraint, Index, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import JSON # Import JSON type
 from sqlalchemy.ext.declarative import declarative_base
@@ -91,6 +91,7 @@ class User(Base):
     doctor_appointments = relationship("Appointment", back_populates="doctor", foreign_keys="Appointment.doctor_id")
     diet_plans = relationship("DietPlan", back_populates="user")
     disease_risks = relationship("DiseaseRisk", back_populates="user")
+    exercise_logs = relationship("ExerciseLog", back_populates="user")
     
     # For doctor role only
     patients = relationship(
@@ -102,10 +103,17 @@ class User(Base):
     )
 
 class HealthRecord(Base):
+    # On PostgreSQL the table is range-partitioned by month of recorded_at
+    # (see manage_partitions.py); the composite index serves the per-user,
+    # newest-first queries and its id column the pagination tie-break
     __tablename__ = "health_records"
+    __table_args__ = (
+        Index("ix_health_records_user_type_recorded", "user_id", "record_type", text("recorded_at DESC"), text("id DESC")),
+        Index("ix_health_records_user_recorded", "user_id", text("recorded_at DESC"), text("id DESC")),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     record_type = Column(SQLEnum(HealthRecordType, name="health_record_type_enum"), nullable=False, index=True)
     value = Column(Float, nullable=False)
     unit = Column(SQLEnum(HealthRecordUnit, name="health_record_unit_enum"), nullable=False)
@@ -115,11 +123,56 @@ class HealthRecord(Base):
     # Relationships
     user = relationship("User", back_populates="health_records")
 
+class VitalChunk(Base):
+    """
+    Compressed block of time-series readings for one user, vital type and
+    day, written by vitals_store.VitalsStore. Used for high-frequency
+    wearable data; manual entries stay in health_records.
+    """
+    __tablename__ = "vital_chunks"
+    __table_args__ = (UniqueConstraint("user_id", "record_type", "chunk_start", name="uq_vital_chunks_user_type_start"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    record_type = Column(SQLEnum(HealthRecordType, name="health_record_type_enum"), nullable=False)
+    chunk_start = Column(DateTime, nullable=False)
+    first_at = Column(DateTime, nullable=False)
+    last_at = Column(DateTime, nullable=False)
+    count = Column(Integer, nullable=False)
+    min_value = Column(Float, nullable=False)
+    max_value = Column(Float, nullable=False)
+    last_value = Column(Float, nullable=False)
+    data = Column(LargeBinary, nullable=False)
+
+class VitalRollup(Base):
+    """
+    Count, sum, min and max of a user's readings of one vital type per
+    1-hour or 1-day bucket. Kept in step with vital_chunks by
+    vitals_store.VitalsStore so chart ranges read pre-aggregated rows.
+    """
+    __tablename__ = "vital_rollups"
+    __table_args__ = (UniqueConstraint("user_id", "record_type", "resolution", "bucket_start", name="uq_vital_rollups_user_type_res_start"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    record_type = Column(SQLEnum(HealthRecordType, name="health_record_type_enum"), nullable=False)
+    resolution = Column(String(4), nullable=False)  # "1h" or "1d"
+    bucket_start = Column(DateTime, nullable=False)
+    count = Column(Integer, nullable=False)
+    total = Column(Float, nullable=False)
+    min_value = Column(Float, nullable=False)
+    max_value = Column(Float, nullable=False)
+
 class DocumentFile(Base):
+    # Range-partitioned by month of uploaded_at on PostgreSQL, like health_records
     __tablename__ = "document_files"
+    __table_args__ = (
+        Index("ix_document_files_user_category_uploaded", "user_id", "category", text("uploaded_at DESC"), text("id DESC")),
+        Index("ix_document_files_user_uploaded", "user_id", text("uploaded_at DESC"), text("id DESC")),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     file_name = Column(String, nullable=False)
     file_path = Column(String, nullable=True)  # Path can be null if storing data directly
     file_type = Column(String, nullable=False) # MIME type
@@ -132,6 +185,40 @@ class DocumentFile(Base):
     # Relationships
     user = relationship("User", back_populates="documents")
 
+class ExerciseLog(Base):
+    # One completed workout; the composite index serves the per-user date
+    # range reads and the weekly/monthly aggregates
+    __tablename__ = "exercise_logs"
+    __table_args__ = (
+        Index("ix_exercise_logs_user_performed", "user_id", text("performed_at DESC"), text("id DESC")),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    exercise_type = Column(String(64), nullable=False)
+    duration_minutes = Column(Integer, nullable=False)
+    calories_burned = Column(Integer, nullable=False)
+    performed_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    # Filled in for sessions analysed from pose keypoints
+    rep_count = Column(Integer, nullable=True)
+    form_score = Column(Float, nullable=True)
+    
+    # Relationships
+    user = relationship("User", back_populates="exercise_logs")
+
+class WorkoutPlan(Base):
+    # Catalog the workout recommender ranks (see workout_recommender.py)
+    __tablename__ = "workout_plans"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, nullable=False)
+    description = Column(Text, nullable=False)
+    level = Column(String(16), nullable=False)  # beginner, intermediate or advanced
+    goal = Column(String(16), nullable=False)  # general, strength, cardio, flexibility or weight_loss
+    duration_minutes = Column(Integer, nullable=False)
+    exercises = Column(JSON, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
 class Appointment(Base):
     __tablename__ = "appointments"
     
@@ -172,6 +259,7 @@ class Meal(Base):
     name = Column(String, nullable=False)
     calories = Column(Integer, nullable=False)
     time_of_day = Column(SQLEnum(MealTime, name="meal_time_enum"), nullable=False)
+    day = Column(Integer, nullable=True)  # 0-based day of the plan; None for meals not tied to a day
     
     # Relationships
     diet_plan = relationship("DietPlan", back_populates="meals")
@@ -211,23 +299,20 @@ class PatientHistory(Base):
     def last_visit(self):
         return self.created_at
 
-    @property
-    def advice_history(self):
-        from database import SessionLocal
-        db = SessionLocal()
-        try:
-            return db.query(PatientHistory).filter(PatientHistory.patient_id == self.patient_id).all()
-        finally:
-            db.close()
-
-    @property
-    def risk_reports(self):
-        from database import SessionLocal
-        db = SessionLocal()
-        try:
-            return db.query(RiskReport).filter(RiskReport.patient_id == self.patient_id).all()
-        finally:
-            db.close()
+    # All advice entries (this one included) and risk reports for the same
+    # patient; read-only, and meant to be loaded with selectinload
+    advice_history = relationship(
+        "PatientHistory",
+        primaryjoin="PatientHistory.patient_id == foreign(remote(PatientHistory.patient_id))",
+        order_by="PatientHistory.created_at",
+        viewonly=True
+    )
+    risk_reports = relationship(
+        "RiskReport",
+        primaryjoin="PatientHistory.patient_id == foreign(RiskReport.patient_id)",
+        order_by="RiskReport.date",
+        viewonly=True
+    )
 
 class Session(Base):
     __tablename__ = "sessions"
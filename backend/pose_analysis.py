@@ -0,0 +1,246 @@
+"""
+Server-side analysis of recorded pose keypoint sessions.
+
+A session arrives as one float32 array of MoveNet frames, shape
+(frames, 17, 3) holding x, y and confidence for each keypoint, and is
+analysed as whole-session arrays rather than frame by frame: joint angles
+for every frame at once, repetitions from the zone changes of the smoothed
+angle, and form scores from per-rep reductions. The thresholds match the
+live feedback in the frontend's pose-detection.ts, so a rep counted there
+is counted here.
+"""
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+KEYPOINT_NAMES = (
+    "nose", "left_eye", "right_eye", "left_ear", "right_ear",
+    "left_shoulder", "right_shoulder", "left_elbow", "right_elbow",
+    "left_wrist", "right_wrist", "left_hip", "right_hip",
+    "left_knee", "right_knee", "left_ankle", "right_ankle",
+)
+KP = {name: index for index, name in enumerate(KEYPOINT_NAMES)}
+VALUES_PER_KEYPOINT = 3  # x, y, score
+FRAME_BYTES = len(KEYPOINT_NAMES) * VALUES_PER_KEYPOINT * 4
+
+# Keypoints below this confidence are treated as not visible
+MIN_SCORE = 0.4
+
+# Smoothing window in seconds for joint angles
+SMOOTHING_SECONDS = 0.1
+
+# Body weight used for calories when the user has not recorded one
+DEFAULT_WEIGHT_KG = 70.0
+
+@dataclass(frozen=True)
+class RepExercise:
+    """An exercise counted from one joint angle on both sides of the body"""
+    joint: Tuple[str, str, str]  # (proximal, joint, distal) on the left side
+    down_below: float  # degrees: entering the bottom of a rep
+    up_above: float  # degrees: completing the rep
+    target_depth: float  # ideal angle at the bottom
+    met: float
+
+@dataclass(frozen=True)
+class HoldExercise:
+    met: float
+
+@dataclass(frozen=True)
+class CircleExercise:
+    """Counted from full turns of the wrists around the shoulders"""
+    met: float
+
+EXERCISES = {
+    "Push-ups": RepExercise(("left_shoulder", "left_elbow", "left_wrist"), 130.0, 160.0, 90.0, 3.8),
+    "Squats": RepExercise(("left_hip", "left_knee", "left_ankle"), 120.0, 160.0, 90.0, 5.0),
+    "Plank": HoldExercise(3.5),
+    "Arm Circles": CircleExercise(3.3),
+}
+
+@dataclass
+class SessionAnalysis:
+    exercise_type: str
+    frames: int
+    duration_seconds: float
+    rep_count: int
+    form_score: float
+    reps: List[Dict[str, float]] = field(default_factory=list)
+    mistakes: List[str] = field(default_factory=list)
+    visible_fraction: float = 0.0
+    calories_burned: float = 0.0
+
+def parse_frames(body: bytes) -> np.ndarray:
+    """float32 little-endian bytes to a (frames, 17, 3) array; raises ValueError"""
+    if not body or len(body) % FRAME_BYTES:
+        raise ValueError(f"Body must be a whole number of {FRAME_BYTES}-byte frames (17 keypoints of x, y, score as float32)")
+    frames = np.frombuffer(body, dtype="<f4").reshape(-1, len(KEYPOINT_NAMES), VALUES_PER_KEYPOINT).astype(np.float64)
+    # Non-finite coordinates count as undetected keypoints
+    frames[~np.isfinite(frames).all(axis=2), 2] = 0.0
+    return frames
+
+def _mirror(name: str) -> str:
+    return name.replace("left_", "right_")
+
+def _visible(frames: np.ndarray, names) -> np.ndarray:
+    return (frames[:, [KP[name] for name in names], 2] > MIN_SCORE).all(axis=1)
+
+def joint_angles(frames: np.ndarray, a: str, b: str, c: str) -> np.ndarray:
+    """Angle at b in degrees (0-180) for every frame; NaN where a keypoint is not visible"""
+    pa, pb, pc = (frames[:, KP[name], :2] for name in (a, b, c))
+    radians = np.arctan2(pc[:, 1] - pb[:, 1], pc[:, 0] - pb[:, 0]) - np.arctan2(pa[:, 1] - pb[:, 1], pa[:, 0] - pb[:, 0])
+    angles = np.abs(np.degrees(radians)) % 360.0
+    angles = np.where(angles > 180.0, 360.0 - angles, angles)
+    return np.where(_visible(frames, (a, b, c)), angles, np.nan)
+
+def _fill_gaps(values: np.ndarray) -> np.ndarray:
+    """Carries the last valid value forward (and the first one back) over NaN frames"""
+    valid = ~np.isnan(values)
+    index = np.where(valid, np.arange(len(values)), 0)
+    np.maximum.accumulate(index, out=index)
+    filled = values[index]
+    filled[:np.argmax(valid)] = values[np.argmax(valid)]
+    return filled
+
+def _smooth(values: np.ndarray, window: int) -> np.ndarray:
+    if window <= 1:
+        return values
+    padded = np.pad(values, (window // 2, window - 1 - window // 2), mode="edge")
+    cumulative = np.concatenate(([0.0], np.cumsum(padded)))
+    return (cumulative[window:] - cumulative[:-window]) / window
+
+def _side_average(left: np.ndarray, right: np.ndarray) -> np.ndarray:
+    both = np.stack([left, right])
+    counts = (~np.isnan(both)).sum(axis=0)
+    total = np.nansum(both, axis=0)
+    return np.divide(total, counts, out=np.full(len(left), np.nan), where=counts > 0)
+
+def count_reps(angle: np.ndarray, down_below: float, up_above: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Hysteresis rep counter over a whole series, starting in the up state:
+    a rep goes below down_below, then back above up_above. Returns the frame
+    each counted rep went down at and the frame it completed at.
+    """
+    zone = np.zeros(len(angle), dtype=np.int8)
+    zone[angle < down_below] = -1
+    zone[angle > up_above] = 1
+    frames = np.flatnonzero(zone)
+    zones = zone[frames]
+    # Keep the first frame of every run of the same zone
+    changes = np.concatenate(([True], zones[1:] != zones[:-1]))
+    frames, zones = frames[changes], zones[changes]
+    completed = np.flatnonzero((zones[:-1] == -1) & (zones[1:] == 1))
+    return frames[completed], frames[completed + 1]
+
+def _rep_session(frames: np.ndarray, exercise: RepExercise, fps: float, analysis: SessionAnalysis):
+    a, b, c = exercise.joint
+    left = joint_angles(frames, a, b, c)
+    right = joint_angles(frames, _mirror(a), _mirror(b), _mirror(c))
+    combined = _side_average(left, right)
+    visible = ~np.isnan(combined)
+    analysis.visible_fraction = float(visible.mean())
+    if not visible.any():
+        raise ValueError("Not enough confident keypoints to analyse the session")
+
+    angle = _smooth(_fill_gaps(combined), max(1, round(fps * SMOOTHING_SECONDS)))
+    downs, ups = count_reps(angle, exercise.down_below, exercise.up_above)
+    analysis.rep_count = len(ups)
+    if not len(ups):
+        analysis.mistakes.append("No complete reps detected")
+        return
+
+    # Per-rep reductions over the [down, up) windows; downs and ups
+    # interleave, so every other reduceat segment is a rep's bottom phase
+    windows = np.column_stack((downs, ups)).ravel()
+    depth = np.minimum.reduceat(angle, windows)[::2]
+    difference = np.abs(left - right)
+    both_sides = ~np.isnan(difference)
+    asymmetry = (
+        np.add.reduceat(np.where(both_sides, difference, 0.0), windows)[::2]
+        / np.maximum(np.add.reduceat(both_sides.astype(np.int64), windows)[::2], 1)
+    )
+    starts = np.concatenate(([0], ups[:-1]))
+
+    # 100 at the target depth, minus 2 points per degree short of it and per
+    # degree of average left/right difference beyond 10
+    depth_penalty = np.clip(depth - exercise.target_depth, 0.0, None) * 2.0
+    symmetry_penalty = np.clip(asymmetry - 10.0, 0.0, None) * 2.0
+    scores = np.clip(100.0 - depth_penalty - symmetry_penalty, 0.0, 100.0)
+    analysis.form_score = round(float(scores.mean()), 1)
+    analysis.reps = [
+        {
+            "start_seconds": round(start / fps, 2),
+            "end_seconds": round(end / fps, 2),
+            "min_angle": round(float(bottom), 1),
+            "form_score": round(float(score), 1),
+        }
+        for start, end, bottom, score in zip(starts.tolist(), ups.tolist(), depth, scores)
+    ]
+
+    if (depth_penalty > 20.0).mean() > 0.5:
+        analysis.mistakes.append("Not going deep enough")
+    if (symmetry_penalty > 10.0).mean() > 0.5:
+        analysis.mistakes.append("Uneven left and right sides")
+
+def _hold_session(frames: np.ndarray, analysis: SessionAnalysis):
+    names = ("left_shoulder", "right_shoulder", "left_hip", "right_hip", "left_ankle", "right_ankle")
+    visible = _visible(frames, names)
+    analysis.visible_fraction = float(visible.mean())
+    if not visible.any():
+        raise ValueError("Not enough confident keypoints to analyse the session")
+
+    y = frames[visible][:, [KP[name] for name in names], 1]
+    shoulder, hip, ankle = (y[:, 0] + y[:, 1]) / 2, (y[:, 2] + y[:, 3]) / 2, (y[:, 4] + y[:, 5]) / 2
+    # Same alignment measure as the live plank feedback
+    span = np.where(np.abs(hip - ankle) < 1e-6, 1e-6, hip - ankle)
+    alignment = np.abs((shoulder - hip) / span - 1.0)
+    scores = np.clip(85.0 - alignment * 100.0, 0.0, 100.0)
+    analysis.form_score = round(float(scores.mean()), 1)
+    if (alignment > 0.3).mean() > 0.5:
+        analysis.mistakes.append("Body not aligned properly")
+
+def _circle_session(frames: np.ndarray, analysis: SessionAnalysis):
+    turns = []
+    visible_any = np.zeros(len(frames), dtype=bool)
+    for side in ("left", "right"):
+        visible = _visible(frames, (f"{side}_shoulder", f"{side}_wrist"))
+        visible_any |= visible
+        if visible.sum() < 2:
+            continue
+        offset = frames[visible, KP[f"{side}_wrist"], :2] - frames[visible, KP[f"{side}_shoulder"], :2]
+        swept = np.unwrap(np.arctan2(offset[:, 1], offset[:, 0]))
+        turns.append(abs(swept[-1] - swept[0]) / (2 * np.pi))
+    analysis.visible_fraction = float(visible_any.mean())
+    if not turns:
+        raise ValueError("Not enough confident keypoints to analyse the session")
+    analysis.rep_count = int(max(turns))
+    # Both arms should turn together
+    analysis.form_score = round(100.0 * min(turns) / max(turns), 1) if len(turns) == 2 and max(turns) >= 1 else 50.0
+    if len(turns) == 2 and analysis.form_score < 70:
+        analysis.mistakes.append("Arms not circling together")
+
+def analyze_session(frames: np.ndarray, exercise_type: str, fps: float, weight_kg: Optional[float] = None) -> SessionAnalysis:
+    """Analyses a whole keypoint session; raises ValueError for unusable input"""
+    exercise = EXERCISES.get(exercise_type)
+    if exercise is None:
+        raise ValueError(f"Unsupported exercise type {exercise_type}; expected one of {', '.join(EXERCISES)}")
+
+    analysis = SessionAnalysis(
+        exercise_type=exercise_type,
+        frames=len(frames),
+        duration_seconds=round(len(frames) / fps, 2),
+        rep_count=0,
+        form_score=0.0
+    )
+    if isinstance(exercise, RepExercise):
+        _rep_session(frames, exercise, fps, analysis)
+    elif isinstance(exercise, HoldExercise):
+        _hold_session(frames, analysis)
+    else:
+        _circle_session(frames, analysis)
+
+    if analysis.visible_fraction < 0.5:
+        analysis.mistakes.append("Body often out of view")
+    # Calories = MET * weight (kg) * time (hours)
+    analysis.calories_burned = round(exercise.met * (weight_kg or DEFAULT_WEIGHT_KG) * analysis.duration_seconds / 3600, 1)
+    return analysis
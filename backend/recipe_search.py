@@ -0,0 +1,191 @@
+"""
+Recipe search over the local recipe catalog (settings.RECIPES_PATH).
+
+The catalog is loaded once into a RecipeIndex: posting lists of recipe
+positions for every tag, meal type and ingredient word, and each numeric
+field (calories, macros, preparation time) sorted once, so a range filter
+is two binary searches. A query starts from its most selective filter and
+narrows that candidate set with the others; only the top `limit`
+candidates are ordered.
+"""
+import json
+import os
+import re
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+
+NUMERIC_FIELDS = ("calories", "protein", "carbs", "fat", "minutes")
+
+# Sort orders: protein per calorie (highest first), calories or minutes (lowest first)
+SORTS = ("protein", "calories", "time")
+
+Range = Tuple[Optional[float], Optional[float]]
+
+@lru_cache(maxsize=65536)
+def ingredient_words(text: str) -> Tuple[str, ...]:
+    """Lowercase words with simple plurals folded, so "cherry tomatoes" matches "tomato" """
+    words = []
+    for word in re.findall(r"[a-z]+", text.lower()):
+        if word.endswith("ies") and len(word) > 4:
+            word = word[:-3] + "y"
+        elif word.endswith("oes") and len(word) > 4:
+            word = word[:-2]
+        elif word.endswith("s") and not word.endswith("ss") and len(word) > 3:
+            word = word[:-1]
+        words.append(word)
+    return tuple(words)
+
+def _minutes(time_text: str) -> float:
+    """Minutes from a "25 mins" or "1 hr 10 mins" style string; 0 if absent"""
+    total = 0.0
+    for amount, unit in re.findall(r"(\d+(?:\.\d+)?)\s*([a-z]*)", (time_text or "").lower()):
+        total += float(amount) * (60 if unit.startswith("h") else 1)
+    return total
+
+def _contains(postings: np.ndarray, candidates: np.ndarray) -> np.ndarray:
+    """Mask of candidates present in a sorted posting list"""
+    if not len(postings):
+        return np.zeros(len(candidates), dtype=bool)
+    positions = np.searchsorted(postings, candidates)
+    return postings[np.minimum(positions, len(postings) - 1)] == candidates
+
+class RecipeIndex:
+    def __init__(self, recipes: List[Dict[str, Any]]):
+        self.recipes = recipes
+        count = len(recipes)
+
+        self.values = {
+            field: np.array([recipe[field] for recipe in recipes], dtype=np.float64).reshape(count)
+            for field in NUMERIC_FIELDS if field != "minutes"
+        }
+        self.values["minutes"] = np.array([_minutes(recipe.get("time")) for recipe in recipes], dtype=np.float64).reshape(count)
+        self._order = {field: np.argsort(values, kind="stable") for field, values in self.values.items()}
+        self._sorted = {field: self.values[field][order] for field, order in self._order.items()}
+
+        # Recipes are visited in position order, so every posting list is sorted
+        postings: Dict[str, List[int]] = {}
+        for position, recipe in enumerate(recipes):
+            keys = {f"tag:{tag.lower()}" for tag in recipe.get("tags", [])}
+            keys.update(f"meal:{meal.lower()}" for meal in recipe.get("meal_types", []))
+            keys.update(f"ingredient:{word}" for ingredient in recipe["ingredients"] for word in ingredient_words(ingredient))
+            for key in keys:
+                postings.setdefault(key, []).append(position)
+        self._postings = {key: np.array(positions, dtype=np.int64) for key, positions in postings.items()}
+
+        # Position of every recipe in each sort order, ties by catalog order
+        positions = np.arange(count)
+        protein_density = self.values["protein"] / np.maximum(self.values["calories"], 1.0)
+        self._rank = {}
+        for sort, key in (("protein", -protein_density), ("calories", self.values["calories"]), ("time", self.values["minutes"])):
+            rank = np.empty(count, dtype=np.int64)
+            rank[np.lexsort((positions, key))] = positions
+            self._rank[sort] = rank
+
+    def postings(self, key: str) -> np.ndarray:
+        return self._postings.get(key, np.empty(0, dtype=np.int64))
+
+    def _phrase(self, ingredient: str) -> Optional[np.ndarray]:
+        """Recipes containing every word of an ingredient phrase; None for a phrase with no words"""
+        lists = sorted((self.postings(f"ingredient:{word}") for word in ingredient_words(ingredient)), key=len)
+        if not lists:
+            return None
+        matches = lists[0]
+        for postings in lists[1:]:
+            matches = matches[_contains(postings, matches)]
+        return matches
+
+    def matching(
+        self,
+        diet_type: Optional[str] = None,
+        meal_type: Optional[str] = None,
+        ingredients: Iterable[str] = (),
+        exclude_ingredients: Iterable[str] = (),
+        ranges: Optional[Dict[str, Range]] = None
+    ) -> np.ndarray:
+        """Positions of the recipes matching every filter, unordered; ranges are inclusive"""
+        lists = []
+        if diet_type:
+            lists.append(self.postings(f"tag:{diet_type.lower()}"))
+        if meal_type:
+            lists.append(self.postings(f"meal:{meal_type.lower()}"))
+        for ingredient in ingredients:
+            matches = self._phrase(ingredient)
+            if matches is not None:
+                lists.append(matches)
+
+        bounds = []
+        for field, (low, high) in (ranges or {}).items():
+            if low is None and high is None:
+                continue
+            sorted_values = self._sorted[field]
+            start = 0 if low is None else int(np.searchsorted(sorted_values, low, side="left"))
+            stop = len(sorted_values) if high is None else int(np.searchsorted(sorted_values, high, side="right"))
+            bounds.append((max(stop - start, 0), field, start, stop, low, high))
+
+        # Drive from the most selective filter; the rest only test its survivors
+        lists.sort(key=len)
+        bounds.sort(key=lambda bound: bound[0])
+        if lists and (not bounds or len(lists[0]) <= bounds[0][0]):
+            candidates = lists.pop(0)
+        elif bounds:
+            _, field, start, stop, _, _ = bounds.pop(0)
+            candidates = self._order[field][start:stop]
+        else:
+            candidates = np.arange(len(self.recipes))
+
+        for postings in lists:
+            candidates = candidates[_contains(postings, candidates)]
+        for _, field, _, _, low, high in bounds:
+            values = self.values[field][candidates]
+            keep = np.ones(len(candidates), dtype=bool)
+            if low is not None:
+                keep &= values >= low
+            if high is not None:
+                keep &= values <= high
+            candidates = candidates[keep]
+        for ingredient in exclude_ingredients:
+            matches = self._phrase(ingredient)
+            if matches is not None:
+                candidates = candidates[~_contains(matches, candidates)]
+        return candidates
+
+    def search(
+        self,
+        diet_type: Optional[str] = None,
+        meal_type: Optional[str] = None,
+        ingredients: Iterable[str] = (),
+        exclude_ingredients: Iterable[str] = (),
+        ranges: Optional[Dict[str, Range]] = None,
+        sort: str = "protein",
+        limit: int = 20
+    ) -> List[Dict[str, Any]]:
+        """Recipes matching every filter, best `limit` first"""
+        candidates = self.matching(diet_type, meal_type, ingredients, exclude_ingredients, ranges)
+        if limit <= 0 or not len(candidates):
+            return []
+        rank = self._rank[sort][candidates]
+        if limit < len(candidates):
+            top = np.argpartition(rank, limit - 1)[:limit]
+            candidates, rank = candidates[top], rank[top]
+        return [self.recipes[position] for position in candidates[np.argsort(rank)].tolist()]
+
+class RecipeCatalog:
+    """Loads the catalog file on first use and keeps its index for the process"""
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._index: Optional[RecipeIndex] = None
+
+    def index(self) -> RecipeIndex:
+        if self._index is None:
+            path = self.path or settings.RECIPES_PATH
+            if not os.path.isabs(path):
+                path = os.path.join(os.path.dirname(os.path.abspath(__file__)), path)
+            with open(path, encoding="utf-8") as catalog_file:
+                self._index = RecipeIndex(json.load(catalog_file))
+        return self._index
+
+recipe_catalog = RecipeCatalog()
@@ -1,9 +1,11 @@
-import os
-import google.generativeai as genai
-from fastapi import APIRouter, Depends, HTTPException, status
+import asyncio
+from contextlib import aclosing
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from schemas import AIChatMessageInput, AIChatMessageOutput
 from routers.auth import get_current_user # Correct function name
 from models import User # Import User if needed for dependency
+from app.integrations.llm_provider import get_llm_provider, LLMNotConfiguredError, LLMBusyError
+from app.core.sse import format_sse, sse_tokens, sse_response
 
 router = APIRouter(
     prefix="/ai-chat",
@@ -12,22 +14,14 @@ router = APIRouter(
 )
 
 # --- Gemini Configuration --- 
-genai_model = None
-genai_configured_successfully = False
+# Shared provider: non-blocking calls, a cached model and process-wide concurrency limits.
+# Messages are free text that may mention health details, so answers are only
+# cached for the user who asked.
+llm_provider = get_llm_provider()
 
-try:
-    api_key = os.getenv("GEMINI_API_KEY")
-    if api_key:
-        genai.configure(api_key=api_key)
-        # Define the model (e.g., gemini-1.5-flash)
-        genai_model = genai.GenerativeModel('gemini-1.5-flash') 
-        genai_configured_successfully = True
-        print("Gemini API configured successfully.")
-    else:
-        print("Warning: GEMINI_API_KEY environment variable not set. AI Chat will not function.")
-except Exception as e:
-    print(f"Error configuring Gemini API: {e}")
-    # genai_configured_successfully remains False
+def cache_scope(user: User) -> str:
+    # Prefixed so SQL user ids cannot collide with Firebase uids used by /api/v1/ai
+    return f"sql-user:{user.id}"
 
 # --- API Endpoint --- 
 
@@ -38,23 +32,23 @@ async def handle_chat_message(
 ):
     """Receives a user message and returns a response from the Gemini AI model."""
     
-    # Check if Gemini was configured successfully at startup
-    if not genai_configured_successfully or not genai_model:
-         raise HTTPException(
+    try:
+        ai_response = await llm_provider.complete(chat_input.message, cache_scope=cache_scope(current_user), cache_query=chat_input.message)
+    except LLMNotConfiguredError:
+        raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail="AI Chat service is not configured or unavailable."
         )
-        
-    try:
-        # Generate content using the pre-configured model
-        response = genai_model.generate_content(chat_input.message)
-        
-        # Optional: Check for safety ratings or blocked prompts
-        # if response.prompt_feedback.block_reason:
-        #     raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Request blocked due to safety concerns.")
-
-        ai_response = response.text
-        
+    except LLMBusyError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="AI Chat service is busy. Please try again shortly."
+        )
+    except asyncio.TimeoutError:
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail="AI service timed out."
+        )
     except Exception as e:
         print(f"Error generating response from Gemini: {e}")
         # Consider more specific error handling based on Gemini exceptions if needed
@@ -65,4 +59,32 @@ async def handle_chat_message(
 
     return AIChatMessageOutput(response=ai_response)
 
+@router.post("/chat/stream")
+async def stream_chat_message(
+    chat_input: AIChatMessageInput,
+    request: Request,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Streams the Gemini response as server-sent events: one `data: {"token": ...}`
+    event per chunk, then `event: done`, or `event: error` if generation fails.
+    Generation is cancelled when the client disconnects.
+    """
+    async def events():
+        try:
+            async with aclosing(sse_tokens(request, llm_provider.stream(chat_input.message, cache_scope=cache_scope(current_user), cache_query=chat_input.message))) as stream:
+                async for event in stream:
+                    yield event
+        except LLMNotConfiguredError:
+            yield format_sse({"detail": "AI Chat service is not configured or unavailable."}, event="error")
+        except LLMBusyError:
+            yield format_sse({"detail": "AI Chat service is busy. Please try again shortly."}, event="error")
+        except asyncio.TimeoutError:
+            yield format_sse({"detail": "AI service timed out."}, event="error")
+        except Exception as e:
+            print(f"Error streaming response from Gemini: {e}")
+            yield format_sse({"detail": "Failed to get response from AI service."}, event="error")
+
+    return sse_response(events())
+
 # Add more endpoints if needed, e.g., for managing chat history 
\ No newline at end of file
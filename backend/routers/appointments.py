@@ -2,15 +2,17 @@
 """
 Appointment management routes for HealthHub API
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from datetime import datetime
 
 from database import get_db
 import models
 import schemas
 from routers.auth import get_current_user
+from app.core.pagination import paginate_query, NEXT_CURSOR_HEADER
+from routers.dashboard import snapshot_appointment_added, invalidate_snapshot
 
 router = APIRouter(
     prefix="/appointments",
@@ -48,14 +50,16 @@ async def create_appointment(
     db.add(db_appointment)
     db.commit()
     db.refresh(db_appointment)
+    await snapshot_appointment_added(db_appointment, doctor.name)
     
     return db_appointment
 
 @router.get("/", response_model=List[schemas.AppointmentResponse])
 async def get_appointments(
+    response: Response,
     current_user: models.User = Depends(get_current_user),
     db: Session = Depends(get_db),
-    skip: int = 0,
+    cursor: Optional[str] = None,
     limit: int = 100,
     status: str = None
 ):
@@ -74,7 +78,12 @@ async def get_appointments(
     if status:
         query = query.filter(models.Appointment.status == status)
     
-    appointments = query.offset(skip).limit(limit).all()
+    # Soonest first, so upcoming appointments lead the list
+    appointments, next_cursor = paginate_query(
+        query, models.Appointment.appointment_time, models.Appointment.id, cursor=cursor, limit=limit, ascending=True
+    )
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     return appointments
 
 @router.get("/{appointment_id}", response_model=schemas.AppointmentResponse)
@@ -148,6 +157,7 @@ async def update_appointment(
     
     db.commit()
     db.refresh(appointment)
+    await invalidate_snapshot(appointment.patient_id)
     
     return appointment
 
@@ -179,5 +189,6 @@ async def cancel_appointment(
     # Update status to cancelled instead of deleting
     appointment.status = "cancelled"
     db.commit()
+    await invalidate_snapshot(appointment.patient_id)
     
     return None
@@ -1,164 +1,428 @@
-from fastapi import APIRouter, Depends, HTTPException
-from typing import Dict, Any, List
+from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Dict, Any, List, Optional, Awaitable
+from sqlalchemy import func, text
 from sqlalchemy.orm import Session
-from datetime import datetime, timedelta
-from app.db.mongodb import get_db
-import motor.motor_asyncio
-import random
+from contextlib import contextmanager
+from datetime import datetime
+from time import perf_counter
+import asyncio
+
+from database import SessionLocal
+import models
+from routers.auth import get_current_user
+from vitals_store import vitals_store, CANONICAL_UNITS
+from app.core.config import settings
+from app.core.metrics import LatencyRecorder
+from app.repositories.dashboard_snapshot_repo import DashboardSnapshotRepository, RECENT_REPORTS, UPCOMING_APPOINTMENTS
+from app.services.timeline_service import TimelineService
+from app.services.insights_service import InsightsService, is_significant_change
 
 router = APIRouter(
     prefix="/api/dashboard",
     tags=["Dashboard"]
 )
 
-# Placeholder dependency for getting current user
-async def get_current_user_id():
-    return "user_123"
+snapshot_repo = DashboardSnapshotRepository()
+timeline_service = TimelineService()
+insights_service = InsightsService()
 
-@router.get("/summary", response_model=Dict[str, Any])
-async def get_dashboard_summary(
-    user_id: str = Depends(get_current_user_id),
-    db: motor.motor_asyncio.AsyncIOMotorDatabase = Depends(get_db)
-):
+# Per-section latency, plus "<section>.timeout" / "<section>.error" entries for misses
+dashboard_metrics = LatencyRecorder()
+
+# Deadline for each summary section; a slower section is left out of the response
+SECTION_TIMEOUTS = {
+    "snapshot": settings.DASHBOARD_SECTION_TIMEOUT_SECONDS,
+    "timeline": settings.DASHBOARD_SECTION_TIMEOUT_SECONDS,
+    "risk_assessments": settings.DASHBOARD_SECTION_TIMEOUT_SECONDS
+}
+
+RECENT_TIMELINE_EVENTS = 5
+
+UPCOMING_STATUSES = [models.AppointmentStatus.scheduled, models.AppointmentStatus.pending]
+
+def _value(field):
+    # Enum columns come back as enums from queries but as plain strings on freshly created rows
+    return getattr(field, "value", field)
+
+def vital_entry(record) -> Dict[str, Any]:
+    return {"id": record.id, "value": record.value, "unit": _value(record.unit), "recorded_at": record.recorded_at}
+
+def report_entry(document) -> Dict[str, Any]:
+    return {"id": document.id, "file_name": document.file_name, "category": _value(document.category), "uploaded_at": document.uploaded_at}
+
+def appointment_entry(appointment, doctor_name: str) -> Dict[str, Any]:
+    return {
+        "id": appointment.id,
+        "doctor": doctor_name,
+        "appointment_type": _value(appointment.appointment_type),
+        "appointment_time": appointment.appointment_time
+    }
+
+def build_snapshot(db: Session, user_id: int) -> Dict[str, Any]:
     """
-    Returns a unified dashboard summary including vitals, timeline, reports, and appointments.
-    Fetches real data from MongoDB if available, otherwise returns realistic placeholder data
-    to keep the UI populated.
+    Assembles the dashboard snapshot from the source tables. Used on the first
+    load and after an edit/delete invalidated the stored snapshot.
     """
-    today = datetime.now()
-    
-    # In a fully wired app, we would query:
-    # 1. db.vitals.find_one({"user_id": user_id}, sort=[("date", -1)])
-    # 2. db.appointments.find({"user_id": user_id, "date": {"$gte": today}})
-    # 3. db.health_records.find({"user_id": user_id}).sort("date", -1).limit(3)
-    
+    vitals = {}
+    for record_type in models.HealthRecordType:
+        latest = db.query(models.HealthRecord).filter(
+            models.HealthRecord.user_id == user_id,
+            models.HealthRecord.record_type == record_type
+        ).order_by(models.HealthRecord.recorded_at.desc()).first()
+        if latest:
+            vitals[record_type.value] = [vital_entry(latest)]
+
+        # Wearable streams only exist in the time-series store
+        streamed = vitals_store.latest(db, user_id, record_type)
+        if streamed and (latest is None or streamed[0] > latest.recorded_at):
+            vitals[record_type.value] = [{
+                "id": None,
+                "value": streamed[1],
+                "unit": CANONICAL_UNITS[record_type].value,
+                "recorded_at": streamed[0]
+            }]
+
+    # Column query: never load file_data blobs for the summary
+    reports = db.query(
+        models.DocumentFile.id, models.DocumentFile.file_name, models.DocumentFile.category, models.DocumentFile.uploaded_at
+    ).filter(models.DocumentFile.user_id == user_id).order_by(models.DocumentFile.uploaded_at.desc()).limit(RECENT_REPORTS).all()
+
+    appointments = db.query(models.Appointment, models.User.name).join(
+        models.User, models.Appointment.doctor_id == models.User.id
+    ).filter(
+        models.Appointment.patient_id == user_id,
+        models.Appointment.appointment_time >= datetime.utcnow(),
+        models.Appointment.status.in_(UPCOMING_STATUSES)
+    ).order_by(models.Appointment.appointment_time).limit(UPCOMING_APPOINTMENTS).all()
+
+    # The highest id behind each count tells a raced rebuild which replayed updates it already counted
+    counts, latest_ids = {}, {}
+    for counter, column, owner in (
+        ("health_records", models.HealthRecord.id, models.HealthRecord.user_id),
+        ("documents", models.DocumentFile.id, models.DocumentFile.user_id),
+        ("appointments", models.Appointment.id, models.Appointment.patient_id)
+    ):
+        counts[counter], latest_ids[counter] = db.query(func.count(column), func.max(column)).filter(owner == user_id).one()
+
+    return {
+        "vitals": vitals,
+        "recent_reports": [report_entry(r) for r in reports],
+        "upcoming_appointments": [appointment_entry(a, doctor_name) for a, doctor_name in appointments],
+        "counts": counts,
+        "latest_ids": latest_ids
+    }
+
+@contextmanager
+def section_session(name: str):
+    """
+    Session for a section running in a worker thread. A timed-out section only
+    abandons its thread, so the database is given the same deadline and cancels
+    the statement itself: PostgreSQL through statement_timeout, SQLite through a
+    progress handler that interrupts it.
+    """
+    db = SessionLocal()
+    timeout = SECTION_TIMEOUTS[name]
+    sqlite = None
+    try:
+        dialect = db.get_bind().dialect.name
+        if dialect == "postgresql":
+            # SET LOCAL lasts until the session's read-only transaction ends
+            db.execute(text(f"SET LOCAL statement_timeout = {int(timeout * 1000)}"))
+        elif dialect == "sqlite":
+            deadline = perf_counter() + timeout
+            sqlite = db.connection().connection.driver_connection
+            sqlite.set_progress_handler(lambda: perf_counter() > deadline, 1000)
+        yield db
+    finally:
+        if sqlite is not None:
+            sqlite.set_progress_handler(None, 1000)
+        db.close()
+
+def _build_snapshot_in_session(user_id: int) -> Dict[str, Any]:
+    # Runs in a worker thread with its own session, so a section that times out
+    # never shares a session with the request that abandoned it
+    with section_session("snapshot") as db:
+        return build_snapshot(db, user_id)
+
+async def load_snapshot(user_id: int) -> Dict[str, Any]:
+    """
+    Reads the user's snapshot with one _id lookup, rebuilding it when missing
+    or when one of its upcoming appointments has passed. Updates that race the
+    rebuild are replayed onto it before it is stored.
+    """
+    try:
+        snapshot = await snapshot_repo.get(str(user_id))
+    except Exception as e:
+        print(f"[DASHBOARD] Snapshot store unavailable ({e}). Building summary on demand.")
+        return await asyncio.to_thread(_build_snapshot_in_session, user_id)
+
+    now = datetime.utcnow()
+    if snapshot is None or snapshot.get("stale") or any(a["appointment_time"] < now for a in snapshot.get("upcoming_appointments", [])):
+        try:
+            version = await snapshot_repo.begin_rebuild(str(user_id))
+        except Exception as e:
+            print(f"[DASHBOARD] Snapshot store unavailable ({e}). Building summary on demand.")
+            return await asyncio.to_thread(_build_snapshot_in_session, user_id)
+        snapshot = await asyncio.to_thread(_build_snapshot_in_session, user_id)
+        try:
+            snapshot = await snapshot_repo.store_rebuilt(str(user_id), snapshot, version)
+            await insights_service.track(str(user_id))
+        except Exception as e:
+            print(f"[DASHBOARD] Could not store snapshot for user {user_id} ({e}).")
+    return snapshot
+
+async def _update_snapshot(user_id: int, update):
+    # Snapshot maintenance must never fail the write that triggered it
+    try:
+        await update
+    except Exception as e:
+        print(f"[DASHBOARD] Could not update snapshot for user {user_id} ({e}).")
+
+async def _fold_vital(user_id: int, record_type: str, entry: Dict[str, Any], new_rows: int):
+    previous = await snapshot_repo.push_vital(str(user_id), record_type, entry, new_rows=new_rows)
+    # Only a meaningful change in a vital justifies regenerating the AI insights early
+    if previous is not None and is_significant_change(record_type, previous[0]["value"] if previous else None, entry["value"]):
+        await insights_service.mark_stale(str(user_id))
+
+async def snapshot_vital_added(record: models.HealthRecord):
+    await _update_snapshot(record.user_id, _fold_vital(record.user_id, _value(record.record_type), vital_entry(record), 1))
+
+async def snapshot_vital_streamed(user_id: int, record_type: models.HealthRecordType, recorded_at: datetime, value: float):
+    # Streamed readings live in the vitals store, not health_records, so they add no rows to the count
+    entry = {"id": None, "value": value, "unit": CANONICAL_UNITS[record_type].value, "recorded_at": recorded_at}
+    await _update_snapshot(user_id, _fold_vital(user_id, record_type.value, entry, 0))
+
+async def snapshot_report_added(document: models.DocumentFile):
+    await _update_snapshot(document.user_id, snapshot_repo.push_report(str(document.user_id), report_entry(document)))
+
+async def snapshot_appointment_added(appointment: models.Appointment, doctor_name: str):
+    await _update_snapshot(appointment.patient_id, snapshot_repo.push_appointment(str(appointment.patient_id), appointment_entry(appointment, doctor_name)))
+
+async def invalidate_snapshot(user_id: int):
+    await _update_snapshot(user_id, snapshot_repo.invalidate(str(user_id)))
+
+def _latest_vital(snapshot: Dict[str, Any], record_type: models.HealthRecordType) -> Optional[Dict[str, Any]]:
+    entries = snapshot.get("vitals", {}).get(record_type.value) or []
+    return entries[0] if entries else None
+
+def _heart_rate_status(bpm: float) -> str:
+    if bpm < 60:
+        return "Low"
+    if bpm > 100:
+        return "High"
+    return "Normal"
+
+def _format_date(value: datetime) -> str:
+    return value.strftime("%d %b %Y")
+
+def _render_snapshot(snapshot: Dict[str, Any]) -> Dict[str, Any]:
+    heart_rate = _latest_vital(snapshot, models.HealthRecordType.heart_rate)
+    blood_pressure = _latest_vital(snapshot, models.HealthRecordType.blood_pressure)
+    blood_glucose = _latest_vital(snapshot, models.HealthRecordType.blood_glucose)
+    weight = _latest_vital(snapshot, models.HealthRecordType.weight)
+    upcoming = snapshot.get("upcoming_appointments") or []
+
     return {
-        "health_score": {
-            "score": 87,
-            "status": "Excellent",
-            "message": "You're doing great! Keep maintaining your healthy habits."
-        },
         "vitals": {
-            "heart_rate": {"value": 72, "unit": "bpm", "status": "Normal"},
+            "heart_rate": {"value": heart_rate["value"], "unit": heart_rate["unit"], "status": _heart_rate_status(heart_rate["value"])} if heart_rate else None,
+            # Sleep, steps and calories have no data source yet
             "sleep": {"value": "7h 45m", "status": "Good"},
             "steps": {"value": 8432, "status": "Today"},
             "calories": {"value": 1248, "status": "Today"}
         },
         "overview": {
-            "blood_pressure": "120/80",
-            "blood_sugar": 98,
-            "bmi": 24.5,
-            "weight": 65
+            "blood_pressure": blood_pressure["value"] if blood_pressure else None,
+            "blood_sugar": blood_glucose["value"] if blood_glucose else None,
+            "bmi": None,
+            "weight": weight["value"] if weight else None
         },
-        "timeline": [
-            {
-                "time": "08:00 AM",
-                "title": "Vitamin D",
-                "description": "1 tablet",
-                "type": "medication",
-                "status": "completed"
-            },
-            {
-                "time": "10:30 AM",
-                "title": "Morning Walk",
-                "description": "30 min",
-                "type": "fitness",
-                "status": "completed"
-            },
-            {
-                "time": "01:00 PM",
-                "title": "Lunch",
-                "description": "Eat healthy",
-                "type": "diet",
-                "status": "completed"
-            },
-            {
-                "time": "06:00 PM",
-                "title": "Workout",
-                "description": "Strength Training",
-                "type": "fitness",
-                "status": "pending"
-            },
-            {
-                "time": "09:30 PM",
-                "title": "Sleep",
-                "description": "7-8 hours",
-                "type": "sleep",
-                "status": "upcoming"
-            }
-        ],
         "recent_reports": [
             {
-                "id": "1",
-                "title": "Complete Blood Count",
-                "date": "12 May 2024",
-                "status": "Normal",
-                "color": "emerald"
-            },
-            {
-                "id": "2",
-                "title": "Thyroid Profile",
-                "date": "08 May 2024",
-                "status": "Normal",
+                "id": str(report["id"]),
+                "title": report["file_name"],
+                "date": _format_date(report["uploaded_at"]),
+                "status": report["category"],
                 "color": "emerald"
-            },
-            {
-                "id": "3",
-                "title": "Vitamin D Test",
-                "date": "01 May 2024",
-                "status": "Low",
-                "color": "amber"
             }
+            for report in snapshot.get("recent_reports", [])
         ],
         "upcoming_appointment": {
-            "doctor": "Dr. Sarah Johnson",
-            "specialty": "Cardiologist",
-            "date": "15 May 2024",
+            "doctor": upcoming[0]["doctor"],
+            "specialty": upcoming[0]["appointment_type"],
+            "date": _format_date(upcoming[0]["appointment_time"]),
+            "time": upcoming[0]["appointment_time"].strftime("%I:%M %p"),
             "location": "Care+ Hospital",
             "image": "https://images.unsplash.com/photo-1559839734-2b71ea197ec2?w=100&h=100&fit=crop"
+        } if upcoming else None,
+        "counts": snapshot.get("counts", {})
+    }
+
+def _render_timeline(events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    if not events:
+        return PLACEHOLDER_TIMELINE
+    return [
+        {
+            "time": event["timestamp"].strftime("%I:%M %p"),
+            "title": event["title"],
+            "description": event["description"],
+            "type": event["event_type"],
+            "status": "completed"
         }
+        for event in events
+    ]
+
+def render_summary(snapshot: Optional[Dict[str, Any]], events: Optional[List[Dict[str, Any]]] = None, risks: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+    """
+    Builds the summary response. A section passed as None (timed out or
+    failed) is rendered as null and listed in `unavailable_sections`.
+    """
+    unavailable = [name for name, section in (("snapshot", snapshot), ("timeline", events), ("risk_assessments", risks)) if section is None]
+    return {
+        # No scoring model yet; static until health score calculation lands
+        "health_score": {
+            "score": 87,
+            "status": "Excellent",
+            "message": "You're doing great! Keep maintaining your healthy habits."
+        },
+        **(_render_snapshot(snapshot) if snapshot is not None else {
+            "vitals": None, "overview": None, "recent_reports": None, "upcoming_appointment": None, "counts": None
+        }),
+        "timeline": _render_timeline(events) if events is not None else None,
+        "risk_assessments": risks,
+        "partial": bool(unavailable),
+        "unavailable_sections": unavailable
+    }
+
+# Daily schedule shown until medication/fitness plans feed the dashboard
+PLACEHOLDER_TIMELINE: List[Dict[str, Any]] = [
+    {
+        "time": "08:00 AM",
+        "title": "Vitamin D",
+        "description": "1 tablet",
+        "type": "medication",
+        "status": "completed"
+    },
+    {
+        "time": "10:30 AM",
+        "title": "Morning Walk",
+        "description": "30 min",
+        "type": "fitness",
+        "status": "completed"
+    },
+    {
+        "time": "01:00 PM",
+        "title": "Lunch",
+        "description": "Eat healthy",
+        "type": "diet",
+        "status": "completed"
+    },
+    {
+        "time": "06:00 PM",
+        "title": "Workout",
+        "description": "Strength Training",
+        "type": "fitness",
+        "status": "pending"
+    },
+    {
+        "time": "09:30 PM",
+        "title": "Sleep",
+        "description": "7-8 hours",
+        "type": "sleep",
+        "status": "upcoming"
     }
+]
+
+def _latest_risks_in_session(user_id: int) -> List[Dict[str, Any]]:
+    with section_session("risk_assessments") as db:
+        assessments = db.query(models.DiseaseRisk).filter(
+            models.DiseaseRisk.user_id == user_id
+        ).order_by(models.DiseaseRisk.assessed_at.desc()).limit(20).all()
+
+    latest = {}
+    for risk in assessments:
+        latest.setdefault(risk.disease_name, {
+            "disease": risk.disease_name,
+            "risk_score": risk.risk_score,
+            "assessed_at": risk.assessed_at
+        })
+    return list(latest.values())
+
+async def _load_timeline(user_id: int) -> List[Dict[str, Any]]:
+    return await timeline_service.get_user_timeline(str(user_id), limit=RECENT_TIMELINE_EVENTS)
+
+async def _run_section(name: str, fetch: Awaitable) -> Optional[Any]:
+    """
+    Awaits one section under its deadline. Returns None when it times out or
+    fails so the rest of the dashboard still renders.
+    """
+    began = perf_counter()
+    outcome = None
+    try:
+        return await asyncio.wait_for(fetch, timeout=SECTION_TIMEOUTS[name])
+    except asyncio.TimeoutError:
+        outcome = "timeout"
+    except Exception as e:
+        outcome = "error"
+        print(f"[DASHBOARD] Section '{name}' failed ({e}).")
+    finally:
+        elapsed_ms = (perf_counter() - began) * 1000
+        dashboard_metrics.record(name, elapsed_ms)
+        if outcome:
+            dashboard_metrics.record(f"{name}.{outcome}", elapsed_ms)
+    return None
+
+@router.get("/summary", response_model=Dict[str, Any])
+async def get_dashboard_summary(
+    current_user: models.User = Depends(get_current_user)
+):
+    """
+    Returns a unified dashboard summary including vitals, timeline, reports, and appointments.
+    Sections are fetched concurrently, each under its own deadline, so the page
+    loads in the time of the slowest section rather than the sum. Vitals,
+    reports and appointments come from the user's materialized snapshot, the
+    timeline from MongoDB and risk assessments from the SQL database.
+    """
+    with dashboard_metrics.measure("summary"):
+        snapshot, events, risks = await asyncio.gather(
+            _run_section("snapshot", load_snapshot(current_user.id)),
+            _run_section("timeline", _load_timeline(current_user.id)),
+            _run_section("risk_assessments", asyncio.to_thread(_latest_risks_in_session, current_user.id))
+        )
+    return render_summary(snapshot, events, risks)
+
+@router.get("/metrics", response_model=Dict[str, Any])
+async def get_dashboard_metrics(
+    current_user: models.User = Depends(get_current_user)
+):
+    """Per-section dashboard latency (admins only)"""
+    if current_user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admins can access dashboard metrics"
+        )
+    return dashboard_metrics.snapshot()
 
 @router.get("/ai-insights", response_model=Dict[str, Any])
 async def get_dashboard_insights(
-    user_id: str = Depends(get_current_user_id)
+    current_user: models.User = Depends(get_current_user)
 ):
     """
     Returns AI-generated daily brief and recommendations.
-    Separated from /summary so the LLM generation delay doesn't block the main dashboard load.
+    Served from insights precomputed by the background InsightsScheduler, so
+    no LLM call ever happens on the dashboard path. `generated_at` is null
+    until the first brief has been generated.
     """
-    # In production, this would call Gemini with the user's latest vitals context.
+    try:
+        insights = await insights_service.get(str(current_user.id))
+    except Exception as e:
+        print(f"[DASHBOARD] Insights store unavailable ({e}).")
+        insights = None
+
+    if not insights or not insights.get("generated_at"):
+        return {"daily_brief": [], "recommendations": [], "generated_at": None, "stale": True}
     return {
-        "daily_brief": [
-            {"text": "Your sleep quality improved by 12%", "color": "emerald"},
-            {"text": "You have a workout scheduled at 6:00 PM", "color": "blue"},
-            {"text": "Drink more water. You're 1.2L behind", "color": "orange"},
-            {"text": "Vitamin D supplement time: 10:00 AM", "color": "purple"}
-        ],
-        "recommendations": [
-            {
-                "action": "Increase",
-                "topic": "Water Intake",
-                "description": "+2 glasses daily",
-                "type": "hydration"
-            },
-            {
-                "action": "Add More",
-                "topic": "Protein",
-                "description": "For muscle health",
-                "type": "nutrition"
-            },
-            {
-                "action": "Reduce",
-                "topic": "Sugar Intake",
-                "description": "For better energy",
-                "type": "diet"
-            },
-            {
-                "action": "Try",
-                "topic": "Meditation",
-                "description": "For stress relief",
-                "type": "mental"
-            }
-        ]
+        "daily_brief": insights["daily_brief"],
+        "recommendations": insights["recommendations"],
+        "generated_at": insights["generated_at"],
+        "stale": insights.get("stale", False)
     }
@@ -2,15 +2,19 @@
 """
 Diet management routes for HealthHub API
 """
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import insert
+from sqlalchemy.orm import Session, selectinload
 from typing import List, Dict, Any
 from datetime import datetime
+import asyncio
 
 from database import get_db
 import models
 import schemas
 from routers.auth import get_current_user
+from meal_planner import plan_meals
+from recipe_search import recipe_catalog
 
 router = APIRouter(
     prefix="/diet",
@@ -47,7 +51,9 @@ async def get_diet_plans(
     db: Session = Depends(get_db)
 ):
     """Get all diet plans for the user"""
-    plans = db.query(models.DietPlan).filter(
+    plans = db.query(models.DietPlan).options(
+        selectinload(models.DietPlan.meals)
+    ).filter(
         models.DietPlan.user_id == current_user.id
     ).all()
     
@@ -61,7 +67,9 @@ async def get_current_diet_plan(
     """Get the user's current active diet plan"""
     today = datetime.now().date()
     
-    plan = db.query(models.DietPlan).filter(
+    plan = db.query(models.DietPlan).options(
+        selectinload(models.DietPlan.meals)
+    ).filter(
         models.DietPlan.user_id == current_user.id,
         models.DietPlan.start_date <= today,
         (models.DietPlan.end_date >= today) | (models.DietPlan.end_date.is_(None))
@@ -100,7 +108,8 @@ async def add_meal_to_plan(
         diet_plan_id=plan_id,
         name=meal.name,
         calories=meal.calories,
-        time_of_day=meal.time_of_day
+        time_of_day=meal.time_of_day,
+        day=meal.day
     )
     
     db.add(db_meal)
@@ -109,61 +118,121 @@ async def add_meal_to_plan(
     
     return db_meal
 
+@router.post("/plans/{plan_id}/generate", response_model=schemas.GeneratedMealPlanResponse, status_code=status.HTTP_201_CREATED)
+async def generate_meal_plan(
+    plan_id: int,
+    request: schemas.MealPlanGenerate,
+    current_user: models.User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Fill a diet plan with catalog recipes for every day and meal time,
+    chosen to meet the plan's daily calorie and macro targets.
+    """
+    plan = db.query(models.DietPlan).filter(
+        models.DietPlan.id == plan_id,
+        models.DietPlan.user_id == current_user.id
+    ).first()
+    
+    if plan is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Diet plan not found"
+        )
+    
+    try:
+        result = await asyncio.to_thread(
+            plan_meals,
+            recipe_catalog.index(),
+            (plan.daily_calories, plan.protein_grams, plan.carbs_grams, plan.fat_grams),
+            days=request.days,
+            diet_type=request.diet_type,
+            exclude_ingredients=request.exclude_ingredients
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=str(e)
+        )
+    
+    if request.replace_existing:
+        db.query(models.Meal).filter(models.Meal.diet_plan_id == plan_id).delete(synchronize_session=False)
+    # One multi-row INSERT for the whole plan
+    meals = db.scalars(
+        insert(models.Meal).returning(models.Meal, sort_by_parameter_order=True),
+        [
+            {
+                "diet_plan_id": plan_id,
+                "name": meal.recipe["title"],
+                "calories": meal.recipe["calories"],
+                "time_of_day": meal.time_of_day,
+                "day": meal.day
+            }
+            for meal in result.meals
+        ]
+    ).all()
+    db.commit()
+    
+    days = []
+    for day, totals in enumerate(result.totals.round().astype(int).tolist()):
+        days.append({
+            "day": day,
+            "calories": totals[0],
+            "protein_grams": totals[1],
+            "carbs_grams": totals[2],
+            "fat_grams": totals[3],
+            "meals": [
+                {
+                    "id": db_meal.id,
+                    "diet_plan_id": plan_id,
+                    "name": db_meal.name,
+                    "calories": db_meal.calories,
+                    "time_of_day": db_meal.time_of_day,
+                    "day": day,
+                    "recipe_id": meal.recipe["id"],
+                    "protein": meal.recipe["protein"],
+                    "carbs": meal.recipe["carbs"],
+                    "fat": meal.recipe["fat"]
+                }
+                for meal, db_meal in zip(result.meals, meals) if meal.day == day
+            ]
+        })
+    
+    return {"plan_id": plan_id, "days": days}
+
 @router.get("/recipes", response_model=List[Dict[str, Any]])
 async def get_recipes(
     current_user: models.User = Depends(get_current_user),
     diet_type: str = None,
     meal_type: str = None,
-    max_calories: int = None
+    max_calories: int = None,
+    min_calories: int = None,
+    min_protein: int = None,
+    max_carbs: int = None,
+    max_fat: int = None,
+    max_minutes: int = None,
+    ingredients: List[str] = Query([]),
+    exclude_ingredients: List[str] = Query([]),
+    sort: str = Query("protein", pattern="^(protein|calories|time)$"),
+    limit: int = Query(20, ge=1, le=100)
 ):
     """
-    Get recipe recommendations based on user preferences.
-    This is a placeholder that would connect to a recipe API or database.
+    Search the recipe catalog. Every given filter must match: diet_type and
+    meal_type are tags, each ingredient must appear and no excluded one may.
+    Sorted by protein per calorie, calories or preparation time.
     """
-    # Mock recipes - in a real app, this would come from a database or external API
-    recipes = [
-        {
-            "id": 1,
-            "title": "Mediterranean Bowl",
-            "time": "25 mins",
-            "difficulty": "Easy",
-            "calories": 450,
-            "protein": 22,
-            "carbs": 55,
-            "fat": 15,
-            "ingredients": ["quinoa", "chickpeas", "cucumber", "tomato", "feta cheese", "olive oil"],
-            "steps": ["Cook quinoa", "Combine all ingredients", "Drizzle with olive oil"]
-        },
-        {
-            "id": 2,
-            "title": "Grilled Chicken Salad",
-            "time": "20 mins",
-            "difficulty": "Easy",
-            "calories": 380,
-            "protein": 35,
-            "carbs": 15,
-            "fat": 18,
-            "ingredients": ["chicken breast", "mixed greens", "cherry tomatoes", "cucumber", "balsamic vinegar"],
-            "steps": ["Grill chicken", "Chop vegetables", "Combine and dress with balsamic"]
+    return recipe_catalog.index().search(
+        diet_type=diet_type,
+        meal_type=meal_type,
+        ingredients=ingredients,
+        exclude_ingredients=exclude_ingredients,
+        ranges={
+            "calories": (min_calories, max_calories),
+            "protein": (min_protein, None),
+            "carbs": (None, max_carbs),
+            "fat": (None, max_fat),
+            "minutes": (None, max_minutes),
         },
-        {
-            "id": 3,
-            "title": "Quinoa Veggie Stir-fry",
-            "time": "30 mins",
-            "difficulty": "Medium",
-            "calories": 420,
-            "protein": 15,
-            "carbs": 65,
-            "fat": 12,
-            "ingredients": ["quinoa", "bell peppers", "broccoli", "carrots", "soy sauce", "garlic"],
-            "steps": ["Cook quinoa", "Stir-fry vegetables", "Combine and season"]
-        }
-    ]
-    
-    # Filter based on parameters (if provided)
-    filtered_recipes = recipes
-    
-    if max_calories:
-        filtered_recipes = [r for r in filtered_recipes if r["calories"] <= max_calories]
-    
-    return filtered_recipes
+        sort=sort,
+        limit=limit
+    )
@@ -1,5 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
 from typing import List
 from datetime import datetime, date
 
@@ -62,7 +62,10 @@ async def get_patient_history(
             detail="Patient not found or not accessible"
         )
     
-    patient_history = db.query(PatientHistory).filter(
+    patient_history = db.query(PatientHistory).options(
+        selectinload(PatientHistory.advice_history),
+        selectinload(PatientHistory.risk_reports)
+    ).filter(
         PatientHistory.patient_id == patient_id
     ).first()
     
@@ -0,0 +1,248 @@
+"""
+Full record export for a patient, streamed section by section from SQL and
+MongoDB as NDJSON or CSV, optionally gzip-compressed on the fly.
+"""
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from typing import Any, AsyncIterator, List, Optional, Sequence, Tuple
+from datetime import date, datetime
+from enum import Enum
+from itertools import repeat
+import asyncio
+import csv
+import io
+import json
+import zlib
+
+import numpy as np
+from bson import ObjectId
+
+from database import get_db, SessionLocal
+import models
+from routers.auth import get_current_user
+from app.db.mongodb import get_db as get_mongo_db
+from vitals_store import CANONICAL_UNITS, decode_chunk, vitals_store
+
+router = APIRouter(
+    prefix="/api/export",
+    tags=["export"],
+)
+
+# Rows fetched per round trip from the SQL and Mongo cursors
+EXPORT_BATCH = 1000
+
+def _plain(value: Any) -> Any:
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, ObjectId):
+        return str(value)
+    return value
+
+class NDJSONWriter:
+    """One JSON object per line, tagged with its section."""
+    media_type = "application/x-ndjson"
+    extension = "ndjson"
+
+    def header(self, section: str, columns: Sequence[str]) -> str:
+        return ""
+
+    def rows(self, section: str, columns: Sequence[str], rows: List[Tuple]) -> str:
+        return "".join(
+            json.dumps({"section": section, **dict(zip(columns, row))}, default=_plain) + "\n"
+            for row in rows
+        )
+
+    def error(self, section: str) -> str:
+        return json.dumps({"section": section, "error": "Section could not be exported"}) + "\n"
+
+class CSVWriter:
+    """
+    One CSV stream whose first column names the section. Each section starts
+    with its own header row, so splitting on that column gives plain CSVs.
+    Nested values (factors, metadata) are written as JSON.
+    """
+    media_type = "text/csv"
+    extension = "csv"
+
+    def _write(self, rows) -> str:
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        return buffer.getvalue()
+
+    def _cell(self, value: Any) -> Any:
+        if isinstance(value, (dict, list)):
+            return json.dumps(value, default=_plain)
+        return _plain(value)
+
+    def header(self, section: str, columns: Sequence[str]) -> str:
+        return self._write([["section", *columns]])
+
+    def rows(self, section: str, columns: Sequence[str], rows: List[Tuple]) -> str:
+        return self._write([section, *map(self._cell, row)] for row in rows)
+
+    def error(self, section: str) -> str:
+        return self._write([[section, "error", "Section could not be exported"]])
+
+WRITERS = {"ndjson": NDJSONWriter, "csv": CSVWriter}
+
+async def _sql_batches(db: Session, statement, batch_size: int = EXPORT_BATCH) -> AsyncIterator[List[Tuple]]:
+    # yield_per streams through a server-side cursor on PostgreSQL; fetching
+    # runs in a worker thread so the event loop keeps serving other requests
+    result = await asyncio.to_thread(db.execute, statement.execution_options(yield_per=batch_size))
+    partitions = result.partitions()
+    while True:
+        batch = await asyncio.to_thread(next, partitions, None)
+        if batch is None:
+            return
+        yield [tuple(row) for row in batch]
+
+async def _vital_batches(db: Session, user_id: int) -> AsyncIterator[List[Tuple]]:
+    # One chunk (a day of one vital type) per batch. Readings mirrored from
+    # health_records are left out; that section already exports them.
+    statement = select(
+        models.VitalChunk.user_id, models.VitalChunk.record_type, models.VitalChunk.chunk_start, models.VitalChunk.data
+    ).where(models.VitalChunk.user_id == user_id).order_by(models.VitalChunk.record_type, models.VitalChunk.chunk_start)
+    async for chunks in _sql_batches(db, statement, batch_size=16):
+        recorded = await asyncio.to_thread(vitals_store.manual_timestamps, db, chunks)
+        for _, record_type, _, data in chunks:
+            timestamps, values = decode_chunk(data)
+            mirrored = recorded.get((user_id, record_type))
+            if mirrored is not None:
+                keep = ~np.isin(timestamps, mirrored)
+                timestamps, values = timestamps[keep], values[keep]
+            if not len(timestamps):
+                continue
+            recorded_at = timestamps.astype("datetime64[ms]").astype(str).tolist()
+            yield list(zip(repeat(record_type.value), recorded_at, values.tolist(), repeat(CANONICAL_UNITS[record_type].value)))
+
+async def _mongo_batches(collection: str, user_id: int, fields: Sequence[str], sort_field: str) -> AsyncIterator[List[Tuple]]:
+    db = await get_mongo_db()
+    cursor = db[collection].find({"user_id": str(user_id)}, {field: 1 for field in fields}).sort(sort_field, 1).batch_size(EXPORT_BATCH)
+    batch = []
+    async for doc in cursor:
+        batch.append(tuple(doc.get(field) for field in fields))
+        if len(batch) >= EXPORT_BATCH:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def _sections(db: Session, user_id: int) -> List[Tuple[str, Sequence[str], AsyncIterator[List[Tuple]]]]:
+    """(name, columns, batches) for every exported section, in export order"""
+    def sql(name: str, statement):
+        return name, list(statement.selected_columns.keys()), _sql_batches(db, statement)
+
+    def mongo(name: str, fields: Sequence[str], sort_field: str):
+        return name, ["id", *fields], _mongo_batches(name, user_id, ["_id", *fields], sort_field)
+
+    records = models.HealthRecord
+    documents = models.DocumentFile
+    appointments = models.Appointment
+    risks = models.DiseaseRisk
+    return [
+        sql("health_records", select(
+            records.id, records.record_type, records.value, records.unit, records.recorded_at, records.notes
+        ).where(records.user_id == user_id).order_by(records.recorded_at, records.id)),
+        ("vitals", ["record_type", "recorded_at", "value", "unit"], _vital_batches(db, user_id)),
+        # Metadata only; file contents stay behind the download endpoint
+        sql("documents", select(
+            documents.id, documents.file_name, documents.file_type, documents.file_size,
+            documents.category, documents.uploaded_at, documents.notes
+        ).where(documents.user_id == user_id).order_by(documents.uploaded_at, documents.id)),
+        sql("appointments", select(
+            appointments.id, appointments.appointment_time, appointments.appointment_type, appointments.status,
+            appointments.doctor_id, models.User.name.label("doctor_name"), appointments.notes
+        ).join(models.User, models.User.id == appointments.doctor_id).where(
+            appointments.patient_id == user_id
+        ).order_by(appointments.appointment_time, appointments.id)),
+        sql("risk_assessments", select(
+            risks.id, risks.disease_name, risks.risk_score, risks.factors, risks.assessed_at
+        ).where(risks.user_id == user_id).order_by(risks.assessed_at, risks.id)),
+        sql("risk_reports", select(
+            models.RiskReport.id, models.RiskReport.date, models.RiskReport.risk_level, models.RiskReport.details
+        ).where(models.RiskReport.patient_id == user_id).order_by(models.RiskReport.date, models.RiskReport.id)),
+        sql("doctor_advice", select(
+            models.PatientHistory.id, models.PatientHistory.doctor_id, models.PatientHistory.advice, models.PatientHistory.created_at
+        ).where(models.PatientHistory.patient_id == user_id).order_by(models.PatientHistory.created_at, models.PatientHistory.id)),
+        mongo("predictions", ["disease_name", "risk_score", "factors", "recommendations", "created_at"], "created_at"),
+        mongo("timeline", ["event_type", "title", "description", "metadata", "timestamp"], "timestamp"),
+    ]
+
+async def stream_export(user_id: int, writer, compress: bool = False) -> AsyncIterator[bytes]:
+    """
+    Yields the export one batch at a time, so memory stays flat however many
+    rows the patient has. A section that fails is marked with an error row
+    and the export carries on with the next one.
+    """
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None  # wbits 31: gzip container
+
+    def encode(text: str) -> bytes:
+        data = text.encode()
+        return compressor.compress(data) if compressor else data
+
+    db = SessionLocal()
+    try:
+        for section, columns, batches in _sections(db, user_id):
+            pending = writer.header(section, columns)
+            try:
+                async for rows in batches:
+                    pending += await asyncio.to_thread(writer.rows, section, columns, rows)
+                    data = encode(pending)
+                    pending = ""
+                    if data:
+                        yield data
+            except Exception as e:
+                print(f"[EXPORT] Could not export {section} for user {user_id} ({e}).")
+                db.rollback()
+                pending += writer.error(section)
+            data = encode(pending) if pending else b""
+            if data:
+                yield data
+        if compressor:
+            yield compressor.flush()
+    finally:
+        db.close()
+
+@router.get("")
+async def export_record(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    compress: bool = False,
+    patient_id: Optional[int] = None,
+    current_user: models.User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Downloads the full record: health records, streamed vitals, document
+    metadata, appointments, risk assessments and reports, doctor advice,
+    predictions and timeline. Doctors can export a patient they have an
+    appointment with by passing patient_id.
+    """
+    user_id = current_user.id
+    if patient_id is not None and patient_id != current_user.id:
+        if current_user.role != "doctor":
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Only doctors can export another patient's record"
+            )
+        appointment = db.query(models.Appointment).filter(
+            models.Appointment.doctor_id == current_user.id,
+            models.Appointment.patient_id == patient_id
+        ).first()
+        if not appointment:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Patient not found or not accessible"
+            )
+        user_id = patient_id
+
+    writer = WRITERS[format]()
+    filename = f"healthhub-export-{user_id}-{datetime.utcnow():%Y%m%d}.{writer.extension}" + (".gz" if compress else "")
+    return StreamingResponse(
+        stream_export(user_id, writer, compress),
+        media_type="application/gzip" if compress else writer.media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
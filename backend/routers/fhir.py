@@ -0,0 +1,135 @@
+"""
+FHIR bulk data export endpoints, following the async request pattern of the
+Bulk Data Access spec: kick off with $export, poll $export-status, then
+download the NDJSON files listed in the manifest.
+"""
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import FileResponse, JSONResponse
+from typing import Optional
+from pathlib import Path
+import re
+
+import models
+from routers.auth import get_current_user
+from app.core.config import settings
+from app.services.job_queue import JobQueue
+from fhir_export import FHIR_EXPORT_JOB, OUTPUT_FORMATS, RESOURCE_TYPES
+
+router = APIRouter(
+    prefix="/api/fhir",
+    tags=["fhir"],
+)
+
+job_queue = JobQueue()
+
+FILE_NAME = re.compile(rf"^({'|'.join(RESOURCE_TYPES)})\.\d{{4}}\.ndjson$")
+
+def require_admin(current_user: models.User = Depends(get_current_user)) -> models.User:
+    if current_user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admins can run bulk exports"
+        )
+    return current_user
+
+def _outcome(status_code: int, diagnostics: str) -> JSONResponse:
+    return JSONResponse(
+        status_code=status_code,
+        content={
+            "resourceType": "OperationOutcome",
+            "issue": [{"severity": "error", "code": "processing", "diagnostics": diagnostics}]
+        }
+    )
+
+async def _export_job(job_id: str, current_user: models.User):
+    job = await job_queue.get_job(job_id, user_id=str(current_user.id))
+    if not job or job["job_type"] != FHIR_EXPORT_JOB:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Export not found"
+        )
+    return job
+
+@router.get("/$export", status_code=status.HTTP_202_ACCEPTED)
+async def kick_off_export(
+    request: Request,
+    response: Response,
+    type_filter: Optional[str] = Query(None, alias="_type"),
+    output_format: str = Query("application/fhir+ndjson", alias="_outputFormat"),
+    current_user: models.User = Depends(require_admin)
+):
+    """
+    Starts a system-level export of every patient's Observation, Appointment,
+    DocumentReference and RiskAssessment resources (or the `_type` subset).
+    Poll the Content-Location URL for progress and the manifest.
+    """
+    if output_format not in OUTPUT_FORMATS:
+        return _outcome(status.HTTP_400_BAD_REQUEST, f"Unsupported _outputFormat {output_format}")
+
+    types = list(RESOURCE_TYPES)
+    if type_filter:
+        types = [t.strip() for t in type_filter.split(",") if t.strip()]
+        unsupported = [t for t in types if t not in RESOURCE_TYPES]
+        if unsupported or not types:
+            return _outcome(status.HTTP_400_BAD_REQUEST, f"Unsupported _type {', '.join(unsupported)}")
+
+    job = await job_queue.enqueue(
+        FHIR_EXPORT_JOB,
+        {"types": types, "request": str(request.url)},
+        user_id=str(current_user.id),
+        # A retry starts the export over, so do not repeat a failing one
+        max_attempts=1
+    )
+    response.headers["Content-Location"] = str(request.url_for("export_status", job_id=str(job["_id"])))
+    return {"job_id": str(job["_id"])}
+
+@router.get("/$export-status/{job_id}", name="export_status")
+async def export_status(
+    job_id: str,
+    request: Request,
+    current_user: models.User = Depends(require_admin)
+):
+    """
+    202 with an X-Progress header while the export runs, the bulk data
+    manifest once it completes, or an OperationOutcome if it failed.
+    """
+    job = await _export_job(job_id, current_user)
+    if job["status"] == "failed":
+        return _outcome(status.HTTP_500_INTERNAL_SERVER_ERROR, job.get("error") or "Export failed")
+    if job["status"] != "completed":
+        return Response(
+            status_code=status.HTTP_202_ACCEPTED,
+            headers={"X-Progress": f"{job['progress']}% {job['progress_message']}", "Retry-After": "5"}
+        )
+
+    result = job["result"]
+    return {
+        "transactionTime": result["transactionTime"],
+        "request": job["payload"]["request"],
+        "requiresAccessToken": True,
+        "output": [
+            {
+                "type": item["type"],
+                "url": str(request.url_for("export_file", job_id=job_id, file_name=item["file"])),
+                "count": item["count"]
+            }
+            for item in result["output"]
+        ],
+        "error": []
+    }
+
+@router.get("/$export-files/{job_id}/{file_name}", name="export_file")
+async def export_file(
+    job_id: str,
+    file_name: str,
+    current_user: models.User = Depends(require_admin)
+):
+    """Downloads one NDJSON file of a completed export"""
+    job = await _export_job(job_id, current_user)
+    path = Path(settings.FHIR_EXPORT_DIR) / str(job["_id"]) / file_name
+    if job["status"] != "completed" or not FILE_NAME.match(file_name) or not path.is_file():
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="File not found"
+        )
+    return FileResponse(path, media_type="application/fhir+ndjson", filename=file_name)
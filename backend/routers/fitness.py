@@ -1,16 +1,22 @@
 """
 Fitness tracking routes for HealthHub API
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from sqlalchemy import Date, cast, func, literal_column
 from sqlalchemy.orm import Session
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from datetime import datetime, timedelta
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+import asyncio
 
 from database import get_db
 import models
 import schemas
 from routers.auth import get_current_user
+from app.core.config import settings
+from pose_analysis import FRAME_BYTES, analyze_session, parse_frames
+from vitals_store import vitals_store
+from workout_recommender import workout_recommender
 
 router = APIRouter(
     prefix="/fitness",
@@ -18,15 +24,42 @@ router = APIRouter(
 )
 
 class ExerciseLog(BaseModel):
-    exercise_type: str
-    duration_minutes: int
-    calories_burned: int
+    exercise_type: str = Field(..., min_length=1, max_length=64)
+    duration_minutes: int = Field(..., ge=0)
+    calories_burned: int = Field(..., ge=0)
     date: datetime
 
 class WorkoutPlan(BaseModel):
+    id: Optional[int] = None
     name: str
     description: str
+    level: Optional[str] = None
+    goal: Optional[str] = None
+    duration_minutes: Optional[int] = None
     exercises: List[Dict[str, Any]]
+    score: Optional[float] = None
+
+    class Config:
+        orm_mode = True
+
+class WorkoutPlanCreate(BaseModel):
+    name: str = Field(..., min_length=1)
+    description: str
+    level: str = Field(..., pattern="^(beginner|intermediate|advanced)$")
+    goal: str = Field(..., pattern="^(general|strength|cardio|flexibility|weight_loss)$")
+    duration_minutes: int = Field(..., gt=0)
+    exercises: List[Dict[str, Any]] = Field(..., min_length=1)
+
+def _period_start(column, period: str, dialect: str):
+    """SQL expression for the Monday of the week or first of the month containing column"""
+    if dialect == "postgresql":
+        # Inlined rather than bound, so GROUP BY matches the selected expression
+        return cast(func.date_trunc(literal_column(f"'{period}'"), column), Date)
+    if period == "week":
+        # SQLite: 'weekday 0' moves forward to the next Sunday (or stays on
+        # one), six days back from which is the week's Monday
+        return func.date(column, "weekday 0", "-6 days")
+    return func.date(column, "start of month")
 
 @router.post("/exercise-logs", status_code=status.HTTP_201_CREATED)
 async def log_exercise(
@@ -35,108 +68,146 @@ async def log_exercise(
     db: Session = Depends(get_db)
 ):
     """Log a completed exercise session"""
-    # In a real app, you would save this to a fitness_logs table
-    # For this template, we'll create a health record entry instead
-    
-    db_record = models.HealthRecord(
+    db_log = models.ExerciseLog(
         user_id=current_user.id,
-        record_type="exercise",
-        value=exercise.duration_minutes,
-        unit="minutes",
-        notes=f"Exercise: {exercise.exercise_type}, Calories: {exercise.calories_burned}"
+        exercise_type=exercise.exercise_type,
+        duration_minutes=exercise.duration_minutes,
+        calories_burned=exercise.calories_burned,
+        performed_at=exercise.date
     )
     
-    db.add(db_record)
+    db.add(db_log)
     db.commit()
     
-    return {"message": "Exercise logged successfully"}
+    return {"message": "Exercise logged successfully", "id": db_log.id}
 
-@router.get("/exercise-logs", response_model=List[Dict[str, Any]])
+@router.get("/exercise-logs", response_model=List[schemas.ExerciseLogResponse])
 async def get_exercise_logs(
     current_user: models.User = Depends(get_current_user),
     db: Session = Depends(get_db),
     start_date: datetime = None,
     end_date: datetime = None
 ):
-    """Get exercise logs for the current user within a date range"""
-    query = db.query(models.HealthRecord).filter(
-        models.HealthRecord.user_id == current_user.id,
-        models.HealthRecord.record_type == "exercise"
-    )
+    """Get exercise logs for the current user within a date range, newest first"""
+    logs = models.ExerciseLog
+    query = db.query(
+        logs.id, logs.exercise_type, logs.duration_minutes, logs.calories_burned, logs.performed_at.label("date"),
+        logs.rep_count, logs.form_score
+    ).filter(logs.user_id == current_user.id)
     
     if start_date:
-        query = query.filter(models.HealthRecord.recorded_at >= start_date)
+        query = query.filter(logs.performed_at >= start_date)
     if end_date:
-        query = query.filter(models.HealthRecord.recorded_at <= end_date)
+        query = query.filter(logs.performed_at <= end_date)
     
-    records = query.order_by(models.HealthRecord.recorded_at.desc()).all()
+    return query.order_by(logs.performed_at.desc(), logs.id.desc()).all()
+
+@router.get("/exercise-logs/summary", response_model=List[schemas.ExerciseSummaryResponse])
+async def get_exercise_summary(
+    period: str = Query("week", pattern="^(week|month)$"),
+    start_date: datetime = None,
+    end_date: datetime = None,
+    exercise_type: Optional[str] = None,
+    current_user: models.User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Weekly or monthly workout totals, oldest period first, aggregated in SQL"""
+    logs = models.ExerciseLog
+    period_start = _period_start(logs.performed_at, period, db.get_bind().dialect.name)
+    query = db.query(
+        period_start.label("period_start"),
+        func.count(logs.id).label("workouts"),
+        func.sum(logs.duration_minutes).label("total_minutes"),
+        func.sum(logs.calories_burned).label("total_calories"),
+        func.avg(logs.duration_minutes).label("avg_minutes")
+    ).filter(logs.user_id == current_user.id)
     
-    # Transform the records into exercise log format
-    exercise_logs = []
-    for record in records:
-        exercise_type = "Unknown"
-        calories = 0
-        
-        # Extract exercise type and calories from notes
-        if record.notes:
-            notes_parts = record.notes.split(", ")
-            if len(notes_parts) >= 2:
-                exercise_type = notes_parts[0].replace("Exercise: ", "")
-                calories = int(notes_parts[1].replace("Calories: ", ""))
-        
-        exercise_logs.append({
-            "id": record.id,
-            "exercise_type": exercise_type,
-            "duration_minutes": record.value,
-            "calories_burned": calories,
-            "date": record.recorded_at
-        })
+    if start_date:
+        query = query.filter(logs.performed_at >= start_date)
+    if end_date:
+        query = query.filter(logs.performed_at <= end_date)
+    if exercise_type:
+        query = query.filter(logs.exercise_type == exercise_type)
     
-    return exercise_logs
+    return query.group_by(period_start).order_by(period_start).all()
+
+@router.post("/pose-sessions", response_model=schemas.PoseSessionResponse, status_code=status.HTTP_201_CREATED)
+async def analyze_pose_session(
+    request: Request,
+    exercise_type: str,
+    fps: float = Query(30.0, gt=0, le=120),
+    started_at: Optional[datetime] = None,
+    current_user: models.User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Analyses a recorded workout from its pose keypoints and logs it as an
+    exercise session. The body is the session's MoveNet frames as raw
+    little-endian float32 (application/octet-stream): 17 keypoints of
+    x, y, score per frame, frames back to back. Returns rep count, per-rep
+    form scores and form mistakes.
+    """
+    body = await request.body()
+    if len(body) > settings.POSE_MAX_FRAMES * FRAME_BYTES:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {settings.POSE_MAX_FRAMES} frames per session"
+        )
+    latest_weight = vitals_store.latest(db, current_user.id, models.HealthRecordType.weight)
+    try:
+        frames = parse_frames(body)
+        analysis = await asyncio.to_thread(
+            analyze_session, frames, exercise_type, fps, latest_weight[1] if latest_weight else None
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    db_log = models.ExerciseLog(
+        user_id=current_user.id,
+        exercise_type=exercise_type,
+        duration_minutes=round(analysis.duration_seconds / 60),
+        calories_burned=round(analysis.calories_burned),
+        performed_at=started_at or datetime.utcnow() - timedelta(seconds=analysis.duration_seconds),
+        rep_count=analysis.rep_count,
+        form_score=analysis.form_score
+    )
+    db.add(db_log)
+    db.commit()
+
+    return {"exercise_log_id": db_log.id, **vars(analysis)}
 
 @router.get("/workout-plans", response_model=List[WorkoutPlan])
 async def get_workout_plans(
     current_user: models.User = Depends(get_current_user),
+    db: Session = Depends(get_db),
     fitness_level: str = "intermediate",
-    goal: str = "general"
+    goal: str = "general",
+    limit: int = Query(3, ge=1, le=50)
 ):
     """
-    Get workout plan suggestions based on user preferences.
-    This is a placeholder that would connect to a workout plans database.
+    Workout plans from the catalog ranked for the fitness level and goal,
+    favouring plans unlike the user's exercise over the last four weeks.
     """
-    # Mock workout plans - in a real app, this would come from a database
-    workout_plans = [
-        {
-            "name": "Beginner Strength Training",
-            "description": "A gentle introduction to strength training for beginners",
-            "exercises": [
-                {"name": "Bodyweight Squats", "sets": 3, "reps": 10, "rest": "60 seconds"},
-                {"name": "Push-ups (or Modified Push-ups)", "sets": 3, "reps": 8, "rest": "60 seconds"},
-                {"name": "Plank", "sets": 3, "duration": "30 seconds", "rest": "45 seconds"},
-                {"name": "Dumbbell Rows", "sets": 3, "reps": 10, "rest": "60 seconds"}
-            ]
-        },
-        {
-            "name": "Cardio Fitness",
-            "description": "Improve cardiovascular health and endurance",
-            "exercises": [
-                {"name": "Jumping Jacks", "sets": 3, "duration": "60 seconds", "rest": "30 seconds"},
-                {"name": "High Knees", "sets": 3, "duration": "45 seconds", "rest": "30 seconds"},
-                {"name": "Mountain Climbers", "sets": 3, "duration": "45 seconds", "rest": "30 seconds"},
-                {"name": "Burpees", "sets": 3, "reps": 10, "rest": "60 seconds"}
-            ]
-        },
-        {
-            "name": "Flexibility & Mobility",
-            "description": "Improve flexibility and joint mobility",
-            "exercises": [
-                {"name": "Cat-Cow Stretch", "duration": "60 seconds"},
-                {"name": "Downward Dog", "duration": "45 seconds"},
-                {"name": "Pigeon Pose", "sets": 2, "duration": "60 seconds per side"},
-                {"name": "World's Greatest Stretch", "sets": 2, "reps": 5, "duration": "30 seconds per side"}
-            ]
-        }
-    ]
+    recommendations = workout_recommender.recommend(db, current_user.id, fitness_level, goal, limit)
+    return [{**plan, "score": round(score, 3)} for plan, score in recommendations]
+
+@router.post("/workout-plans", response_model=WorkoutPlan, status_code=status.HTTP_201_CREATED)
+async def create_workout_plan(
+    plan: WorkoutPlanCreate,
+    current_user: models.User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Add a plan to the workout catalog"""
+    if current_user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admins can edit the workout catalog"
+        )
+    
+    db_plan = models.WorkoutPlan(**plan.dict())
+    db.add(db_plan)
+    db.commit()
+    db.refresh(db_plan)
+    workout_recommender.invalidate()
     
-    # In a real app, you would filter based on the provided parameters
-    return workout_plans
+    return db_plan
@@ -1,19 +1,27 @@
 """
 Health records management routes for HealthHub API
 """
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, Response
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, Response, Request, Query
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Tuple
+import asyncio
 import json
 import os
 import shutil
-from datetime import datetime
+from datetime import datetime, timedelta
 from pathlib import Path
 
+import numpy as np
+
 from database import get_db
 import models
 import schemas
 from routers.auth import get_current_user
+from app.core.pagination import paginate_query, NEXT_CURSOR_HEADER
+from app.core.config import settings
+from routers.dashboard import snapshot_vital_added, snapshot_vital_streamed, snapshot_report_added, invalidate_snapshot
+from vitals_store import vitals_store, to_canonical, to_ms, to_utc, from_ms, CANONICAL_UNITS
+from vitals_anomaly import anomaly_detector, log_anomalies
 
 router = APIRouter(
     prefix="/health-records",
@@ -25,6 +33,64 @@ UPLOAD_DIR = Path("uploads")
 # Create directory if it doesn't exist
 UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 
+def _store_reading(db: Session, record: models.HealthRecord):
+    # Manual entries are mirrored into the time-series store (same transaction)
+    # so series queries see every reading
+    value = to_canonical(record.record_type, record.unit, record.value)
+    if value is not None:
+        vitals_store.append(db, record.user_id, record.record_type, [to_ms(record.recorded_at)], [value], commit=False)
+
+def _remove_reading(db: Session, record: models.HealthRecord):
+    # Matching on the mirrored value too keeps a wearable reading at the same millisecond
+    value = to_canonical(record.record_type, record.unit, record.value)
+    if value is not None:
+        vitals_store.remove(db, record.user_id, record.record_type, to_ms(record.recorded_at), value, commit=False)
+
+NDJSON_CONTENT_TYPES = {"application/x-ndjson", "application/ndjson", "application/jsonl"}
+
+def _as_ms(timestamps) -> np.ndarray:
+    # Missing or non-numeric timestamps become -1 and fail validation
+    timestamps = np.asarray(timestamps, dtype=np.float64)
+    return np.where(np.isfinite(timestamps), timestamps, -1).astype(np.int64)
+
+def parse_bulk_readings(body: bytes, content_type: str) -> List[Tuple[Any, Any, np.ndarray, np.ndarray, np.ndarray]]:
+    """
+    Parses a wearable sync body into (record_type, unit, timestamps, values,
+    positions) groups for VitalsStore.ingest. Raises ValueError on a malformed body.
+
+    NDJSON: one {"record_type", "timestamp", "value", "unit"?} object per line.
+    JSON: {"record_type", "unit"?, "timestamps": [...], "values": [...]} or
+    {"series": [...]} of those. Timestamps are epoch milliseconds (UTC).
+    """
+    try:
+        if content_type.split(";")[0].strip().lower() in NDJSON_CONTENT_TYPES:
+            # One json.loads over the whole body instead of one per line
+            lines = [line for line in body.splitlines() if line.strip()]
+            rows = json.loads(b"[" + b",".join(lines) + b"]")
+            by_key: Dict[Tuple[Any, Any], List[int]] = {}
+            for position, row in enumerate(rows):
+                by_key.setdefault((row.get("record_type"), row.get("unit")), []).append(position)
+            timestamps = _as_ms([row.get("timestamp") for row in rows])
+            values = np.array([row.get("value") for row in rows], dtype=np.float64)
+            groups = []
+            for (record_type, unit), positions in by_key.items():
+                positions = np.array(positions)
+                groups.append((record_type, unit, timestamps[positions], values[positions], positions))
+            return groups
+
+        payload = json.loads(body)
+        groups, offset = [], 0
+        for series in payload.get("series", [payload]):
+            timestamps = _as_ms(series["timestamps"])
+            values = np.array(series["values"], dtype=np.float64)
+            if timestamps.shape != values.shape or timestamps.ndim != 1:
+                raise ValueError("timestamps and values must be flat lists of the same length")
+            groups.append((series.get("record_type"), series.get("unit"), timestamps, values, np.arange(offset, offset + len(values))))
+            offset += len(values)
+        return groups
+    except (AttributeError, KeyError, TypeError) as e:
+        raise ValueError(f"Malformed readings: {e}")
+
 @router.post("/", response_model=schemas.HealthRecordResponse)
 async def create_health_record(
     record: schemas.HealthRecordCreate,
@@ -36,31 +102,141 @@ async def create_health_record(
         record_type=record.record_type,
         value=record.value,
         unit=record.unit,
-        notes=record.notes
+        notes=record.notes,
+        recorded_at=datetime.utcnow()
     )
     
     db.add(db_record)
+    _store_reading(db, db_record)
     db.commit()
     db.refresh(db_record)
+    await snapshot_vital_added(db_record)
+    value = to_canonical(db_record.record_type, db_record.unit, db_record.value)
+    if value is not None:
+        anomaly = anomaly_detector.observe(current_user.id, db_record.record_type, to_ms(db_record.recorded_at), value)
+        if anomaly:
+            await log_anomalies(current_user.id, [anomaly])
     
     return db_record
 
 @router.get("/", response_model=List[schemas.HealthRecordResponse])
 async def get_health_records(
+    response: Response,
     current_user: models.User = Depends(get_current_user),
     db: Session = Depends(get_db),
-    skip: int = 0,
+    cursor: Optional[str] = None,
     limit: int = 100,
     record_type: str = None
 ):
+    """Get health records newest first. The next page cursor is returned in the X-Next-Cursor header."""
     query = db.query(models.HealthRecord).filter(models.HealthRecord.user_id == current_user.id)
     
     if record_type:
         query = query.filter(models.HealthRecord.record_type == record_type)
     
-    records = query.offset(skip).limit(limit).all()
+    records, next_cursor = paginate_query(
+        query, models.HealthRecord.recorded_at, models.HealthRecord.id, cursor=cursor, limit=limit
+    )
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     return records
 
+@router.get("/series", response_model=schemas.VitalSeriesResponse)
+async def get_vital_series(
+    record_type: models.HealthRecordType,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    current_user: models.User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Readings of one vital type in [start, end) from the time-series store. Defaults to the last 24 hours."""
+    end = to_utc(end) if end else datetime.utcnow()
+    start = to_utc(start) if start else end - timedelta(days=1)
+    timestamps, values = vitals_store.query(db, current_user.id, record_type, start, end)
+    return schemas.VitalSeriesResponse(
+        record_type=record_type.value,
+        unit=CANONICAL_UNITS[record_type].value,
+        timestamps=timestamps.tolist(),
+        values=values.tolist()
+    )
+
+@router.get("/aggregate", response_model=schemas.VitalAggregateResponse)
+async def get_vital_aggregate(
+    record_type: models.HealthRecordType,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    max_points: int = Query(500, ge=1, le=5000),
+    current_user: models.User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Min/max/avg per bucket over [start, end) for charts, read from the
+    vitals rollups rather than raw readings. The bucket width is the finest of 1m, 1h, 1d and 1w that keeps the
+    range within max_points buckets. Defaults to the last 7 days.
+    """
+    end = to_utc(end) if end else datetime.utcnow()
+    start = to_utc(start) if start else end - timedelta(days=7)
+    if start >= end:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="start must be before end")
+    resolution, (buckets, counts, totals, mins, maxs) = vitals_store.aggregate(db, current_user.id, record_type, start, end, max_points)
+    return schemas.VitalAggregateResponse(
+        record_type=record_type.value,
+        unit=CANONICAL_UNITS[record_type].value,
+        resolution=resolution,
+        timestamps=buckets.tolist(),
+        count=counts.tolist(),
+        avg=(totals / np.maximum(counts, 1)).tolist(),
+        min=mins.tolist(),
+        max=maxs.tolist()
+    )
+
+@router.get("/anomalies", response_model=List[schemas.VitalAnomalyResponse])
+async def get_vital_anomalies(
+    record_type: models.HealthRecordType,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    current_user: models.User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Replays the anomaly detector over stored readings in [start, end). Defaults to the last 30 days."""
+    end = to_utc(end) if end else datetime.utcnow()
+    start = to_utc(start) if start else end - timedelta(days=30)
+    return anomaly_detector.scan_history(db, current_user.id, record_type, start, end)
+
+@router.post("/bulk", response_model=schemas.BulkIngestResponse)
+async def bulk_ingest_vitals(
+    request: Request,
+    current_user: models.User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Bulk vitals ingestion for wearable sync, as NDJSON (application/x-ndjson)
+    or compact JSON arrays; see parse_bulk_readings. Readings are validated
+    together, stored in one transaction and deduplicated on (type, timestamp),
+    so re-sending a batch is safe. Implausible readings are rejected and
+    reported without failing the rest of the batch.
+    """
+    body = await request.body()
+    if len(body) > settings.VITALS_BULK_MAX_BYTES:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="Request body too large")
+    try:
+        groups = await asyncio.to_thread(parse_bulk_readings, body, request.headers.get("content-type", ""))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if sum(len(group[2]) for group in groups) > settings.VITALS_BULK_MAX_READINGS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {settings.VITALS_BULK_MAX_READINGS} readings per request"
+        )
+
+    result = await asyncio.to_thread(vitals_store.ingest, db, current_user.id, groups)
+    anomalies = []
+    for record_type, (timestamps, values) in result.pop("readings").items():
+        anomalies.extend(anomaly_detector.observe_batch(current_user.id, record_type, timestamps, values))
+        await snapshot_vital_streamed(current_user.id, record_type, from_ms(timestamps[-1]), float(values[-1]))
+    await log_anomalies(current_user.id, anomalies)
+    return result
+
 @router.get("/{record_id}", response_model=schemas.HealthRecordResponse)
 async def get_health_record(
     record_id: int,
@@ -102,8 +278,10 @@ async def update_health_record(
     for field, value in record_update.dict(exclude_unset=True).items():
         setattr(db_record, field, value)
     
+    _store_reading(db, db_record)
     db.commit()
     db.refresh(db_record)
+    await invalidate_snapshot(current_user.id)
     
     return db_record
 
@@ -125,7 +303,9 @@ async def delete_health_record(
         )
     
     db.delete(db_record)
+    _remove_reading(db, db_record)
     db.commit()
+    await invalidate_snapshot(current_user.id)
     
     return None
 
@@ -203,6 +383,7 @@ async def upload_document(
         db.add(db_document)
         db.commit()
         db.refresh(db_document)
+        await snapshot_report_added(db_document)
         
         return db_document
     
@@ -219,13 +400,14 @@ async def upload_document(
 
 @router.get("/documents", response_model=List[schemas.DocumentFileResponse])
 async def get_documents(
+    response: Response,
     current_user: models.User = Depends(get_current_user),
     db: Session = Depends(get_db),
-    skip: int = 0,
+    cursor: Optional[str] = None,
     limit: int = 50,
     category: Optional[str] = None
 ):
-    """Get all documents for the current user, optionally filtered by category"""
+    """Get all documents for the current user, optionally filtered by category, newest first"""
     query = db.query(models.DocumentFile).filter(models.DocumentFile.user_id == current_user.id)
     
     if category:
@@ -236,7 +418,11 @@ async def get_documents(
             # Invalid category, ignore filter
             pass
     
-    documents = query.order_by(models.DocumentFile.uploaded_at.desc()).offset(skip).limit(limit).all()
+    documents, next_cursor = paginate_query(
+        query, models.DocumentFile.uploaded_at, models.DocumentFile.id, cursor=cursor, limit=limit
+    )
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     return documents
 
 @router.get("/documents/{document_id}", response_model=schemas.DocumentFileResponse)
@@ -287,6 +473,7 @@ async def delete_document(
     # Delete database record
     db.delete(document)
     db.commit()
+    await invalidate_snapshot(current_user.id)
     
     return None
 
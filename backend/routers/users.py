@@ -2,14 +2,15 @@
 """
 User management routes for HealthHub API
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
 from database import get_db
 import models
 import schemas
 from routers.auth import get_current_user
+from app.core.pagination import paginate_query, NEXT_CURSOR_HEADER
 
 router = APIRouter(
     prefix="/users",
@@ -36,7 +37,8 @@ async def update_user(
 
 @router.get("/", response_model=List[schemas.UserResponse])
 async def get_users(
-    skip: int = 0,
+    response: Response,
+    cursor: Optional[str] = None,
     limit: int = 100,
     current_user: models.User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -48,7 +50,11 @@ async def get_users(
             detail="Not authorized to access this resource"
         )
     
-    users = db.query(models.User).offset(skip).limit(limit).all()
+    users, next_cursor = paginate_query(
+        db.query(models.User), models.User.created_at, models.User.id, cursor=cursor, limit=limit
+    )
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     return users
 
 @router.get("/{user_id}", response_model=schemas.UserResponse)
@@ -53,6 +53,76 @@ class HealthRecordResponse(HealthRecordBase):
     class Config:
         orm_mode = True
 
+class VitalSeriesResponse(BaseModel):
+    record_type: str
+    unit: str
+    timestamps: List[int] = Field(..., description="Milliseconds since the Unix epoch (UTC)")
+    values: List[float]
+
+class VitalAggregateResponse(BaseModel):
+    record_type: str
+    unit: str
+    resolution: str = Field(..., description="Bucket width: 1m, 1h, 1d or 1w")
+    timestamps: List[int] = Field(..., description="Bucket starts in milliseconds since the Unix epoch (UTC)")
+    count: List[int]
+    avg: List[float]
+    min: List[float]
+    max: List[float]
+
+class VitalAnomalyResponse(BaseModel):
+    record_type: str
+    timestamp: int = Field(..., description="Milliseconds since the Unix epoch (UTC)")
+    value: float
+    reason: str = Field(..., description="high or low (clinical limits) or unusual (far from the user's recent average)")
+    z_score: Optional[float] = None
+    baseline: Optional[float] = Field(None, description="Weighted recent average the reading was compared against")
+
+class BulkIngestResponse(BaseModel):
+    received: int
+    accepted: int
+    inserted: int
+    duplicates: int = Field(..., description="Accepted readings that replaced one already stored at the same timestamp")
+    rejected: int
+    errors: List[Dict[str, Any]] = Field(default_factory=list, description="First rejected readings, by position in the request")
+
+# Exercise log schemas
+class ExerciseLogResponse(BaseModel):
+    id: int
+    exercise_type: str
+    duration_minutes: int
+    calories_burned: int
+    date: datetime
+    rep_count: Optional[int] = None
+    form_score: Optional[float] = None
+
+    class Config:
+        orm_mode = True
+
+class ExerciseSummaryResponse(BaseModel):
+    period_start: date = Field(..., description="Monday of the week or first day of the month")
+    workouts: int
+    total_minutes: int
+    total_calories: int
+    avg_minutes: float
+
+class PoseRepResponse(BaseModel):
+    start_seconds: float
+    end_seconds: float
+    min_angle: float = Field(..., description="Smallest joint angle reached, in degrees")
+    form_score: float
+
+class PoseSessionResponse(BaseModel):
+    exercise_log_id: int
+    exercise_type: str
+    frames: int
+    duration_seconds: float
+    rep_count: int
+    form_score: float = Field(..., description="0-100")
+    calories_burned: float
+    visible_fraction: float = Field(..., description="Share of frames with the analysed joints in view")
+    reps: List[PoseRepResponse]
+    mistakes: List[str]
+
 # Document file schemas
 class DocumentFileBase(BaseModel):
     file_name: str
@@ -126,6 +196,7 @@ class MealBase(BaseModel):
     name: str
     calories: int
     time_of_day: MealTime
+    day: Optional[int] = Field(None, ge=0)
 
 class MealCreate(MealBase):
     pass
@@ -137,6 +208,30 @@ class MealResponse(MealBase):
     class Config:
         orm_mode = True
 
+class MealPlanGenerate(BaseModel):
+    days: int = Field(7, ge=1, le=14)
+    diet_type: Optional[str] = None
+    exclude_ingredients: List[str] = []
+    replace_existing: bool = True
+
+class GeneratedMeal(MealResponse):
+    recipe_id: int
+    protein: int
+    carbs: int
+    fat: int
+
+class GeneratedMealDay(BaseModel):
+    day: int
+    calories: int
+    protein_grams: int
+    carbs_grams: int
+    fat_grams: int
+    meals: List[GeneratedMeal]
+
+class GeneratedMealPlanResponse(BaseModel):
+    plan_id: int
+    days: List[GeneratedMealDay]
+
 # Disease risk schemas
 class DiseaseRiskBase(BaseModel):
     disease_name: str
@@ -0,0 +1,120 @@
+"""
+Test script checking the AI assistant never forgets a message: every earlier
+message of the conversation reaches the prompt, verbatim or in the summary.
+
+Usage:
+python test_context_window.py
+
+This script will:
+1. Run a long conversation through AIService with an in-memory conversation
+   store and a stand-in LLM whose summaries keep every exchange, so no
+   database or API key is needed
+2. Capture the prompt of every turn
+3. Check each earlier message appears in it, either in the rolling summary
+   or among the verbatim messages
+"""
+import asyncio
+import sys
+from typing import Any, Dict, List, Optional
+
+from dotenv import load_dotenv
+
+# Add the current directory to the path so we can import our modules
+sys.path.append('.')
+
+load_dotenv()
+
+import app.services.ai_service as ai_service_module
+from app.repositories.conversation_repo import ConversationRepository
+from app.services.ai_service import AIService
+from app.services.context_window import ContextWindowManager
+
+USER_ID = "patient-1"
+TURNS = 40
+
+class MemoryConversationRepository(ConversationRepository):
+    """The repository's read and write API over a dict"""
+    def __init__(self):
+        self.header = {"_id": "conversation", "user_id": USER_ID, "message_count": 0, "summary": "", "summarized_upto": 0}
+        self.messages: List[Dict[str, Any]] = []
+
+    async def get_or_create(self, user_id: str) -> Dict[str, Any]:
+        return dict(self.header)
+
+    async def append_messages(self, conversation_id, user_id: str, messages) -> int:
+        self.messages.extend(message.model_dump() for message in messages)
+        self.header["message_count"] = len(self.messages)
+        return len(self.messages)
+
+    async def get_messages(self, conversation_id, before: Optional[int] = None, limit: int = 50):
+        before = len(self.messages) if before is None else before
+        start = max(before - limit, 0)
+        return self.messages[start:before], (start if start > 0 else None)
+
+    async def update_summary(self, conversation_id, summary: str, expected_upto: int, summarized_upto: int) -> bool:
+        if self.header["summarized_upto"] != expected_upto:
+            return False
+        self.header.update(summary=summary, summarized_upto=summarized_upto)
+        return True
+
+class RecordingProvider:
+    """Answers with a marker per turn; a summary is the old summary plus every new exchange"""
+    def __init__(self):
+        self.prompts: List[str] = []
+
+    async def generate_response(self, prompt: str, system_instruction: Optional[str] = None, cache_scope: Optional[str] = None, cache_query: Optional[str] = None, cache_key: Optional[str] = None) -> str:
+        self.prompts.append(prompt)
+        return f"<answer {len(self.prompts) - 1}>"
+
+    async def complete(self, prompt: str, system_instruction: Optional[str] = None, cache_scope: Optional[str] = None, cache_query: Optional[str] = None, cache_key: Optional[str] = None) -> str:
+        summary, exchanges = prompt.split("\n\nNew exchanges:\n")
+        summary = summary.removeprefix("Existing summary:\n").replace("(none)", "")
+        return f"{summary} {exchanges}".strip()
+
+async def run_conversation() -> RecordingProvider:
+    service = AIService()
+    service.conversation_repo = MemoryConversationRepository()
+    service.llm_provider = RecordingProvider()
+    # Generous budget: only the memory policy decides what is left out
+    service.context_window = ContextWindowManager(recent_turns=6, token_budget=100_000, summary_batch_turns=4)
+
+    async def patient_context(user_id: str) -> str:
+        return "Patient Profile: Blood Group O+.\n"
+    service._get_patient_context = patient_context
+
+    for turn in range(TURNS):
+        await service.ask_health_assistant(USER_ID, f"<question {turn}>")
+        # Let the background summary update finish, as it would between turns
+        await asyncio.gather(*ai_service_module._background_tasks)
+    return service.llm_provider
+
+def test_context_window() -> bool:
+    try:
+        provider = asyncio.run(run_conversation())
+    except Exception as e:
+        print(f"ERROR: {str(e)}")
+        return False
+
+    forgotten = []
+    for turn, prompt in enumerate(provider.prompts):
+        for earlier in range(turn):
+            for marker in (f"<question {earlier}>", f"<answer {earlier}>"):
+                if marker not in prompt:
+                    forgotten.append((turn, marker))
+
+    if forgotten:
+        print(f"ERROR: {len(forgotten)} earlier messages missing from prompts, first: turn {forgotten[0][0]} lacks {forgotten[0][1]}")
+        return False
+    print(f"SUCCESS: all {TURNS} prompts hold every earlier message, verbatim or summarized.")
+    return True
+
+if __name__ == "__main__":
+    print("Checking conversation memory across summaries...")
+    success = test_context_window()
+
+    if success:
+        print("\nSUCCESS: No message falls between the summary and the verbatim window.")
+    else:
+        print("\nFAILED: Some messages are neither summarized nor sent verbatim.")
+
+    sys.exit(0 if success else 1)
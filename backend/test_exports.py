@@ -0,0 +1,152 @@
+"""
+Test script checking the patient record export and the FHIR bulk export
+emit each reading once.
+
+Usage:
+python test_exports.py
+
+This script will:
+1. Seed a private in-memory SQLite database (not the one in DATABASE_URL)
+   with a manual heart rate entry stored the way POST /health-records/ does
+   (a health_records row mirrored into vital_chunks by _store_reading), a
+   legacy health_records row that was never mirrored, and a day of
+   wearable readings in vital_chunks
+2. Export the patient's record (/api/export sections) and their FHIR
+   Observations
+3. Check every reading appears exactly once, the manual entry as its
+   health record, and that the FHIR partition weights count the same total
+"""
+import asyncio
+import json
+import os
+import sys
+from datetime import datetime, timedelta
+
+import numpy as np
+from dotenv import load_dotenv
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+# Add the current directory to the path so we can import our modules
+sys.path.append('.')
+
+load_dotenv()
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import models
+import fhir_export
+from routers.export import _sections
+from routers.health_records import _store_reading
+from vitals_store import to_ms, vitals_store
+
+PATIENT_ID = 1
+DEVICE_READINGS = 96
+
+def seed(db: Session) -> datetime:
+    now = datetime.utcnow().replace(microsecond=0)
+    db.execute(insert(models.User), [
+        {"id": PATIENT_ID, "email": "patient@example.com", "name": "Patient", "hashed_password": "x", "role": models.UserRole.patient}
+    ])
+    # Before the time-series store: a row only
+    db.add(models.HealthRecord(
+        user_id=PATIENT_ID, record_type=models.HealthRecordType.weight, value=70.5,
+        unit=models.HealthRecordUnit.kg, recorded_at=now - timedelta(days=400)
+    ))
+    # A wearable sync: readings only
+    start = to_ms(now - timedelta(hours=DEVICE_READINGS // 4))
+    timestamps = start + np.arange(DEVICE_READINGS, dtype=np.int64) * 15 * 60_000
+    vitals_store.append(db, PATIENT_ID, models.HealthRecordType.heart_rate, timestamps, np.full(DEVICE_READINGS, 64.0), commit=False)
+    # A manual entry: the row, mirrored into the same day's chunk
+    manual = models.HealthRecord(
+        user_id=PATIENT_ID, record_type=models.HealthRecordType.heart_rate, value=72,
+        unit=models.HealthRecordUnit.bpm, recorded_at=now - timedelta(minutes=7), notes="After a walk"
+    )
+    db.add(manual)
+    db.flush()
+    _store_reading(db, manual)
+    db.commit()
+    return now
+
+def seeded_session() -> Session:
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    models.Base.metadata.create_all(bind=engine)
+    db = Session(engine)
+    seed(db)
+    return db
+
+async def exported_rows(db: Session, sections) -> dict:
+    rows = {}
+    for name, columns, batches in _sections(db, PATIENT_ID):
+        if name in sections:
+            rows[name] = [dict(zip(columns, row)) async for batch in batches for row in batch]
+    return rows
+
+def test_patient_export() -> bool:
+    db = seeded_session()
+    try:
+        rows = asyncio.run(exported_rows(db, ("health_records", "vitals")))
+        records, vitals = rows["health_records"], rows["vitals"]
+        heart_rates = [row for row in records + vitals if getattr(row["record_type"], "value", row["record_type"]) == "heart_rate"]
+        readings = {
+            to_ms(row["recorded_at"] if isinstance(row["recorded_at"], datetime) else datetime.fromisoformat(row["recorded_at"]))
+            for row in heart_rates
+        }
+        results = [
+            (len(records) == 2, f"{len(records)} health records exported, expected 2"),
+            (len(vitals) == DEVICE_READINGS, f"{len(vitals)} vitals readings exported, expected {DEVICE_READINGS}"),
+            (len(readings) == len(heart_rates), f"{len(heart_rates) - len(readings)} heart rate readings exported twice"),
+        ]
+    except Exception as e:
+        print(f"ERROR: {str(e)}")
+        return False
+    finally:
+        db.close()
+
+    for ok, message in results:
+        print(f"{'SUCCESS' if ok else 'ERROR'}: patient export: {message}")
+    return all(ok for ok, _ in results)
+
+def test_fhir_export() -> bool:
+    db = seeded_session()
+    try:
+        ranges, snapshot = fhir_export.plan_partitions(db, 1)
+        # Exports only include readings from before their start
+        snapshot["until_ms"] += 1000
+        resources = [
+            json.loads(line)
+            for first_id, last_id in ranges
+            for lines in fhir_export._resource_batches(db, "Observation", first_id, last_id, snapshot)
+            for line in lines
+        ]
+        expected = DEVICE_READINGS + 2
+        readings = {(resource["code"]["coding"][0]["code"], resource["effectiveDateTime"]) for resource in resources}
+        manual = [resource for resource in resources if resource.get("note") == [{"text": "After a walk"}]]
+        weight = fhir_export.observation_counts(db, np.array([PATIENT_ID]))[0]
+
+        results = [
+            (len(resources) == expected, f"{len(resources)} Observations exported, expected {expected}"),
+            (len(readings) == len(resources), f"{len(resources) - len(readings)} readings exported twice"),
+            (len(manual) == 1 and manual[0]["id"].startswith("record-"), "manual entry exported once, as its health record"),
+            (weight == expected, f"partition weight {weight:.0f}, expected {expected}"),
+        ]
+    except Exception as e:
+        print(f"ERROR: {str(e)}")
+        return False
+    finally:
+        db.close()
+
+    for ok, message in results:
+        print(f"{'SUCCESS' if ok else 'ERROR'}: FHIR export: {message}")
+    return all(ok for ok, _ in results)
+
+if __name__ == "__main__":
+    print("Checking the patient and FHIR exports emit each reading once...")
+    success = all([test_patient_export(), test_fhir_export()])
+
+    if success:
+        print("\nSUCCESS: Manual entries mirrored into vital_chunks are exported once.")
+    else:
+        print("\nFAILED: The export duplicates or drops readings.")
+
+    sys.exit(0 if success else 1)
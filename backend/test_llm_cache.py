@@ -0,0 +1,133 @@
+"""
+Test script checking AI chat answers are served from the response cache
+when, and only when, it is safe.
+
+Usage:
+python test_llm_cache.py
+
+This script will:
+1. Run chat turns for several patients through AIService, with in-memory
+   conversations and a counting stand-in LLM behind the real response cache
+   (semantic matching on), so no database or API key is needed
+2. Check a patient repeating or rephrasing a question later in the
+   conversation is answered from the cache
+3. Check a generic first question from patients with no profile or history
+   is shared exactly, and that nothing is shared between patients with a
+   profile or through a merely similar question
+"""
+import asyncio
+import sys
+from typing import Any, Dict, List, Optional
+
+from dotenv import load_dotenv
+
+# Add the current directory to the path so we can import our modules
+sys.path.append('.')
+
+load_dotenv()
+
+import app.services.ai_service as ai_service_module
+from app.integrations.llm_cache import CachingLLMProvider, ResponseCache
+from app.integrations.llm_provider import BaseLLMProvider
+from app.services.ai_service import AIService
+
+CONTEXTS = {
+    "alice": "Patient Profile: Blood Group O+, Allergies: penicillin.\n",
+    "dave": "Patient Profile: Blood Group A-, Allergies: None.\n",
+}
+
+class MemoryConversations:
+    """The conversation repository's API over a dict of users"""
+    def __init__(self):
+        self.conversations: Dict[str, Dict[str, Any]] = {}
+
+    def _conversation(self, user_id: str) -> Dict[str, Any]:
+        return self.conversations.setdefault(user_id, {
+            "header": {"_id": user_id, "user_id": user_id, "message_count": 0, "summary": "", "summarized_upto": 0},
+            "messages": []
+        })
+
+    async def get_or_create(self, user_id: str) -> Dict[str, Any]:
+        return dict(self._conversation(user_id)["header"])
+
+    async def append_messages(self, conversation_id, user_id: str, messages) -> int:
+        conversation = self._conversation(conversation_id)
+        conversation["messages"].extend(message.model_dump() for message in messages)
+        conversation["header"]["message_count"] = len(conversation["messages"])
+        return len(conversation["messages"])
+
+    async def get_messages(self, conversation_id, before: Optional[int] = None, limit: int = 50):
+        messages = self._conversation(conversation_id)["messages"]
+        before = len(messages) if before is None else before
+        start = max(before - limit, 0)
+        return messages[start:before], (start if start > 0 else None)
+
+    async def update_summary(self, conversation_id, summary: str, expected_upto: int, summarized_upto: int) -> bool:
+        return False
+
+class CountingProvider(BaseLLMProvider):
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+
+    async def _generate(self, prompt: str, system_instruction: Optional[str]) -> str:
+        self.calls += 1
+        return f"answer {self.calls}"
+
+async def ask_all(turns: List[tuple]) -> List[bool]:
+    """Asks each (user, question) in order; True where the answer came from the cache"""
+    backend = CountingProvider()
+    service = AIService()
+    service.conversation_repo = MemoryConversations()
+    service.llm_provider = CachingLLMProvider(backend, ResponseCache(semantic=True, similarity_threshold=0.9))
+
+    async def patient_context(user_id: str) -> str:
+        return CONTEXTS.get(user_id, "")
+    service._get_patient_context = patient_context
+
+    cached = []
+    for user_id, question in turns:
+        calls = backend.calls
+        await service.ask_health_assistant(user_id, question)
+        await asyncio.gather(*ai_service_module._background_tasks)
+        cached.append(backend.calls == calls)
+    return cached
+
+# (user, question, served from the cache, why)
+TURNS = [
+    ("alice", "Can I take ibuprofen for a headache?", False, "first question"),
+    ("alice", "How much water should I drink a day?", False, "new question"),
+    ("alice", "Can I take ibuprofen for a headache?", True, "same patient repeats a question later in the chat"),
+    ("alice", "Can I take ibuprofen for my headache?", True, "same patient rephrases it"),
+    ("dave", "Can I take ibuprofen for a headache?", False, "another patient with their own profile"),
+    ("bob", "What is a normal resting heart rate?", False, "first generic question"),
+    ("carol", "What is a normal resting heart rate?", True, "same generic first question, no profile or history"),
+    ("erin", "What is a normal resting heart rate please?", False, "only similar to another patient's question"),
+    ("bob", "Can I take ibuprofen for a headache?", False, "patient without a profile, after earlier messages"),
+]
+
+def test_llm_cache() -> bool:
+    try:
+        cached = asyncio.run(ask_all([(user_id, question) for user_id, question, _, _ in TURNS]))
+    except Exception as e:
+        print(f"ERROR: {str(e)}")
+        return False
+
+    results = []
+    for (user_id, question, expected, why), hit in zip(TURNS, cached):
+        ok = hit == expected
+        outcome = "cache hit" if hit else "LLM call"
+        print(f"{'SUCCESS' if ok else 'ERROR'}: {user_id}: {question!r} -> {outcome} ({why})")
+        results.append(ok)
+    return all(results)
+
+if __name__ == "__main__":
+    print("Checking AI chat answers against the response cache...")
+    success = test_llm_cache()
+
+    if success:
+        print("\nSUCCESS: Repeated questions hit the cache and nothing personal is shared.")
+    else:
+        print("\nFAILED: The response cache misses safe repeats or shares answers it should not.")
+
+    sys.exit(0 if success else 1)
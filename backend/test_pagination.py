@@ -0,0 +1,157 @@
+"""
+Test script for cursor pagination of the list endpoints.
+
+Usage:
+python test_pagination.py
+
+This script will:
+1. Seed a private in-memory SQLite database (not the one in DATABASE_URL)
+   with health records and appointments, several sharing a timestamp
+2. Page through GET /health-records/ two rows at a time by following the
+   X-Next-Cursor header, and check every record comes back once, newest first
+3. Page through the appointments query the same way and check it runs
+   soonest first, so upcoming appointments lead the list
+4. Check a malformed cursor is rejected with 400
+"""
+import os
+import sys
+from datetime import datetime, timedelta
+
+from dotenv import load_dotenv
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+# Add the current directory to the path so we can import our modules
+sys.path.append('.')
+
+load_dotenv()
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import models
+from app.core.pagination import NEXT_CURSOR_HEADER, paginate_query
+from database import get_db
+from routers import health_records
+from routers.auth import get_current_user
+
+PATIENT_ID = 1
+DOCTOR_ID = 2
+START = datetime(2026, 10, 1, 8)
+PAGE_SIZE = 2
+
+# Hours after START; repeated offsets share a timestamp and are ordered by id
+RECORD_HOURS = [0, 1, 1, 1, 2, 5, 5, 9]
+APPOINTMENT_DAYS = [3, 1, 1, 7, 2, 2, 2]
+
+def seed():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    models.Base.metadata.create_all(bind=engine)
+    SessionTest = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    db = SessionTest()
+    try:
+        db.execute(insert(models.User), [
+            {"id": PATIENT_ID, "email": "patient@example.com", "name": "Patient", "hashed_password": "x", "role": models.UserRole.patient},
+            {"id": DOCTOR_ID, "email": "doctor@example.com", "name": "Doctor", "hashed_password": "x", "role": models.UserRole.doctor}
+        ])
+        db.execute(insert(models.HealthRecord), [
+            {"user_id": PATIENT_ID, "record_type": models.HealthRecordType.heart_rate, "value": 60 + i,
+             "unit": models.HealthRecordUnit.bpm, "recorded_at": START + timedelta(hours=hours)}
+            for i, hours in enumerate(RECORD_HOURS)
+        ])
+        db.execute(insert(models.Appointment), [
+            {"patient_id": PATIENT_ID, "doctor_id": DOCTOR_ID, "appointment_time": START + timedelta(days=days),
+             "status": models.AppointmentStatus.scheduled, "appointment_type": models.AppointmentType.consultation}
+            for days in APPOINTMENT_DAYS
+        ])
+        db.commit()
+    finally:
+        db.close()
+    return SessionTest
+
+def expected_order(rows, key, newest_first: bool):
+    # (timestamp, id) is the keyset, so ties on the timestamp fall back to the id
+    return [row.id for row in sorted(rows, key=lambda row: (key(row), row.id), reverse=newest_first)]
+
+def check(description: str, ids, expected) -> bool:
+    if ids != expected:
+        print(f"ERROR: {description}: got ids {ids}, expected {expected}")
+        return False
+    print(f"SUCCESS: {description}: {len(ids)} rows in {-(-len(ids) // PAGE_SIZE)} pages, each once and in order.")
+    return True
+
+def page_health_records(client: TestClient):
+    ids, cursor = [], None
+    while True:
+        params = {"limit": PAGE_SIZE, **({"cursor": cursor} if cursor else {})}
+        response = client.get("/health-records/", params=params)
+        if response.status_code != 200:
+            raise RuntimeError(f"GET /health-records/ returned {response.status_code}: {response.text}")
+        ids.extend(record["id"] for record in response.json())
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if cursor is None:
+            return ids
+
+def page_appointments(db):
+    # The query GET /appointments builds for a patient
+    query = db.query(models.Appointment).filter(models.Appointment.patient_id == PATIENT_ID)
+    ids, cursor = [], None
+    while True:
+        rows, cursor = paginate_query(
+            query, models.Appointment.appointment_time, models.Appointment.id, cursor=cursor, limit=PAGE_SIZE, ascending=True
+        )
+        ids.extend(row.id for row in rows)
+        if cursor is None:
+            return ids
+
+def test_pagination() -> bool:
+    SessionTest = seed()
+    app = FastAPI()
+    app.include_router(health_records.router)
+
+    def override_get_db():
+        db = SessionTest()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_current_user] = lambda: models.User(id=PATIENT_ID, role=models.UserRole.patient)
+    client = TestClient(app)
+
+    db = SessionTest()
+    try:
+        records = db.query(models.HealthRecord).all()
+        appointments = db.query(models.Appointment).all()
+        results = [
+            check("health records, newest first", page_health_records(client),
+                  expected_order(records, lambda row: row.recorded_at, newest_first=True)),
+            check("appointments, soonest first", page_appointments(db),
+                  expected_order(appointments, lambda row: row.appointment_time, newest_first=False))
+        ]
+    except Exception as e:
+        print(f"ERROR: {str(e)}")
+        return False
+    finally:
+        db.close()
+
+    response = client.get("/health-records/", params={"cursor": "not-a-cursor"})
+    if response.status_code == 400:
+        print("SUCCESS: A malformed cursor is rejected with 400.")
+    else:
+        print(f"ERROR: A malformed cursor returned {response.status_code}, expected 400")
+        results.append(False)
+    return all(results)
+
+if __name__ == "__main__":
+    print("Paging through list endpoints with cursors...")
+    success = test_pagination()
+
+    if success:
+        print("\nSUCCESS: Cursors return every row once, in the endpoint's order.")
+    else:
+        print("\nFAILED: Cursor pagination skipped, repeated or misordered rows.")
+
+    sys.exit(0 if success else 1)
@@ -0,0 +1,149 @@
+"""
+Test script counting the SQL statements behind the diet and doctor list
+endpoints, to catch N+1 query regressions.
+
+Usage:
+python test_query_counts.py
+
+This script will:
+1. Seed a private in-memory SQLite database (not the one in DATABASE_URL)
+   twice: once with a single diet plan, advice entry and risk report, once
+   with many plans full of meals and a long patient history
+2. Call each endpoint through the FastAPI app on both databases, counting
+   every statement executed on any engine
+3. Check the count stays within the endpoint's budget and does not grow
+   with the number of rows
+"""
+import os
+import sys
+from datetime import datetime, timedelta
+
+from dotenv import load_dotenv
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+# Add the current directory to the path so we can import our modules
+sys.path.append('.')
+
+load_dotenv()
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import models
+from database import get_db
+from routers import diet, doctor
+from routers.auth import get_current_user
+
+PATIENT_ID, DOCTOR_ID = 1, 2
+
+# Endpoint: (path, acting user, most statements allowed)
+ENDPOINTS = {
+    "diet plans": ("/diet/plans", PATIENT_ID, 2),
+    "current diet plan": ("/diet/plans/current", PATIENT_ID, 2),
+    "patient history": (f"/api/doctor/patients/{PATIENT_ID}/history", DOCTOR_ID, 4),
+}
+
+statements = []
+
+@event.listens_for(Engine, "before_cursor_execute")
+def count_statement(conn, cursor, statement, parameters, context, executemany):
+    statements.append(statement)
+
+def seed(plans: int, meals_per_plan: int, histories: int):
+    """A fresh database holding one patient, one doctor and the given row counts"""
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    models.Base.metadata.create_all(bind=engine)
+    now = datetime.utcnow()
+    with engine.begin() as connection:
+        connection.execute(insert(models.User), [
+            {"id": PATIENT_ID, "email": "patient@example.com", "name": "Patient", "hashed_password": "x", "role": models.UserRole.patient},
+            {"id": DOCTOR_ID, "email": "doctor@example.com", "name": "Doctor", "hashed_password": "x", "role": models.UserRole.doctor},
+        ])
+        connection.execute(insert(models.Appointment), [{
+            "patient_id": PATIENT_ID, "doctor_id": DOCTOR_ID, "appointment_time": now,
+            "status": models.AppointmentStatus.scheduled, "appointment_type": models.AppointmentType.consultation
+        }])
+        connection.execute(insert(models.DietPlan), [{
+            "id": plan_id, "user_id": PATIENT_ID, "plan_name": f"Plan {plan_id}", "daily_calories": 2000,
+            "protein_grams": 100, "carbs_grams": 250, "fat_grams": 67, "start_date": now - timedelta(days=plan_id), "end_date": None
+        } for plan_id in range(1, plans + 1)])
+        connection.execute(insert(models.Meal), [{
+            "diet_plan_id": plan_id, "name": f"Meal {i}", "calories": 500,
+            "time_of_day": list(models.MealTime)[i % 4], "day": i // 4
+        } for plan_id in range(1, plans + 1) for i in range(meals_per_plan)])
+        connection.execute(insert(models.PatientHistory), [{
+            "patient_id": PATIENT_ID, "doctor_id": DOCTOR_ID, "advice": f"Advice {i}", "created_at": now - timedelta(days=i)
+        } for i in range(histories)])
+        connection.execute(insert(models.RiskReport), [{
+            "patient_id": PATIENT_ID, "date": now - timedelta(days=i), "risk_level": "low", "details": "Routine check"
+        } for i in range(histories)])
+    return engine
+
+def count_queries(engine) -> dict:
+    """Statements per endpoint against one seeded database"""
+    app = FastAPI()
+    app.include_router(diet.router)
+    app.include_router(doctor.router)
+    SessionTest = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    def override_get_db():
+        db = SessionTest()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    acting_user = {}
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_current_user] = lambda: acting_user["user"]
+    users = {
+        PATIENT_ID: models.User(id=PATIENT_ID, role=models.UserRole.patient),
+        DOCTOR_ID: models.User(id=DOCTOR_ID, role=models.UserRole.doctor),
+    }
+
+    counts = {}
+    with TestClient(app) as client:
+        for description, (path, user_id, _) in ENDPOINTS.items():
+            acting_user["user"] = users[user_id]
+            statements.clear()
+            response = client.get(path)
+            if response.status_code != 200:
+                raise RuntimeError(f"{description}: GET {path} returned {response.status_code}: {response.text}")
+            counts[description] = len(statements)
+    return counts
+
+def test_query_counts() -> bool:
+    try:
+        small = count_queries(seed(plans=1, meals_per_plan=4, histories=1))
+        large = count_queries(seed(plans=20, meals_per_plan=28, histories=30))
+    except Exception as e:
+        print(f"ERROR: {str(e)}")
+        return False
+
+    results = []
+    for description, (path, _, budget) in ENDPOINTS.items():
+        ok = small[description] == large[description] <= budget
+        if ok:
+            print(f"SUCCESS: {description} runs {large[description]} statements (budget {budget}).")
+        else:
+            print(
+                f"ERROR: {description} ({path}) runs {small[description]} statements on the small database and "
+                f"{large[description]} on the large one (budget {budget})."
+            )
+        results.append(ok)
+    return all(results)
+
+if __name__ == "__main__":
+    print("Counting SQL statements for the diet and doctor endpoints...")
+    success = test_query_counts()
+
+    if success:
+        print("\nSUCCESS: Statement counts do not grow with the number of rows.")
+    else:
+        print("\nFAILED: Some endpoints run more statements than expected.")
+        print("Load the relationships they serialize with selectinload.")
+
+    sys.exit(0 if success else 1)
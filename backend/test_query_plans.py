@@ -0,0 +1,144 @@
+"""
+Test script asserting the health record, exercise log and document list
+queries use the composite per-user indexes (and partition pruning on
+PostgreSQL).
+
+Usage:
+python test_query_plans.py
+
+This script will:
+1. Connect to the database configured by DATABASE_URL
+2. EXPLAIN the queries behind the health record, exercise log and
+   document list endpoints
+3. Check each plan reads an index instead of scanning the table and needs
+   no separate sort step for the newest-first order
+4. On partitioned PostgreSQL tables, check a one-month range only reads
+   that month's partition
+"""
+import re
+import sys
+from datetime import datetime
+
+from dotenv import load_dotenv
+from sqlalchemy import text
+
+# Add the current directory to the path so we can import our modules
+sys.path.append('.')
+
+load_dotenv()
+
+import models
+from database import engine, SessionLocal
+from manage_partitions import is_partitioned
+
+USER_ID = 1
+MONTH_START, MONTH_END = datetime(2026, 10, 1), datetime(2026, 11, 1)
+
+def build_queries(db):
+    """Statements matching the ones the list endpoints run, keyed by description"""
+    records = db.query(models.HealthRecord).filter(models.HealthRecord.user_id == USER_ID)
+    documents = db.query(models.DocumentFile).filter(models.DocumentFile.user_id == USER_ID)
+    exercise_logs = db.query(models.ExerciseLog).filter(models.ExerciseLog.user_id == USER_ID)
+    newest_records = (models.HealthRecord.recorded_at.desc(), models.HealthRecord.id.desc())
+    newest_documents = (models.DocumentFile.uploaded_at.desc(), models.DocumentFile.id.desc())
+    return {
+        "health records page": (
+            records.order_by(*newest_records).limit(101),
+            "ix_health_records_user_recorded"
+        ),
+        "health records page by type": (
+            records.filter(models.HealthRecord.record_type == models.HealthRecordType.heart_rate).order_by(*newest_records).limit(101),
+            "ix_health_records_user_type_recorded"
+        ),
+        "health records by type in range": (
+            records.filter(
+                models.HealthRecord.record_type == models.HealthRecordType.weight,
+                models.HealthRecord.recorded_at >= MONTH_START,
+                models.HealthRecord.recorded_at < MONTH_END
+            ).order_by(models.HealthRecord.recorded_at.desc()),
+            "ix_health_records_user_type_recorded"
+        ),
+        "exercise logs in range": (
+            exercise_logs.filter(
+                models.ExerciseLog.performed_at >= MONTH_START,
+                models.ExerciseLog.performed_at <= MONTH_END
+            ).order_by(models.ExerciseLog.performed_at.desc(), models.ExerciseLog.id.desc()),
+            "ix_exercise_logs_user_performed"
+        ),
+        "documents page": (
+            documents.order_by(*newest_documents).limit(101),
+            "ix_document_files_user_uploaded"
+        ),
+        "documents page by category": (
+            documents.filter(models.DocumentFile.category == models.DocumentType.lab_result).order_by(*newest_documents).limit(101),
+            "ix_document_files_user_category_uploaded"
+        ),
+    }
+
+def explain(connection, query) -> str:
+    sql = str(query.statement.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True}))
+    if engine.dialect.name == "postgresql":
+        # Test tables are small enough that a sequential scan would win on cost
+        connection.execute(text("SET LOCAL enable_seqscan = off"))
+        rows = connection.execute(text(f"EXPLAIN {sql}")).fetchall()
+        return "\n".join(row[0] for row in rows)
+    rows = connection.execute(text(f"EXPLAIN QUERY PLAN {sql}")).fetchall()
+    return "\n".join(row[-1] for row in rows)
+
+def check_plan(description: str, plan: str, index_name: str, partitioned: bool) -> bool:
+    if engine.dialect.name == "postgresql":
+        # Indexes on partitions get generated names, so look for the node type
+        uses_index = "Index Scan" in plan or "Index Only Scan" in plan
+        has_scan = "Seq Scan" in plan
+        sorts = re.search(r"(^|->\s+)(Incremental )?Sort\s", plan, re.MULTILINE) is not None
+    else:
+        uses_index = f"INDEX {index_name}" in plan
+        has_scan = re.search(r"\bSCAN (TABLE )?\w+$", plan, re.MULTILINE) is not None
+        sorts = "TEMP B-TREE FOR ORDER BY" in plan
+
+    ok = uses_index and not has_scan and not sorts
+    if ok and partitioned and "in range" in description:
+        months = set(re.findall(r" on (health_records_\w+)", plan))
+        ok = len(months) <= 1
+        if not ok:
+            print(f"ERROR: {description}: expected one partition, plan reads {sorted(months)}")
+
+    if ok:
+        print(f"SUCCESS: {description} uses {index_name}.")
+    else:
+        print(f"ERROR: {description} does not use {index_name} as expected (index: {uses_index}, table scan: {has_scan}, sort: {sorts}):")
+        print(plan)
+    return ok
+
+def test_query_plans() -> bool:
+    db = SessionLocal()
+    try:
+        if engine.dialect.name == "sqlite":
+            # The local fallback database is created from the models
+            models.Base.metadata.create_all(bind=engine)
+        print(f"Connected to {engine.dialect.name} database.")
+
+        with engine.begin() as connection:
+            partitioned = engine.dialect.name == "postgresql" and is_partitioned(connection, "health_records")
+            results = [
+                check_plan(description, explain(connection, query), index_name, partitioned)
+                for description, (query, index_name) in build_queries(db).items()
+            ]
+        return all(results)
+    except Exception as e:
+        print(f"ERROR: {str(e)}")
+        return False
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    print("Checking query plans for health records, exercise logs and documents...")
+    success = test_query_plans()
+
+    if success:
+        print("\nSUCCESS: All list queries use the composite indexes.")
+    else:
+        print("\nFAILED: Some queries do not use the expected indexes.")
+        print("Run 'alembic upgrade head' and check the plans above.")
+
+    sys.exit(0 if success else 1)
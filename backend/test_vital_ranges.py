@@ -0,0 +1,120 @@
+"""
+Test script for the vitals range endpoints with timezone-aware start/end.
+
+Usage:
+python test_vital_ranges.py
+
+This script will:
+1. Seed a private in-memory SQLite database (not the one in DATABASE_URL)
+   with a day of heart rate readings in the time-series store
+2. Query each range endpoint with naive UTC bounds, with "Z"-suffixed bounds
+   (as JavaScript's toISOString() sends them) and with an offset
+3. Check every form returns 200 and the same readings
+"""
+import os
+import sys
+from datetime import datetime
+
+import numpy as np
+from dotenv import load_dotenv
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+# Add the current directory to the path so we can import our modules
+sys.path.append('.')
+
+load_dotenv()
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import models
+from database import get_db
+from routers import health_records
+from routers.auth import get_current_user
+from vitals_store import to_ms, vitals_store
+
+PATIENT_ID = 1
+DAY = datetime(2026, 10, 1)
+READINGS = 288
+
+# The same range written three ways
+RANGES = {
+    "naive UTC": ("2026-10-01T00:00:00", "2026-10-02T00:00:00"),
+    "Z suffix": ("2026-10-01T00:00:00Z", "2026-10-02T00:00:00Z"),
+    "+02:00 offset": ("2026-10-01T02:00:00+02:00", "2026-10-02T02:00:00+02:00"),
+}
+
+# Endpoint: (path, extra query parameters, readings in the response)
+ENDPOINTS = {
+    "series": ("/health-records/series", {}, lambda body: len(body["timestamps"])),
+    "aggregate": ("/health-records/aggregate", {"max_points": 24}, lambda body: sum(body["count"])),
+    "anomalies": ("/health-records/anomalies", {}, len),
+}
+
+def seed():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    models.Base.metadata.create_all(bind=engine)
+    SessionTest = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    db = SessionTest()
+    try:
+        db.execute(insert(models.User), [
+            {"id": PATIENT_ID, "email": "patient@example.com", "name": "Patient", "hashed_password": "x", "role": models.UserRole.patient}
+        ])
+        timestamps = to_ms(DAY) + np.arange(READINGS, dtype=np.int64) * 5 * 60_000
+        values = np.full(READINGS, 64.0)
+        values[-1] = 190.0  # one reading outside the clinical range
+        vitals_store.append(db, PATIENT_ID, models.HealthRecordType.heart_rate, timestamps, values)
+    finally:
+        db.close()
+    return SessionTest
+
+def test_vital_ranges() -> bool:
+    SessionTest = seed()
+    app = FastAPI()
+    app.include_router(health_records.router)
+
+    def override_get_db():
+        db = SessionTest()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_current_user] = lambda: models.User(id=PATIENT_ID, role=models.UserRole.patient)
+
+    results = []
+    with TestClient(app, raise_server_exceptions=False) as client:
+        for description, (path, params, readings) in ENDPOINTS.items():
+            bodies = {}
+            for form, (start, end) in RANGES.items():
+                response = client.get(path, params={"record_type": "heart_rate", "start": start, "end": end, **params})
+                if response.status_code != 200:
+                    print(f"ERROR: {description} with {form} bounds returned {response.status_code}: {response.text}")
+                    results.append(False)
+                    continue
+                bodies[form] = response.json()
+            if len(bodies) < len(RANGES):
+                continue
+
+            expected = bodies["naive UTC"]
+            ok = readings(expected) > 0 and all(body == expected for body in bodies.values())
+            if ok:
+                print(f"SUCCESS: {description} returns the same {readings(expected)} readings for every form of the range.")
+            else:
+                print(f"ERROR: {description} returns different readings per form: {[readings(body) for body in bodies.values()]}")
+            results.append(ok)
+    return all(results)
+
+if __name__ == "__main__":
+    print("Querying the vitals range endpoints with timezone-aware bounds...")
+    success = test_vital_ranges()
+
+    if success:
+        print("\nSUCCESS: Timezone-aware ranges select the same readings as naive UTC ones.")
+    else:
+        print("\nFAILED: Some endpoints reject or misread timezone-aware ranges.")
+
+    sys.exit(0 if success else 1)
@@ -0,0 +1,262 @@
+"""
+Streaming anomaly detection over incoming vitals.
+
+Each (user, vital type) pair owns a slot in a handful of NumPy arrays holding
+an exponentially weighted mean and variance of its readings, so checking a
+reading is O(1) work and a few dozen bytes of state. A reading is flagged
+when it breaks the type's clinical limits or, once the slot has warmed up,
+when its z-score against the weighted mean exceeds ANOMALY_Z_THRESHOLD.
+`replay` runs the same recurrences vectorized over a whole series, which is
+used for bulk syncs and for scanning history.
+
+State lives in the API process, so a restart only costs the warm-up readings.
+"""
+import math
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+import models
+from app.core.config import settings
+from app.services.timeline_service import TimelineService
+from vitals_store import CANONICAL_UNITS, vitals_store, from_ms
+
+# Readings outside these limits (canonical units) are always anomalies
+CLINICAL_LIMITS = {
+    models.HealthRecordType.heart_rate: (40.0, 150.0),
+    models.HealthRecordType.blood_pressure: (80.0, 180.0),
+    models.HealthRecordType.blood_glucose: (54.0, 250.0),
+}
+
+# Floor for the weighted standard deviation, so a very steady series does
+# not turn measurement noise into huge z-scores
+MIN_STD = {
+    models.HealthRecordType.heart_rate: 3.0,
+    models.HealthRecordType.blood_pressure: 4.0,
+    models.HealthRecordType.weight: 0.5,
+    models.HealthRecordType.blood_glucose: 8.0,
+}
+
+REASON_HIGH, REASON_LOW, REASON_UNUSUAL = 1, 2, 3
+REASONS = {REASON_HIGH: "high", REASON_LOW: "low", REASON_UNUSUAL: "unusual"}
+
+_BLOCK = 128
+_NEVER = -(1 << 62)  # far enough from int64 min that `timestamp - _NEVER` cannot overflow
+
+def _linear_recurrence(c: np.ndarray, decay: float, initial: float) -> np.ndarray:
+    """
+    Solves y[t] = decay * y[t-1] + c[t] (y[-1] = initial) without a Python loop
+    per element: each block of _BLOCK terms is one row of a matrix product and
+    only the carry between blocks is sequential.
+    """
+    n = len(c)
+    if n == 0:
+        return np.empty(0)
+    steps = np.arange(_BLOCK)
+    lags = steps[:, None] - steps[None, :]
+    weights = np.where(lags >= 0, decay ** np.maximum(lags, 0), 0.0)
+    blocks = np.concatenate([c, np.zeros(-n % _BLOCK)]).reshape(-1, _BLOCK)
+    local = blocks @ weights.T
+
+    carries = np.empty(len(blocks))
+    carry, block_decay = initial, decay ** _BLOCK
+    for index, last in enumerate(local[:, -1]):
+        carries[index] = carry
+        carry = last + block_decay * carry
+    return (local + carries[:, None] * decay ** (steps + 1)).reshape(-1)[:n]
+
+def limit_reasons(record_type: models.HealthRecordType, values: np.ndarray) -> np.ndarray:
+    reasons = np.zeros(len(values), dtype=np.uint8)
+    limits = CLINICAL_LIMITS.get(record_type)
+    if limits:
+        reasons[values < limits[0]] = REASON_LOW
+        reasons[values > limits[1]] = REASON_HIGH
+    return reasons
+
+class AnomalyDetector:
+    """
+    Per-slot state: weighted mean and variance, readings seen, timestamp of
+    the last reading (older or repeated readings are skipped, so re-syncs
+    are not counted twice) and time and reason of the last alert. An alert
+    with the same reason is repeated at most once per
+    ANOMALY_ALERT_COOLDOWN_MINUTES of reading time.
+    """
+    def __init__(self, alpha: Optional[float] = None, z_threshold: Optional[float] = None, min_readings: Optional[int] = None, cooldown_ms: Optional[int] = None, capacity: int = 1024):
+        self.alpha = settings.ANOMALY_EWMA_ALPHA if alpha is None else alpha
+        self.z_threshold = settings.ANOMALY_Z_THRESHOLD if z_threshold is None else z_threshold
+        self.min_readings = settings.ANOMALY_MIN_READINGS if min_readings is None else min_readings
+        self.cooldown_ms = settings.ANOMALY_ALERT_COOLDOWN_MINUTES * 60_000 if cooldown_ms is None else cooldown_ms
+        self._slots: Dict[Tuple[int, models.HealthRecordType], int] = {}
+        self.mean = np.zeros(capacity)
+        self.var = np.zeros(capacity)
+        self.count = np.zeros(capacity, dtype=np.int64)
+        self.last_ts = np.full(capacity, _NEVER)
+        self.last_alert = np.full(capacity, _NEVER)
+        self.last_reason = np.zeros(capacity, dtype=np.uint8)
+
+    def _slot(self, user_id: int, record_type: models.HealthRecordType) -> int:
+        slot = self._slots.get((user_id, record_type))
+        if slot is None:
+            slot = len(self._slots)
+            if slot == len(self.mean):
+                for name, empty in (("mean", 0), ("var", 0), ("count", 0), ("last_ts", _NEVER), ("last_alert", _NEVER), ("last_reason", 0)):
+                    current = getattr(self, name)
+                    setattr(self, name, np.concatenate([current, np.full(len(current), empty, dtype=current.dtype)]))
+            self._slots[(user_id, record_type)] = slot
+        return slot
+
+    def _anomaly(self, record_type: models.HealthRecordType, timestamp: int, value: float, reason: int, z_score: float, baseline: Optional[float]) -> Dict[str, Any]:
+        return {
+            "record_type": record_type.value,
+            "timestamp": int(timestamp),
+            "value": float(value),
+            "reason": REASONS[reason],
+            "z_score": None if math.isnan(z_score) else round(float(z_score), 2),
+            "baseline": None if baseline is None else round(float(baseline), 2)
+        }
+
+    def observe(self, user_id: int, record_type, timestamp: int, value: float) -> Optional[Dict[str, Any]]:
+        """
+        Folds one reading (ms timestamp, canonical unit) into its slot and
+        returns an anomaly to report, if any.
+        """
+        record_type = models.HealthRecordType(record_type)
+        slot = self._slot(user_id, record_type)
+        if timestamp <= self.last_ts[slot]:
+            return None
+
+        count, mean, var = int(self.count[slot]), float(self.mean[slot]), float(self.var[slot])
+        reason, z_score, baseline = 0, math.nan, None
+        limits = CLINICAL_LIMITS.get(record_type)
+        if limits and value < limits[0]:
+            reason = REASON_LOW
+        elif limits and value > limits[1]:
+            reason = REASON_HIGH
+
+        if count == 0:
+            mean, var = value, 0.0
+        else:
+            diff = value - mean
+            if count >= self.min_readings:
+                baseline = mean
+                z_score = diff / max(math.sqrt(var), MIN_STD[record_type])
+                if not reason and abs(z_score) >= self.z_threshold:
+                    reason = REASON_UNUSUAL
+            mean += self.alpha * diff
+            var = (1 - self.alpha) * (var + self.alpha * diff * diff)
+
+        self.mean[slot], self.var[slot], self.count[slot], self.last_ts[slot] = mean, var, count + 1, timestamp
+        if reason and (reason != self.last_reason[slot] or timestamp - self.last_alert[slot] >= self.cooldown_ms):
+            self.last_alert[slot], self.last_reason[slot] = timestamp, reason
+            return self._anomaly(record_type, timestamp, value, reason, z_score, baseline)
+        return None
+
+    def replay(self, record_type, values: np.ndarray, state: Tuple[float, float, int] = (0.0, 0.0, 0)) -> Tuple[np.ndarray, np.ndarray, np.ndarray, Tuple[float, float, int]]:
+        """
+        Vectorized equivalent of observing `values` in order, starting from
+        slot state (mean, var, count). Returns per-reading reason codes,
+        z-scores (NaN during warm-up), the mean each reading was compared
+        against, and the final state. Alert cooldown is not applied.
+        """
+        record_type = models.HealthRecordType(record_type)
+        values = np.asarray(values, dtype=np.float64)
+        mean, var, count = state
+        n = len(values)
+        reasons = limit_reasons(record_type, values)
+        z_scores = np.full(n, np.nan)
+        baselines = np.full(n, np.nan)
+        if n == 0:
+            return reasons, z_scores, baselines, state
+
+        start = 0
+        if count == 0:
+            mean, var, count, start = float(values[0]), 0.0, 1, 1
+        rest = values[start:]
+        decay = 1 - self.alpha
+        means = _linear_recurrence(self.alpha * rest, decay, mean)
+        previous_means = np.concatenate([[mean], means[:-1]])
+        diffs = rest - previous_means
+        variances = _linear_recurrence(decay * self.alpha * diffs * diffs, decay, var)
+        previous_vars = np.concatenate([[var], variances[:-1]])
+
+        warm = count + np.arange(len(rest)) >= self.min_readings
+        scores = diffs / np.maximum(np.sqrt(previous_vars), MIN_STD[record_type])
+        z_scores[start:] = np.where(warm, scores, np.nan)
+        baselines[start:] = np.where(warm, previous_means, np.nan)
+        unusual = warm & (np.abs(scores) >= self.z_threshold) & (reasons[start:] == 0)
+        reasons[start:][unusual] = REASON_UNUSUAL
+
+        if len(rest):
+            mean, var = float(means[-1]), float(variances[-1])
+        return reasons, z_scores, baselines, (mean, var, count + len(rest))
+
+    def _alerts(self, record_type: models.HealthRecordType, timestamps: np.ndarray, values: np.ndarray, reasons: np.ndarray, z_scores: np.ndarray, baselines: np.ndarray, last_alert: int, last_reason: int) -> Tuple[List[Dict[str, Any]], int, int]:
+        anomalies = []
+        for index in np.flatnonzero(reasons):
+            reason = int(reasons[index])
+            if reason != last_reason or timestamps[index] - last_alert >= self.cooldown_ms:
+                last_alert, last_reason = int(timestamps[index]), reason
+                baseline = None if math.isnan(baselines[index]) else baselines[index]
+                anomalies.append(self._anomaly(record_type, timestamps[index], values[index], reason, z_scores[index], baseline))
+        return anomalies, last_alert, last_reason
+
+    def observe_batch(self, user_id: int, record_type, timestamps: np.ndarray, values: np.ndarray) -> List[Dict[str, Any]]:
+        """
+        observe() for a batch of readings sorted by timestamp, vectorized.
+        """
+        record_type = models.HealthRecordType(record_type)
+        slot = self._slot(user_id, record_type)
+        new = timestamps > self.last_ts[slot]
+        timestamps, values = timestamps[new], values[new]
+        if len(timestamps) == 0:
+            return []
+
+        state = (float(self.mean[slot]), float(self.var[slot]), int(self.count[slot]))
+        reasons, z_scores, baselines, (mean, var, count) = self.replay(record_type, values, state)
+        anomalies, last_alert, last_reason = self._alerts(
+            record_type, timestamps, values, reasons, z_scores, baselines, int(self.last_alert[slot]), int(self.last_reason[slot])
+        )
+        self.mean[slot], self.var[slot], self.count[slot] = mean, var, count
+        self.last_ts[slot], self.last_alert[slot], self.last_reason[slot] = timestamps[-1], last_alert, last_reason
+        return anomalies
+
+    def scan_history(self, db: Session, user_id: int, record_type, start: datetime, end: datetime) -> List[Dict[str, Any]]:
+        """
+        Replays stored readings in [start, end) from a fresh state; does not
+        touch the live slots.
+        """
+        record_type = models.HealthRecordType(record_type)
+        timestamps, values = vitals_store.query(db, user_id, record_type, start, end)
+        reasons, z_scores, baselines, _ = self.replay(record_type, values)
+        anomalies, _, _ = self._alerts(record_type, timestamps, values, reasons, z_scores, baselines, _NEVER, 0)
+        return anomalies
+
+async def log_anomalies(user_id: int, anomalies: List[Dict[str, Any]]):
+    """
+    Records anomalies as `vital_anomaly` timeline events. Failures are logged
+    and never fail the request that ingested the readings.
+    """
+    timeline = TimelineService()
+    for anomaly in anomalies:
+        record_type = models.HealthRecordType(anomaly["record_type"])
+        name = record_type.value.replace("_", " ")
+        unit = CANONICAL_UNITS[record_type].value
+        if anomaly["reason"] == "unusual":
+            description = f"{anomaly['value']:g} {unit} is far from your recent average of {anomaly['baseline']:g} {unit}."
+        else:
+            low, high = CLINICAL_LIMITS[record_type]
+            description = f"{anomaly['value']:g} {unit} is outside the {low:g}-{high:g} {unit} range."
+        try:
+            await timeline.log_event(
+                user_id=str(user_id),
+                event_type="vital_anomaly",
+                title=f"Unusual {name} reading",
+                description=description,
+                metadata={**anomaly, "unit": unit, "recorded_at": from_ms(anomaly["timestamp"]).isoformat()}
+            )
+        except Exception as e:
+            print(f"[ANOMALY] Could not log anomaly for user {user_id} ({e}).")
+
+anomaly_detector = AnomalyDetector()
@@ -0,0 +1,490 @@
+"""
+Time-series storage for vitals readings.
+
+Readings are kept per user, vital type and UTC day in `vital_chunks` rows.
+Each chunk stores its timestamps as delta-of-deltas and its values as the XOR
+of consecutive IEEE-754 bit patterns (the Gorilla encodings), computed with
+NumPy and packed with a byte-transpose + zlib instead of a bit-level writer.
+Regular per-minute or per-second streams compress to a few bits per reading
+and a day decodes in well under a millisecond.
+
+Every write also refreshes the affected 1h and 1d buckets in `vital_rollups`,
+which `aggregate` reads so long chart ranges never decode raw readings. 1m
+buckets only ever cover a few days and are folded from the chunks on read.
+"""
+import struct
+import zlib
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+import models
+
+CODEC_VERSION = 1
+_HEADER = struct.Struct("<BII")  # version, point count, timestamp block length
+
+DAY_MS = 86_400_000
+WEEK_MS = 7 * DAY_MS
+EPOCH = datetime(1970, 1, 1)
+MONDAY_OFFSET_MS = 4 * DAY_MS  # the epoch was a Thursday
+
+# Chart bucket widths, finest first. Only STORED_ROLLUPS are materialized:
+# minutes are folded from the chunks and weeks summed from days at read time.
+ROLLUP_RESOLUTIONS = {"1m": 60_000, "1h": 3_600_000, "1d": DAY_MS}
+STORED_ROLLUPS = ("1h", "1d")
+
+# Unit every reading of a type is stored in
+CANONICAL_UNITS = {
+    models.HealthRecordType.blood_pressure: models.HealthRecordUnit.mmHg,
+    models.HealthRecordType.heart_rate: models.HealthRecordUnit.bpm,
+    models.HealthRecordType.weight: models.HealthRecordUnit.kg,
+    models.HealthRecordType.blood_glucose: models.HealthRecordUnit.mg_dL,
+}
+
+_CONVERSIONS = {
+    (models.HealthRecordUnit.lbs, models.HealthRecordUnit.kg): 0.45359237,
+    (models.HealthRecordUnit.mmol_L, models.HealthRecordUnit.mg_dL): 18.0,
+}
+
+# Physiologically plausible readings, in canonical units
+PLAUSIBLE_RANGES = {
+    models.HealthRecordType.blood_pressure: (30.0, 300.0),
+    models.HealthRecordType.heart_rate: (20.0, 250.0),
+    models.HealthRecordType.weight: (2.0, 500.0),
+    models.HealthRecordType.blood_glucose: (10.0, 1000.0),
+}
+
+# Accepted reading timestamps relative to now
+MAX_READING_AGE_MS = 10 * 365 * DAY_MS
+MAX_CLOCK_SKEW_MS = 3_600_000
+
+REJECT_VALUE, REJECT_TIMESTAMP = 1, 2
+REJECT_REASONS = {REJECT_VALUE: "value out of range", REJECT_TIMESTAMP: "timestamp out of range"}
+MAX_REPORTED_ERRORS = 20
+
+def to_utc(value: datetime) -> datetime:
+    """Naive UTC, the form every stored timestamp uses; aware values are converted"""
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+def to_ms(value: datetime) -> int:
+    return (to_utc(value) - EPOCH) // timedelta(milliseconds=1)
+
+def from_ms(value: int) -> datetime:
+    return EPOCH + timedelta(milliseconds=int(value))
+
+def to_canonical(record_type, unit, value: float) -> Optional[float]:
+    """
+    Converts a reading to its type's canonical unit, or None if there is no conversion.
+    """
+    record_type = models.HealthRecordType(record_type)
+    unit = models.HealthRecordUnit(unit)
+    target = CANONICAL_UNITS[record_type]
+    if unit == target:
+        return value
+    factor = _CONVERSIONS.get((unit, target))
+    return value * factor if factor else None
+
+def validate_readings(record_type, timestamps: np.ndarray, values: np.ndarray, now_ms: int) -> np.ndarray:
+    """
+    Vectorized plausibility check. Returns a reason code per reading (0 = valid).
+    """
+    low, high = PLAUSIBLE_RANGES[models.HealthRecordType(record_type)]
+    reasons = np.zeros(len(values), dtype=np.uint8)
+    reasons[(timestamps < now_ms - MAX_READING_AGE_MS) | (timestamps > now_ms + MAX_CLOCK_SKEW_MS)] = REJECT_TIMESTAMP
+    reasons[~np.isfinite(values) | (values < low) | (values > high)] = REJECT_VALUE
+    return reasons
+
+def rollup(buckets: np.ndarray, counts: np.ndarray, totals: np.ndarray, mins: np.ndarray, maxs: np.ndarray) -> Tuple[np.ndarray, ...]:
+    """
+    Merges rows that share a bucket start (input sorted by bucket) and returns
+    (bucket starts, counts, totals, mins, maxs). Raw readings are rows with a
+    count of 1 and the value as total, min and max.
+    """
+    if len(buckets) == 0:
+        return buckets, counts, totals, mins, maxs
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    return (
+        buckets[starts],
+        np.add.reduceat(counts, starts),
+        np.add.reduceat(totals, starts),
+        np.minimum.reduceat(mins, starts),
+        np.maximum.reduceat(maxs, starts),
+    )
+
+def _shuffle(words: np.ndarray) -> bytes:
+    # Byte-transpose: the high bytes of small deltas and XORs are mostly zero
+    # and end up next to each other, which is what zlib compresses well
+    return zlib.compress(words.view(np.uint8).reshape(-1, 8).T.tobytes(), 6)
+
+def _unshuffle(blob: bytes, count: int) -> np.ndarray:
+    raw = np.frombuffer(zlib.decompress(blob), dtype=np.uint8)
+    return np.ascontiguousarray(raw.reshape(8, count).T).view(np.uint64).reshape(count)
+
+def encode_chunk(timestamps: np.ndarray, values: np.ndarray) -> bytes:
+    """
+    Encodes sorted int64 millisecond timestamps and float64 values.
+    """
+    timestamps = np.asarray(timestamps, dtype=np.int64)
+    values = np.asarray(values, dtype=np.float64)
+
+    deltas = np.diff(timestamps, prepend=np.int64(0))
+    dod = deltas.copy()
+    dod[2:] = deltas[2:] - deltas[1:-1]
+    zigzag = ((dod << 1) ^ (dod >> 63)).view(np.uint64)
+
+    bits = values.view(np.uint64)
+    xored = bits.copy()
+    xored[1:] = bits[1:] ^ bits[:-1]
+
+    ts_block = _shuffle(zigzag)
+    return _HEADER.pack(CODEC_VERSION, len(timestamps), len(ts_block)) + ts_block + _shuffle(xored)
+
+def decode_chunk(data: bytes) -> Tuple[np.ndarray, np.ndarray]:
+    version, count, ts_len = _HEADER.unpack_from(data)
+    if version != CODEC_VERSION:
+        raise ValueError(f"Unsupported vital chunk version {version}")
+    offset = _HEADER.size
+
+    zigzag = _unshuffle(data[offset:offset + ts_len], count)
+    dod = (zigzag >> np.uint64(1)).view(np.int64) ^ -(zigzag & np.uint64(1)).view(np.int64)
+    deltas = dod.copy()
+    deltas[1:] = np.cumsum(dod[1:])
+    timestamps = np.cumsum(deltas)
+
+    values = np.bitwise_xor.accumulate(_unshuffle(data[offset + ts_len:], count)).view(np.float64)
+    return timestamps, values
+
+def _merge(timestamps: np.ndarray, values: np.ndarray, old_timestamps: Optional[np.ndarray] = None, old_values: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Sorted unique readings of a batch merged over stored ones. A new reading
+    replaces a stored one at the same timestamp, and within the batch the
+    last reading for a timestamp wins.
+    """
+    # Newest first so np.unique keeps them over older duplicates
+    timestamps, values = timestamps[::-1], values[::-1]
+    if old_timestamps is not None:
+        timestamps = np.concatenate([timestamps, old_timestamps])
+        values = np.concatenate([values, old_values])
+    timestamps, first = np.unique(timestamps, return_index=True)
+    return timestamps, values[first]
+
+class VitalsStore:
+    """
+    Service API over `vital_chunks`. Appends merge into existing day chunks;
+    a reading at an already stored timestamp replaces the old value, so
+    re-syncing the same data is idempotent.
+    """
+
+    def append(self, db: Session, user_id: int, record_type, timestamps: np.ndarray, values: np.ndarray, commit: bool = True) -> int:
+        """
+        Stores readings (int64 ms timestamps, canonical-unit values) and
+        returns how many were new.
+        """
+        record_type = models.HealthRecordType(record_type)
+        timestamps = np.asarray(timestamps, dtype=np.int64)
+        values = np.asarray(values, dtype=np.float64)
+        if len(timestamps) == 0:
+            return 0
+
+        order = np.argsort(timestamps, kind="stable")
+        timestamps, values = timestamps[order], values[order]
+        days = timestamps // DAY_MS
+        splits = np.flatnonzero(np.diff(days)) + 1
+        chunk_days = days[np.r_[0, splits]]
+
+        chunk_starts = [from_ms(day * DAY_MS) for day in chunk_days]
+        # Row locks serialize concurrent appends to the same day, so neither
+        # overwrites the other's merge
+        existing = self._locked_chunks(db, user_id, record_type, chunk_starts)
+
+        added = 0
+        for chunk_start, ts, vals in zip(chunk_starts, np.split(timestamps, splits), np.split(values, splits)):
+            touched = (int(ts[0]), int(ts[-1]))
+            chunk = existing.get(chunk_start)
+            if chunk is None:
+                merged_ts, merged_vals = _merge(ts, vals)
+                chunk = self._insert_chunk(db, user_id, record_type, chunk_start, merged_ts, merged_vals)
+                if chunk is not None:
+                    added += len(merged_ts)
+                    self._refresh_rollups(db, user_id, record_type, merged_ts, merged_vals, *touched)
+                    continue
+                # Another transaction stored this day first; merge into its chunk
+                chunk = self._locked_chunks(db, user_id, record_type, [chunk_start])[chunk_start]
+
+            old_ts, old_vals = decode_chunk(chunk.data)
+            merged_ts, merged_vals = _merge(ts, vals, old_ts, old_vals)
+            added += len(merged_ts) - len(old_ts)
+            self._fill(chunk, merged_ts, merged_vals)
+            self._refresh_rollups(db, user_id, record_type, merged_ts, merged_vals, *touched)
+
+        if commit:
+            db.commit()
+        return added
+
+    def ingest(self, db: Session, user_id: int, groups: List[Tuple[Any, Any, np.ndarray, np.ndarray, np.ndarray]]) -> Dict[str, Any]:
+        """
+        Validates and stores a batch of readings in one transaction. `groups`
+        holds (record_type, unit, timestamps, values, positions) per vital type
+        and unit; positions index the readings in the request for error
+        reporting. A unit of None means the canonical unit.
+        """
+        now_ms = to_ms(datetime.utcnow())
+        received = accepted = inserted = 0
+        errors: List[Dict[str, Any]] = []
+        accepted_by_type: Dict[models.HealthRecordType, List[Tuple[np.ndarray, np.ndarray]]] = {}
+
+        def reject(positions, reason: str):
+            for position in positions[:MAX_REPORTED_ERRORS - len(errors)]:
+                errors.append({"index": int(position), "reason": reason})
+
+        for type_name, unit_name, timestamps, values, positions in groups:
+            received += len(timestamps)
+            try:
+                record_type = models.HealthRecordType(type_name)
+                unit = models.HealthRecordUnit(unit_name) if unit_name is not None else CANONICAL_UNITS[record_type]
+            except ValueError:
+                reject(positions, f"unknown record_type or unit ({type_name}, {unit_name})")
+                continue
+            factor = 1.0 if unit == CANONICAL_UNITS[record_type] else _CONVERSIONS.get((unit, CANONICAL_UNITS[record_type]))
+            if factor is None:
+                reject(positions, f"unit {unit.value} not supported for {record_type.value}")
+                continue
+
+            values = values * factor
+            reasons = validate_readings(record_type, timestamps, values, now_ms)
+            valid = reasons == 0
+            if not valid.all():
+                for code, reason in REJECT_REASONS.items():
+                    reject(positions[reasons == code], reason)
+            timestamps, values = timestamps[valid], values[valid]
+            if len(timestamps) == 0:
+                continue
+
+            accepted += len(timestamps)
+            inserted += self.append(db, user_id, record_type, timestamps, values, commit=False)
+            accepted_by_type.setdefault(record_type, []).append((timestamps, values))
+
+        db.commit()
+        readings = {}
+        for record_type, parts in accepted_by_type.items():
+            timestamps = np.concatenate([ts for ts, _ in parts])
+            values = np.concatenate([vals for _, vals in parts])
+            order = np.argsort(timestamps, kind="stable")
+            readings[record_type] = (timestamps[order], values[order])
+        return {
+            "received": received,
+            "accepted": accepted,
+            "inserted": inserted,
+            "duplicates": accepted - inserted,
+            "rejected": received - accepted,
+            "errors": errors,
+            "readings": readings
+        }
+
+    def remove(self, db: Session, user_id: int, record_type, timestamp: int, value: Optional[float] = None, commit: bool = True) -> bool:
+        """
+        Drops the reading at `timestamp`. With `value`, only a reading holding
+        that value is dropped, so removing a mirrored manual entry leaves a
+        wearable reading that has since taken its timestamp in place.
+        """
+        record_type = models.HealthRecordType(record_type)
+        chunk = db.query(models.VitalChunk).filter(
+            models.VitalChunk.user_id == user_id,
+            models.VitalChunk.record_type == record_type,
+            models.VitalChunk.chunk_start == from_ms(timestamp // DAY_MS * DAY_MS)
+        ).first()
+        if chunk is None:
+            return False
+
+        ts, vals = decode_chunk(chunk.data)
+        keep = ts != timestamp
+        if value is not None:
+            keep |= ~np.isclose(vals, value)
+        if keep.all():
+            return False
+        if keep.any():
+            self._fill(chunk, ts[keep], vals[keep])
+        else:
+            db.delete(chunk)
+        self._refresh_rollups(db, user_id, record_type, ts[keep], vals[keep], timestamp, timestamp)
+        if commit:
+            db.commit()
+        return True
+
+    def query(self, db: Session, user_id: int, record_type, start: datetime, end: datetime) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Readings with start <= timestamp < end as (int64 ms timestamps, float64 values).
+        """
+        record_type = models.HealthRecordType(record_type)
+        start, end = to_utc(start), to_utc(end)
+        start_ms, end_ms = to_ms(start), to_ms(end)
+        chunks = db.query(models.VitalChunk.data).filter(
+            models.VitalChunk.user_id == user_id,
+            models.VitalChunk.record_type == record_type,
+            models.VitalChunk.chunk_start >= from_ms(start_ms // DAY_MS * DAY_MS),
+            models.VitalChunk.chunk_start < end
+        ).order_by(models.VitalChunk.chunk_start).all()
+        if not chunks:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+
+        decoded = [decode_chunk(chunk.data) for chunk in chunks]
+        timestamps = np.concatenate([ts for ts, _ in decoded])
+        values = np.concatenate([vals for _, vals in decoded])
+        mask = (timestamps >= start_ms) & (timestamps < end_ms)
+        return timestamps[mask], values[mask]
+
+    def aggregate(self, db: Session, user_id: int, record_type, start: datetime, end: datetime, max_points: int) -> Tuple[str, Tuple[np.ndarray, ...]]:
+        """
+        Buckets covering [start, end) at the finest resolution that fits in
+        `max_points` buckets, falling back to weeks when even days do not.
+        Returns the resolution and (bucket starts in ms, counts, totals, mins, maxs).
+        """
+        record_type = models.HealthRecordType(record_type)
+        start, end = to_utc(start), to_utc(end)
+        start_ms, end_ms = to_ms(start), to_ms(end)
+        span = max(end_ms - start_ms, 1)
+        resolution = next((label for label, width in ROLLUP_RESOLUTIONS.items() if -(-span // width) <= max_points), "1w")
+
+        if resolution == "1w":
+            first_bucket = (start_ms - MONDAY_OFFSET_MS) // WEEK_MS * WEEK_MS + MONDAY_OFFSET_MS
+        else:
+            first_bucket = start_ms // ROLLUP_RESOLUTIONS[resolution] * ROLLUP_RESOLUTIONS[resolution]
+        if resolution == "1m":
+            timestamps, values = self.query(db, user_id, record_type, from_ms(first_bucket), end)
+            return resolution, rollup(timestamps // 60_000 * 60_000, np.ones(len(timestamps), dtype=np.int64), values, values, values)
+
+        rows = db.query(
+            models.VitalRollup.bucket_start, models.VitalRollup.count, models.VitalRollup.total,
+            models.VitalRollup.min_value, models.VitalRollup.max_value
+        ).filter(
+            models.VitalRollup.user_id == user_id,
+            models.VitalRollup.record_type == record_type,
+            models.VitalRollup.resolution == ("1d" if resolution == "1w" else resolution),
+            models.VitalRollup.bucket_start >= from_ms(first_bucket),
+            models.VitalRollup.bucket_start < end
+        ).order_by(models.VitalRollup.bucket_start).all()
+
+        buckets = np.array([to_ms(row.bucket_start) for row in rows], dtype=np.int64)
+        counts = np.array([row.count for row in rows], dtype=np.int64)
+        totals, mins, maxs = (np.array([row[i] for row in rows], dtype=np.float64) for i in (2, 3, 4))
+        if resolution == "1w":
+            buckets = (buckets - MONDAY_OFFSET_MS) // WEEK_MS * WEEK_MS + MONDAY_OFFSET_MS
+            return resolution, rollup(buckets, counts, totals, mins, maxs)
+        return resolution, (buckets, counts, totals, mins, maxs)
+
+    def rebuild_rollups(self, db: Session, user_id: int, record_type, commit: bool = True):
+        """
+        Recomputes every rollup bucket from the stored chunks, e.g. for data
+        written before vital_rollups existed.
+        """
+        record_type = models.HealthRecordType(record_type)
+        for chunk in db.query(models.VitalChunk).filter(
+            models.VitalChunk.user_id == user_id,
+            models.VitalChunk.record_type == record_type
+        ):
+            ts, vals = decode_chunk(chunk.data)
+            self._refresh_rollups(db, user_id, record_type, ts, vals, int(ts[0]), int(ts[-1]))
+        if commit:
+            db.commit()
+
+    def latest(self, db: Session, user_id: int, record_type) -> Optional[Tuple[datetime, float]]:
+        chunk = db.query(models.VitalChunk.last_at, models.VitalChunk.last_value).filter(
+            models.VitalChunk.user_id == user_id,
+            models.VitalChunk.record_type == models.HealthRecordType(record_type)
+        ).order_by(models.VitalChunk.chunk_start.desc()).first()
+        return (chunk.last_at, chunk.last_value) if chunk else None
+
+    def manual_timestamps(self, db: Session, chunks, max_record_id: Optional[int] = None) -> Dict[Tuple[int, Any], np.ndarray]:
+        """
+        Sorted timestamps (ms) of the health_records rows inside the given day
+        chunks, per (user, type); `chunks` are rows starting with user_id,
+        record_type and chunk_start. Manual entries are mirrored into the
+        chunks (routers.health_records._store_reading), so exports skip these
+        readings and emit the health record instead.
+        """
+        records = models.HealthRecord
+        starts = [chunk[2] for chunk in chunks]
+        if not starts:
+            return {}
+        statement = select(records.user_id, records.record_type, records.recorded_at).where(
+            records.user_id.in_({chunk[0] for chunk in chunks}),
+            records.record_type.in_({chunk[1] for chunk in chunks}),
+            records.recorded_at >= min(starts),
+            records.recorded_at < from_ms(to_ms(max(starts)) + DAY_MS)
+        )
+        if max_record_id is not None:
+            statement = statement.where(records.id <= max_record_id)
+        recorded: Dict[Tuple[int, Any], List[int]] = {}
+        for user_id, record_type, recorded_at in db.execute(statement):
+            recorded.setdefault((user_id, record_type), []).append(to_ms(recorded_at))
+        return {key: np.sort(np.array(values, dtype=np.int64)) for key, values in recorded.items()}
+
+    def _locked_chunks(self, db: Session, user_id: int, record_type, chunk_starts: List[datetime]) -> Dict[datetime, models.VitalChunk]:
+        return {
+            chunk.chunk_start: chunk for chunk in db.query(models.VitalChunk).filter(
+                models.VitalChunk.user_id == user_id,
+                models.VitalChunk.record_type == record_type,
+                models.VitalChunk.chunk_start.in_(chunk_starts)
+            ).with_for_update()
+        }
+
+    def _insert_chunk(self, db: Session, user_id: int, record_type, chunk_start: datetime, timestamps: np.ndarray, values: np.ndarray) -> Optional[models.VitalChunk]:
+        """The new day chunk, or None when a concurrent append inserted it first"""
+        chunk = models.VitalChunk(user_id=user_id, record_type=record_type, chunk_start=chunk_start)
+        self._fill(chunk, timestamps, values)
+        try:
+            # Flushed in a savepoint so a conflict on
+            # uq_vital_chunks_user_type_start only undoes this insert
+            with db.begin_nested():
+                db.add(chunk)
+        except IntegrityError:
+            return None
+        return chunk
+
+    def _fill(self, chunk: models.VitalChunk, timestamps: np.ndarray, values: np.ndarray):
+        chunk.data = encode_chunk(timestamps, values)
+        chunk.count = len(timestamps)
+        chunk.first_at = from_ms(timestamps[0])
+        chunk.last_at = from_ms(timestamps[-1])
+        chunk.min_value = float(values.min())
+        chunk.max_value = float(values.max())
+        chunk.last_value = float(values[-1])
+
+    def _refresh_rollups(self, db: Session, user_id: int, record_type, timestamps: np.ndarray, values: np.ndarray, first: int, last: int):
+        # Rewrites the buckets between the first and last touched timestamp
+        # from the day's merged readings; a single new reading rewrites one
+        # bucket per resolution
+        for resolution in STORED_ROLLUPS:
+            width = ROLLUP_RESOLUTIONS[resolution]
+            low, high = first // width * width, last // width * width
+            db.query(models.VitalRollup).filter(
+                models.VitalRollup.user_id == user_id,
+                models.VitalRollup.record_type == record_type,
+                models.VitalRollup.resolution == resolution,
+                models.VitalRollup.bucket_start >= from_ms(low),
+                models.VitalRollup.bucket_start <= from_ms(high)
+            ).delete(synchronize_session=False)
+
+            window = slice(np.searchsorted(timestamps, low), np.searchsorted(timestamps, high + width))
+            ts, vals = timestamps[window], values[window]
+            if len(ts) == 0:
+                continue
+            buckets, counts, totals, mins, maxs = rollup(ts // width * width, np.ones(len(ts), dtype=np.int64), vals, vals, vals)
+            db.execute(insert(models.VitalRollup), [{
+                "user_id": user_id,
+                "record_type": record_type,
+                "resolution": resolution,
+                "bucket_start": from_ms(bucket),
+                "count": int(count),
+                "total": float(total),
+                "min_value": float(low_value),
+                "max_value": float(high_value)
+            } for bucket, count, total, low_value, high_value in zip(buckets, counts, totals, mins, maxs)])
+
+vitals_store = VitalsStore()
@@ -0,0 +1,212 @@
+"""
+Workout plan recommendations from the `workout_plans` catalog.
+
+The catalog is loaded into a WorkoutIndex holding one feature row per plan
+(level, goal and the strength/cardio/flexibility mix of its exercises), so
+ranking is a few vector operations over the whole catalog. The level and
+goal part of the score depends only on the (level, goal) bucket and is
+cached per bucket; a user's recent exercise history adds a variety term
+that favours plans unlike what they did lately.
+"""
+import time
+from functools import lru_cache
+from itertools import repeat
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+import models
+
+LEVELS = ("beginner", "intermediate", "advanced")
+GOALS = ("general", "strength", "cardio", "flexibility", "weight_loss")
+MODALITIES = ("strength", "cardio", "flexibility")
+
+# Exercise names (plan exercises or logged exercise types) are matched to
+# modalities by keyword; unmatched names count towards none
+MODALITY_KEYWORDS = {
+    "strength": ("squat", "push-up", "pushup", "press", "row", "deadlift", "lunge", "plank", "curl", "pull-up", "dip", "bridge", "weights"),
+    "cardio": ("run", "jog", "walk", "cycl", "bike", "swim", "jumping", "burpee", "high knees", "mountain climber", "skipping", "rope", "dance", "hiit"),
+    "flexibility": ("stretch", "yoga", "pose", "mobility", "circle", "cat-cow", "pilates", "rotate"),
+}
+
+# How well a plan built for one goal (column) serves a requested goal (row)
+GOAL_AFFINITY = np.array([
+    # general strength cardio flexibility weight_loss
+    [1.0, 0.7, 0.7, 0.7, 0.7],  # general
+    [0.5, 1.0, 0.2, 0.2, 0.4],  # strength
+    [0.5, 0.2, 1.0, 0.2, 0.8],  # cardio
+    [0.5, 0.2, 0.2, 1.0, 0.1],  # flexibility
+    [0.5, 0.4, 0.8, 0.1, 1.0],  # weight_loss
+])
+
+LEVEL_WEIGHT = 1.0
+GOAL_WEIGHT = 1.5
+HISTORY_WEIGHT = 0.5
+HISTORY_DAYS = 28
+
+# Plans shipped with the app. Migrated databases get them from the
+# add_workout_plans migration, create_all databases from seed_starter_plans
+STARTER_PLANS = [
+    {
+        "name": "Beginner Strength Training",
+        "description": "A gentle introduction to strength training for beginners",
+        "level": "beginner",
+        "goal": "strength",
+        "duration_minutes": 25,
+        "exercises": [
+            {"name": "Bodyweight Squats", "sets": 3, "reps": 10, "rest": "60 seconds"},
+            {"name": "Push-ups (or Modified Push-ups)", "sets": 3, "reps": 8, "rest": "60 seconds"},
+            {"name": "Plank", "sets": 3, "duration": "30 seconds", "rest": "45 seconds"},
+            {"name": "Dumbbell Rows", "sets": 3, "reps": 10, "rest": "60 seconds"}
+        ]
+    },
+    {
+        "name": "Cardio Fitness",
+        "description": "Improve cardiovascular health and endurance",
+        "level": "intermediate",
+        "goal": "cardio",
+        "duration_minutes": 20,
+        "exercises": [
+            {"name": "Jumping Jacks", "sets": 3, "duration": "60 seconds", "rest": "30 seconds"},
+            {"name": "High Knees", "sets": 3, "duration": "45 seconds", "rest": "30 seconds"},
+            {"name": "Mountain Climbers", "sets": 3, "duration": "45 seconds", "rest": "30 seconds"},
+            {"name": "Burpees", "sets": 3, "reps": 10, "rest": "60 seconds"}
+        ]
+    },
+    {
+        "name": "Flexibility & Mobility",
+        "description": "Improve flexibility and joint mobility",
+        "level": "beginner",
+        "goal": "flexibility",
+        "duration_minutes": 15,
+        "exercises": [
+            {"name": "Cat-Cow Stretch", "duration": "60 seconds"},
+            {"name": "Downward Dog", "duration": "45 seconds"},
+            {"name": "Pigeon Pose", "sets": 2, "duration": "60 seconds per side"},
+            {"name": "World's Greatest Stretch", "sets": 2, "reps": 5, "duration": "30 seconds per side"}
+        ]
+    },
+]
+
+def seed_starter_plans(db: Session) -> int:
+    """Adds STARTER_PLANS to an empty catalog; returns how many plans were added"""
+    if db.query(models.WorkoutPlan.id).first() is not None:
+        return 0
+    db.add_all(models.WorkoutPlan(**plan) for plan in STARTER_PLANS)
+    db.commit()
+    return len(STARTER_PLANS)
+
+@lru_cache(maxsize=4096)
+def _name_modalities(name: str) -> Tuple[int, ...]:
+    lowered = name.lower()
+    return tuple(
+        index for index, modality in enumerate(MODALITIES)
+        if any(keyword in lowered for keyword in MODALITY_KEYWORDS[modality])
+    )
+
+def modality_vector(names: Iterable[str], weights: Optional[Iterable[float]] = None) -> np.ndarray:
+    """Weighted count of names per modality"""
+    vector = np.zeros(len(MODALITIES))
+    for name, weight in zip(names, weights if weights is not None else repeat(1.0)):
+        for index in _name_modalities(name):
+            vector[index] += weight
+    return vector
+
+def _unit_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0)
+
+def normalize_level(level: str) -> str:
+    return level if level in LEVELS else "intermediate"
+
+def normalize_goal(goal: str) -> str:
+    goal = goal.replace("-", "_").replace(" ", "_").lower()
+    return goal if goal in GOALS else "general"
+
+class WorkoutIndex:
+    """Feature arrays over a catalog snapshot, plus the per-bucket score cache"""
+    def __init__(self, plans: List[Dict[str, Any]]):
+        self.plans = plans
+        self.levels = np.array([LEVELS.index(normalize_level(plan["level"])) for plan in plans], dtype=np.float64)
+        self.goals = np.array([GOALS.index(normalize_goal(plan["goal"])) for plan in plans], dtype=np.int64)
+        self.modalities = _unit_rows(np.array(
+            [modality_vector(exercise["name"] for exercise in plan["exercises"]) for plan in plans]
+        ).reshape(len(plans), len(MODALITIES)))
+        self._buckets: Dict[Tuple[str, str], np.ndarray] = {}
+
+    def bucket_scores(self, level: str, goal: str) -> np.ndarray:
+        key = (level, goal)
+        scores = self._buckets.get(key)
+        if scores is None:
+            level_fit = 1.0 - np.abs(self.levels - LEVELS.index(level)) / (len(LEVELS) - 1)
+            goal_fit = GOAL_AFFINITY[GOALS.index(goal), self.goals]
+            scores = LEVEL_WEIGHT * level_fit + GOAL_WEIGHT * goal_fit
+            scores.flags.writeable = False
+            self._buckets[key] = scores
+        return scores
+
+    def recommend(self, level: str, goal: str, history: np.ndarray, limit: int) -> List[Tuple[Dict[str, Any], float]]:
+        """Top `limit` plans with their scores, best first"""
+        if not self.plans or limit <= 0:
+            return []
+        scores = self.bucket_scores(level, goal)
+        norm = np.linalg.norm(history)
+        if norm > 0:
+            scores = scores + HISTORY_WEIGHT * (1.0 - self.modalities @ (history / norm))
+
+        if limit < len(scores):
+            top = np.argpartition(-scores, limit - 1)[:limit]
+        else:
+            top = np.arange(len(scores))
+        # Best score first, ties by catalog order
+        top = top[np.lexsort((top, -scores[top]))]
+        return [(self.plans[index], float(scores[index])) for index in top]
+
+class WorkoutRecommender:
+    """
+    Process-wide catalog index, rebuilt after `ttl_seconds` so plans added by
+    other processes show up; `invalidate` rebuilds it on the next request.
+    """
+    def __init__(self, ttl_seconds: float = 600):
+        self.ttl_seconds = ttl_seconds
+        self._index: Optional[WorkoutIndex] = None
+        self._expires_at = 0.0
+
+    def invalidate(self):
+        self._index = None
+
+    def index(self, db: Session) -> WorkoutIndex:
+        if self._index is None or self._expires_at < time.monotonic():
+            rows = db.query(models.WorkoutPlan).order_by(models.WorkoutPlan.id).all()
+            self._index = WorkoutIndex([
+                {
+                    "id": row.id,
+                    "name": row.name,
+                    "description": row.description,
+                    "level": row.level,
+                    "goal": row.goal,
+                    "duration_minutes": row.duration_minutes,
+                    "exercises": row.exercises,
+                }
+                for row in rows
+            ])
+            self._expires_at = time.monotonic() + self.ttl_seconds
+        return self._index
+
+    def history(self, db: Session, user_id: int) -> np.ndarray:
+        """Minutes per modality the user logged over the last HISTORY_DAYS"""
+        logs = models.ExerciseLog
+        rows = db.query(logs.exercise_type, func.sum(logs.duration_minutes)).filter(
+            logs.user_id == user_id,
+            logs.performed_at >= datetime.utcnow() - timedelta(days=HISTORY_DAYS)
+        ).group_by(logs.exercise_type).all()
+        return modality_vector((row[0] for row in rows), (float(row[1] or 0) for row in rows))
+
+    def recommend(self, db: Session, user_id: int, level: str, goal: str, limit: int = 3) -> List[Tuple[Dict[str, Any], float]]:
+        index = self.index(db)
+        return index.recommend(normalize_level(level), normalize_goal(goal), self.history(db, user_id), limit)
+
+workout_recommender = WorkoutRecommender()